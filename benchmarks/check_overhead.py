@@ -0,0 +1,80 @@
+"""
+Per call overhead of ``check`` for built-in trafarets.
+
+Pass path to checkout of other revision to compare with it, this revision is
+imported as usual and other one runs in subprocess with its path in
+``PYTHONPATH``:
+
+    git worktree add ../trafaret-base <revision>
+    python benchmarks/check_overhead.py ../trafaret-base
+"""
+from __future__ import print_function
+import json
+import os
+import subprocess
+import sys
+import timeit
+import trafaret as t
+
+
+CASES = [
+    ('Any', t.Any(), 1),
+    ('Null', t.Null(), None),
+    ('Bool', t.Bool(), True),
+    ('StrBool', t.StrBool(), 'yes'),
+    ('Atom', t.Atom('a'), 'a'),
+    ('Enum', t.Enum('a', 'b', 'c'), 'c'),
+    ('Type', t.Type(int), 1),
+    ('Subclass', t.Subclass(int), bool),
+    ('Callable', t.Callable(), len),
+    ('Call', t.Call(lambda v: v), 1),
+    ('Float', t.Float(), 1.5),
+    ('Int', t.Int(), 5),
+    ('Int[0:10]', t.Int[0:10], 5),
+    ('String', t.String(), 'abc'),
+    ('String(regex)', t.String(regex=r'\w+'), 'abc'),
+    ('Email', t.Email(), 'someone@example.net'),
+    ('URL', t.URL(), 'http://example.net/'),
+    ('List', t.List(t.Int), [1, 2, 3]),
+    ('Tuple', t.Tuple(t.Int, t.String), (1, 'a')),
+    ('Mapping', t.Mapping(t.String, t.Int), {'a': 1}),
+    ('Or', t.Or(t.Int, t.String), 'a'),
+    ('Dict', t.Dict(a=t.Int), {'a': 1}),
+    ('Int >> str', t.Int() >> str, 5),
+]
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def timings(number):
+    return [measure(lambda: trafaret.check(value), number) for name, trafaret, value in CASES]
+
+
+def baseline_timings(path, number):
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(path))
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--timings', str(number)], env=env,
+    )
+    return json.loads(output.decode('utf-8'))
+
+
+def main(baseline=None, number=100000):
+    after = timings(number)
+    if baseline is None:
+        print('%-16s %12s' % ('trafaret', 'check, us'))
+        for (name, _, _), spent in zip(CASES, after):
+            print('%-16s %12.3f' % (name, spent))
+        return
+    before = baseline_timings(baseline, number)
+    print('%-16s %12s %12s' % ('trafaret', 'baseline, us', 'current, us'))
+    for (name, _, _), old, new in zip(CASES, before, after):
+        print('%-16s %12.3f %12.3f' % (name, old, new))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--timings']:
+        print(json.dumps(timings(int(sys.argv[2]))))
+    else:
+        main(*sys.argv[1:2])
@@ -0,0 +1,33 @@
+"""
+``Dict`` check time for schemas with 10, 100 and 1000 keys.
+Time per key should stay flat, so check time grows linearly with keys count.
+
+    python benchmarks/dict_keys.py
+"""
+from __future__ import print_function
+import timeit
+import trafaret as t
+
+
+def case(size, extras):
+    trafaret = t.Dict(dict(('key%s' % i, t.Int) for i in range(size)))
+    value = dict(('key%s' % i, i) for i in range(size))
+    if extras:
+        trafaret.allow_extra(*['extra%s' % i for i in range(size)])
+        value.update(('extra%s' % i, i) for i in range(size))
+    return trafaret, value
+
+
+def main(repeat=5):
+    print('%-8s %-8s %14s %14s' % ('keys', 'extras', 'check, us', 'per key, us'))
+    for extras in (False, True):
+        for size in (10, 100, 1000):
+            trafaret, value = case(size, extras)
+            number = max(10, 20000 // size)
+            spent = min(timeit.repeat(lambda: trafaret.check(value), number=number, repeat=repeat))
+            per_call = spent / number * 1e6
+            print('%-8s %-8s %14.2f %14.4f' % (size, extras, per_call, per_call / len(value)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+``is_valid`` compared to ``check`` in ``try``/``except`` for valid and invalid
+values.
+
+    python benchmarks/is_valid.py
+"""
+from __future__ import print_function
+import timeit
+import trafaret as t
+
+
+RECORD = t.Dict(
+    id=t.Int[1:],
+    email=t.Email,
+    tags=t.List(t.String(max_length=10)),
+    kind=t.Enum('a', 'b', 'c'),
+    meta=t.Mapping(t.String, t.Int | t.Null),
+)
+VALID = {
+    'id': 5,
+    'email': 'someone@example.net',
+    'tags': ['x'] * 20,
+    'kind': 'a',
+    'meta': dict(('k%d' % i, i) for i in range(20)),
+}
+INVALID = dict(VALID, id=0, tags=['x', 1] * 10, meta={'k': 'x'})
+
+CASES = [
+    ('Int', t.Int(), 5, 'x'),
+    ('String(regex)', t.String(regex=r'^\w+$'), 'abc', 'a b'),
+    ('List(Int)', t.List(t.Int), list(range(100)), ['x'] * 100),
+    ('Or', t.Or(t.Int, t.Null, t.String), 'a', 1.5),
+    ('Dict record', RECORD, VALID, INVALID),
+]
+
+
+def check(trafaret, value):
+    try:
+        trafaret.check(value)
+    except t.DataError:
+        return False
+    return True
+
+
+def measure(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main(number=20000):
+    print('%-14s %8s %14s %14s' % ('trafaret', 'value', 'check, us', 'is_valid, us'))
+    for name, trafaret, valid, invalid in CASES:
+        for kind, value in (('valid', valid), ('invalid', invalid)):
+            before = measure(lambda: check(trafaret, value), number)
+            after = measure(lambda: trafaret.is_valid(value), number)
+            print('%-14s %8s %14.3f %14.3f' % (name, kind, before, after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+``Or`` of 60 ``Dict`` branches with ``type`` tag key, with and without
+``discriminator``. Value matches the last branch.
+
+    python benchmarks/tagged_or.py
+"""
+from __future__ import print_function
+import timeit
+import trafaret as t
+
+
+def branches(count):
+    return [
+        t.Dict(type=t.Atom('event%s' % i), id=t.Int, payload=t.String)
+        for i in range(count)
+    ]
+
+
+def main(count=60, number=2000):
+    value = {'type': 'event%s' % (count - 1), 'id': 1, 'payload': 'x'}
+    print('%-16s %12s' % ('or', 'check, us'))
+    for name, trafaret in (
+        ('plain', t.Or(*branches(count))),
+        ('discriminator', t.Or(*branches(count), discriminator='type')),
+    ):
+        spent = min(timeit.repeat(lambda: trafaret.check(value), number=number, repeat=5))
+        print('%-16s %12.2f' % (name, spent / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,11 @@
 import doctest
 import trafaret
-from trafaret import utils, extras, visitor
+from trafaret import utils, extras, visitor, codegen, iterative, patch
 
 doctest.testmod(m=trafaret)
 doctest.testmod(m=extras)
 doctest.testmod(m=utils)
 doctest.testmod(m=visitor)
+doctest.testmod(m=codegen)
+doctest.testmod(m=iterative)
+doctest.testmod(m=patch)
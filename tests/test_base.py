@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
+import json
+import sys
 import unittest
 import trafaret as t
 from collections import Mapping as AbcMapping
-from trafaret import extract_error, ignore, DataError
+from trafaret import extract_error, ignore, DataError, catch_error
 from trafaret.extras import KeysSubset
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
 
 
 class TestAnyTrafaret(unittest.TestCase):
@@ -35,6 +41,108 @@ class TestBoolTrafaret(unittest.TestCase):
         self.assertEqual(err, 'value should be True or False')
 
 
+class TestCachedTrafaret(unittest.TestCase):
+    def test_cached(self):
+        calls = []
+
+        def fn(value):
+            calls.append(value)
+            return DataError('odd') if value % 2 else value
+        trafaret = t.Cached(t.Call(fn), maxsize=2)
+        self.assertEqual(trafaret.check(2), 2)
+        self.assertEqual(trafaret.check(2), 2)
+        self.assertEqual(extract_error(trafaret, 1), 'odd')
+        self.assertEqual(extract_error(trafaret, 1), 'odd')
+        self.assertIsNot(catch_error(trafaret, 1), catch_error(trafaret, 1))
+        self.assertEqual(trafaret.check(2.0), 2.0)
+        self.assertEqual(calls, [2, 1, 2.0])
+        self.assertEqual(trafaret.cache_info(), t.CacheInfo(hits=4, misses=3, evictions=1, maxsize=2, currsize=2))
+        self.assertFalse(trafaret.is_valid(1))
+        trafaret.cache_clear()
+        self.assertEqual(trafaret.cache_info(), t.CacheInfo(hits=0, misses=0, evictions=0, maxsize=2, currsize=0))
+
+    def test_unhashable(self):
+        trafaret = t.Cached(t.List(t.Int))
+        self.assertEqual(trafaret.check(['1']), [1])
+        self.assertEqual(extract_error(trafaret, (['x'],)), 'value is not a list')
+        self.assertEqual(trafaret.cache_info().currsize, 0)
+
+    def test_ttl(self):
+        trafaret = t.Cached(t.Int, ttl=10)
+        now = [0]
+        trafaret._clock = lambda: now[0]
+        trafaret.check(1)
+        now[0] = 5
+        trafaret.check(1)
+        now[0] = 11
+        trafaret.check(1)
+        self.assertEqual(trafaret.cache_info().hits, 1)
+        self.assertEqual(trafaret.cache_info().misses, 2)
+
+    def test_registry(self):
+        first = t.Cached(t.Int, maxsize=100)
+        second = t.Cached(t.Int, maxsize=100)
+        limit = t.MAX_CACHED_RESULTS
+        t.MAX_CACHED_RESULTS = t.Cached.registry_info().currsize + 10
+        try:
+            for value in range(8):
+                first.check(value)
+            for value in range(4):
+                second.check(value)
+        finally:
+            t.MAX_CACHED_RESULTS = limit
+        self.assertEqual(first.cache_info().currsize, 6)
+        self.assertEqual(second.cache_info().currsize, 4)
+        self.assertEqual(first.cache_info().evictions, 2)
+        self.assertEqual(t.Cached.registry_info().maxsize, limit)
+
+    def test_registry_count(self):
+        import gc
+        first = t.Cached(t.Int, maxsize=100)
+        second = t.Cached(t.Int, maxsize=100)
+        self.assertIsNot(first._lock, second._lock)
+        total = t.Cached._total
+        for value in range(5):
+            first.check(value)
+        first.check(0)
+        self.assertEqual(t.Cached._total, total + 5)
+        first.cache_clear()
+        self.assertEqual(t.Cached._total, total)
+        for value in range(5):
+            first.check(value)
+        # results of collected cache are subtracted when limit is reached
+        del first
+        gc.collect()
+        limit = t.MAX_CACHED_RESULTS
+        t.MAX_CACHED_RESULTS = t.Cached.registry_info().currsize + 1
+        try:
+            second.check(1)
+            second.check(2)
+        finally:
+            t.MAX_CACHED_RESULTS = limit
+        self.assertEqual(second.cache_info().currsize, 1)
+        self.assertEqual(t.Cached._total, t.Cached.registry_info().currsize)
+
+    def test_threads(self):
+        import threading
+        trafaret = t.Cached(t.Int, maxsize=10)
+
+        def worker():
+            for value in range(100):
+                trafaret.check(value % 20)
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = trafaret.cache_info()
+        self.assertEqual(info.hits + info.misses, 400)
+        self.assertEqual(info.currsize, 10)
+
+    def test_repr(self):
+        self.assertEqual(repr(t.Cached(t.Int, ttl=5)), '<Cached(<Int>, maxsize=128, ttl=5)>')
+
+
 class TestCallTrafaret(unittest.TestCase):
     def test_call(self):
         def validator(value):
@@ -100,6 +208,291 @@ class TestDictTrafaret(unittest.TestCase):
         self.assertEqual(res, {'simple': 'simple data'})
 
 
+    def test_many_keys(self):
+        trafaret = t.Dict(dict(('key%s' % i, t.Int) for i in range(300)))
+        value = dict(('key%s' % i, i) for i in range(300))
+        self.assertEqual(trafaret.check(value), value)
+        value['extra'] = 1
+        res = extract_error(trafaret, value)
+        self.assertEqual(res, {'extra': 'extra is not allowed key'})
+        trafaret.ignore_extra('extra')
+        self.assertEqual(len(trafaret.check(value)), 300)
+        value['other'] = 2
+        trafaret.allow_extra('other')
+        self.assertEqual(trafaret.check(value)['other'], 2)
+        merged = trafaret + t.Dict(extra=t.Int)
+        self.assertEqual(extract_error(merged, value), {'other': 'other is not allowed key'})
+        del value['other']
+        self.assertEqual(merged.check(value)['extra'], 1)
+
+    def test_keys_change(self):
+        trafaret = t.Dict(a=t.Int)
+        self.assertIsInstance(trafaret.keys, tuple)
+        with self.assertRaises(AttributeError):
+            trafaret.keys.append(t.Key('x', trafaret=t.Int()))
+        trafaret.keys += (t.Key('x', trafaret=t.Int()),)
+        self.assertEqual(trafaret.check({'a': 1, 'x': 2}), {'a': 1, 'x': 2})
+        self.assertEqual(extract_error(trafaret, {'a': 1}), {'x': 'is required'})
+        trafaret.keys = [key for key in trafaret.keys if key.name != 'a']
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'x': 2}), {'a': 'a is not allowed key'})
+
+    def test_sparse_value(self):
+        keys = dict((t.Key('flag%s' % i, optional=True), t.Bool) for i in range(200))
+        keys[t.Key('renamed', optional=True) >> 'new_name'] = t.Int
+        keys[t.Key('with_default', default=lambda: 'x')] = t.String
+        keys[t.Key('required')] = t.Int
+        keys[KeysSubset('flag1', 'flag2')] = lambda d: {'both': len(d) == 2}
+        trafaret = t.Dict(keys)
+        compiled = trafaret.compile()
+        value = {'flag1': True, 'flag150': False, 'renamed': 5, 'required': 1}
+        res = trafaret.check(value)
+        self.assertEqual(res, {
+            'flag1': True, 'flag150': False, 'new_name': 5,
+            'required': 1, 'with_default': 'x', 'both': False,
+        })
+        self.assertEqual(list(res), list(compiled(value)))
+        value = {'flag3': 1, 'renamed': 'a', 'extra': 1}
+        self.assertEqual(extract_error(trafaret, value), extract_error(compiled, value))
+        self.assertEqual(extract_error(trafaret, value), {
+            'flag3': 'value should be True or False',
+            'new_name': "value can't be converted to int",
+            'required': 'is required',
+            'extra': 'extra is not allowed key',
+        })
+
+    def test_fail_fast(self):
+        trafaret = t.Dict({
+            'email': t.Email,
+            'tags': t.List(t.String),
+            'id': t.Int,
+            t.Key('kind', default='a'): t.Atom('a'),
+        }).stop_on_first_error()
+        self.assertEqual(trafaret.check({'email': 'a@b.cd', 'tags': [], 'id': 1}),
+                         {'email': 'a@b.cd', 'tags': [], 'id': 1, 'kind': 'a'})
+        self.assertEqual(extract_error(trafaret, {'email': 'x', 'tags': 1, 'id': 'x'}),
+                         {'id': "value can't be converted to int"})
+        self.assertEqual(extract_error(trafaret, {'email': 'x', 'tags': 1, 'id': 1, 'kind': 'b'}),
+                         {'kind': "value is not exactly 'a'"})
+        self.assertEqual(extract_error(trafaret, {'email': 'x', 'tags': 1, 'id': 1}),
+                         {'email': 'value is not a valid email address'})
+        self.assertEqual(extract_error(trafaret, {'email': 'x', 'id': 'x', 'foo': 1}),
+                         {'foo': 'foo is not allowed key'})
+        trafaret.allow_extra('foo')
+        self.assertEqual(extract_error(trafaret, {'email': 'a@b.cd', 'tags': [], 'id': 1, 'bar': 1}),
+                         {'bar': 'bar is not allowed key'})
+        self.assertEqual(trafaret.check({'email': 'a@b.cd', 'tags': [], 'id': 1, 'foo': 1})['foo'], 1)
+        trafaret.stop_on_first_error(False)
+        self.assertEqual(len(extract_error(trafaret, {'email': 'x', 'tags': 1, 'id': 'x'})), 3)
+
+        both_bad = lambda v: {'a': t.DataError('bad'), 'b': t.DataError('bad')}
+        trafaret = t.Dict({KeysSubset('a', 'b'): both_bad}, c=t.Int).stop_on_first_error()
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'c': 1}), {'a': 'bad'})
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'c': 1, 'd': 1}), {'a': 'bad'})
+
+    def test_limit_errors(self):
+        trafaret = t.Dict(
+            t.Key('a', trafaret=t.Int()),
+            t.Key('b', trafaret=t.Int()),
+            t.Key('c', trafaret=t.Int()),
+        ).limit_errors(2, lightweight_errors=True)
+        self.assertEqual(trafaret.check({'a': 1, 'b': 2, 'c': 3}), {'a': 1, 'b': 2, 'c': 3})
+        res = extract_error(trafaret, {'a': 'x', 'b': 'x', 'c': 'x'})
+        self.assertEqual(len(res), 3)
+        self.assertEqual(res['...'], 'and 1 more keys are not checked')
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'c': 'x'}), {
+            'b': 'is required',
+            'c': "value can't be converted to int",
+        })
+        # not allowed names left after limit are counted like keys
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5, 'f': 6}), {
+            'd': 'd is not allowed key',
+            'e': 'e is not allowed key',
+            '...': 'and 1 more keys are not checked',
+        })
+        self.assertEqual(extract_error(trafaret, {'a': 1, 'b': 'x', 'c': 3, 'd': 4}), {
+            'b': "value can't be converted to int",
+            'd': 'd is not allowed key',
+        })
+        trafaret.limit_errors()
+        self.assertEqual(len(extract_error(trafaret, {'a': 'x', 'b': 'x', 'c': 'x'})), 3)
+
+    def test_check_lazy(self):
+        calls = []
+
+        def counted(value):
+            calls.append(value)
+            return value
+        trafaret = t.Dict({
+            t.Key('a') >> 'x': t.Int,
+            t.Key('b', default='5'): t.Int,
+            t.Key('c', optional=True): t.Call(counted),
+            t.Key('d', optional=True): t.Int,
+        }).allow_extra('e').ignore_extra('f')
+        value = {'a': '1', 'c': 'c', 'e': 2, 'f': 3}
+        view = trafaret.check_lazy(value)
+        self.assertIsInstance(view, AbcMapping)
+        self.assertIsInstance(view, t.LazyDict)
+        self.assertEqual(sorted(view), ['b', 'c', 'e', 'x'])
+        self.assertEqual(len(view), 4)
+        self.assertIn('c', view)
+        self.assertNotIn('d', view)
+        self.assertEqual(calls, [])
+        self.assertEqual(view['c'], 'c')
+        self.assertEqual(view['c'], 'c')
+        self.assertEqual(calls, ['c'])
+        self.assertEqual(view['b'], 5)
+        self.assertEqual(view.get('d', 0), 0)
+        with self.assertRaises(KeyError):
+            view['a']
+        with self.assertRaises(TypeError):
+            view['x'] = 1
+        lazy = t.Dict(a=t.Int).check_lazy({'a': 1})
+        self.assertEqual(repr(lazy), '<LazyDict(a=unchecked)>')
+        lazy['a']
+        self.assertEqual(repr(lazy), '<LazyDict(a=checked)>')
+        self.assertEqual(view.materialize(), trafaret.check(value))
+        self.assertEqual(calls, ['c', 'c'])
+
+        value = {'a': 'x', 'd': 'y'}
+        view = trafaret.check_lazy(value)
+        with self.assertRaises(DataError) as context:
+            view['d']
+        self.assertEqual(context.exception.as_dict(), {'d': "value can't be converted to int"})
+        self.assertEqual(extract_error(view.materialize), extract_error(trafaret, value))
+        self.assertEqual(extract_error(trafaret.check_lazy, {'g': 1}), {'a': 'is required', 'g': 'g is not allowed key'})
+        self.assertEqual(extract_error(trafaret.check_lazy, 1), 'value is not a dict')
+
+        self.assertEqual((t.Dict(a=t.Int) >> (lambda d: d['a'])).check_lazy({'a': 1}).materialize(), 1)
+        subset = t.Dict({KeysSubset('a', 'b'): lambda data: {'a': data.get('a')}})
+        view = subset.check_lazy({'a': 1})
+        self.assertEqual(dict(view), {'a': 1})
+
+    def test_project(self):
+        checked = []
+
+        def counted(value):
+            checked.append(value)
+            return value
+        envelope = t.Dict({
+            'user': t.Dict({
+                'id': t.Int,
+                t.Key('email') >> 'mail': t.Call(counted),
+                'name': t.String,
+            }),
+            'items': t.List(t.Dict(id=t.Int, name=t.Call(counted)), max_length=2),
+            t.Key('trace', default='x'): t.Call(counted),
+            'meta': t.Dict(a=t.Int) >> (lambda value: value['a']),
+        })
+        value = {
+            'user': {'id': 1, 'email': 'a@b.cd', 'name': 'x', 'extra': 1},
+            'items': [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}],
+            'meta': {'a': 1},
+            'other': 1,
+        }
+        slim = envelope.project({'user.id', 'user.mail', 'items.id', ('meta', 'a')})
+        self.assertIs(envelope.project(['user.id', 'user.mail', 'items.id', ('meta', 'a')]), slim)
+        self.assertIsNot(envelope.project(['user']), slim)
+        self.assertEqual(slim.check(value), {
+            'user': {'id': 1, 'mail': 'a@b.cd'},
+            'items': [{'id': 1}, {'id': 2}],
+            'meta': 1,
+        })
+        self.assertEqual(checked, ['a@b.cd'])
+        self.assertEqual(envelope.project(['trace']).check({}), {'trace': 'x'})
+        # whole user is checked, with its extra keys
+        self.assertEqual(
+            extract_error(envelope.project(['user', 'user.id']), value),
+            {'user': {'extra': 'extra is not allowed key'}},
+        )
+        self.assertEqual(extract_error(slim, {'user': {'id': 'x'}, 'items': [{}] * 3, 'meta': {'a': 1}}), {
+            'user': {'id': "value can't be converted to int", 'email': 'is required'},
+            'items': 'list length is greater than 2',
+        })
+
+        node = t.Forward()
+        node << t.Dict(name=t.String, size=t.Int, children=t.List[node])
+        tree = {'name': 'a', 'size': 'x', 'children': [{'name': 'b', 'size': 'y', 'children': []}]}
+        self.assertEqual(
+            node.trafaret.project(['name', 'children.name', 'children.children']).check(tree),
+            {'name': 'a', 'children': [{'name': 'b', 'children': []}]},
+        )
+        subset = t.Dict({KeysSubset('a', 'b'): lambda data: {'a': data.get('a')}})
+        self.assertIs(subset.project(['a']), subset)
+
+    def test_reuse_unchanged(self):
+        trafaret = t.Dict({
+            t.Key('a'): t.Int,
+            t.Key('b', optional=True): t.List(t.Int, reuse_input=True),
+        }).allow_extra('c').reuse_unchanged()
+        value = {'a': 1, 'b': [1], 'c': None}
+        self.assertIs(trafaret.check(value), value)
+        self.assertEqual(trafaret.check({'a': 1.0}), {'a': 1})
+        value = {'a': 1, 'b': [1.0]}
+        self.assertEqual(trafaret.check(value), {'a': 1, 'b': [1]})
+        renamed = t.Dict({t.Key('a') >> 'x': t.Int}).reuse_unchanged()
+        self.assertEqual(renamed.check({'a': 1}), {'x': 1})
+        defaulted = t.Dict({t.Key('a'): t.Int, t.Key('b', default=1): t.Int}).reuse_unchanged()
+        self.assertEqual(defaulted.check({'a': 1}), {'a': 1, 'b': 1})
+        ignored = t.Dict(a=t.Int).ignore_extra('b').reuse_unchanged()
+        value = {'a': 1, 'b': 2}
+        self.assertEqual(ignored.check(value), {'a': 1})
+        for mode in (lambda d: d.cache_shapes(), lambda d: d.limit_errors(5), lambda d: d.stop_on_first_error()):
+            trafaret = mode(t.Dict(a=t.Int).reuse_unchanged())
+            value = {'a': 1}
+            self.assertIs(trafaret.check(value), value)
+            self.assertIs(trafaret.check(value), value)
+        trafaret.reuse_unchanged(False)
+        self.assertIsNot(trafaret.check(value), value)
+
+    def test_shape_cache(self):
+        def make():
+            return t.Dict({
+                t.Key('a') >> 'b': t.Int,
+                t.Key('c', default=lambda: 5): t.Int,
+                t.Key('d', optional=True): t.String,
+            }).allow_extra('e').ignore_extra('f')
+        cached = make().cache_shapes(2)
+        plain = make()
+        values = [
+            {'a': 1}, {'a': 'x', 'c': None}, {'a': 2}, {'a': 1, 'd': 'x', 'e': 3, 'f': 4},
+            {'d': 1}, {'a': 1, 'g': 1}, {'a': 3, 'e': None}, {'a': 1, 'd': 's'},
+            {'a': 1}, {'a': 1, 'b': 2, 'e': 0}, {'a': 1, 'e': 0}, [],
+        ]
+        for value in values:
+            self.assertEqual(extract_error(cached, value), extract_error(plain, value))
+        info = cached.shape_cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize, info.currsize), (1, 10, 2, 2))
+        cached.allow_extra('g')
+        self.assertEqual(cached.check({'a': 1, 'g': 1}), {'b': 1, 'c': 5, 'g': 1})
+        self.assertEqual(cached.shape_cache_info().misses, 1)
+        not_cached = t.Dict({KeysSubset('a'): t.Any}).cache_shapes()
+        self.assertEqual(not_cached.check({'a': 1}), {'a': 1})
+        self.assertEqual(not_cached.shape_cache_info().currsize, 0)
+
+    def test_shape_cache_threads(self):
+        import threading
+        trafaret = t.Dict({t.Key(name, optional=True): t.Int for name in 'abcdef'}).cache_shapes(2)
+        values = [dict((name, 1) for name in 'abcdef'[:size]) for size in range(1, 7)]
+        failures = []
+
+        def work():
+            try:
+                for _ in range(300):
+                    for value in values:
+                        if trafaret.check(value) != value:
+                            failures.append(value)
+            except Exception as err:
+                failures.append(err)
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        info = trafaret.shape_cache_info()
+        self.assertEqual(info.hits + info.misses, 4 * 300 * len(values))
+        self.assertEqual(info.currsize, 2)
+
     def test_base2(self):
         trafaret = t.Dict({t.Key('bar', optional=True): t.String}, foo=t.Int)
         trafaret.allow_extra('*')
@@ -225,6 +618,27 @@ class TestEmailTrafaret(unittest.TestCase):
         res = extract_error(t.Email(), 'f' * 248 + '@x.edu') == 'f' * 248 + '@x.edu'
         self.assertEqual(res, True)
 
+    def test_idna(self):
+        email = t.Email()
+        self.assertEqual(extract_error(email, 'someone@exa..mple.net'), 'value is not a valid email address')
+        self.assertEqual(extract_error(email, u'some one@пример.рф'), 'value is not a valid email address')
+        self.assertEqual(extract_error(email, u'someone@пример..рф'), 'value is not a valid email address')
+        self.assertTrue(email.is_valid(u'someone@пример.рф'))
+        self.assertFalse(email.is_valid('someone@example'))
+        self.assertFalse(email.is_valid(u'someone@пример..рф'))
+        self.assertEqual(str(email.check(u'someone@ПРИМЕР.рф')), 'someone@xn--e1afmkfd.xn--p1ai')
+
+    def test_idna_cache(self):
+        domains = [u'пример%s.рф' % number for number in range(t.IDNA_CACHE_SIZE + 10)]
+        for domain in domains + domains[:5]:
+            self.assertEqual(t._idna(domain), domain.encode('idna').decode('ascii'))
+        self.assertEqual(t._idna(u'пример..рф'), None)
+        if hasattr(t._idna, 'cache_info'):
+            self.assertLessEqual(t._idna.cache_info().currsize, t.IDNA_CACHE_SIZE)
+        else:
+            self.assertLessEqual(len(t._idna_cache), t.IDNA_CACHE_SIZE)
+            self.assertIn(domains[0], t._idna_cache)
+
 
 
 class TestEnumTrafaret(unittest.TestCase):
@@ -236,6 +650,25 @@ class TestEnumTrafaret(unittest.TestCase):
         res = extract_error(trafaret, 2)
         self.assertEqual(res, "value doesn't match any variant")
 
+    def test_index(self):
+        trafaret = t.Enum(*(['code%s' % i for i in range(5000)] + [[1], frozenset([2])]))
+        self.assertEqual(trafaret.check('code4999'), 'code4999')
+        self.assertEqual(trafaret.check([1]), [1])
+        self.assertEqual(trafaret.check(set([2])), set([2]))
+        self.assertEqual(extract_error(trafaret, 'CODE1'), "value doesn't match any variant")
+        self.assertEqual(extract_error(trafaret, {}), "value doesn't match any variant")
+
+    def test_casefold(self):
+        trafaret = t.Enum('USD', 'usd', 'Eur', 1, casefold=True)
+        self.assertEqual(repr(trafaret), "<Enum('USD', 'usd', 'Eur', 1, casefold=True)>")
+        self.assertEqual(trafaret.check('usd'), 'usd')
+        self.assertEqual(trafaret.check('uSd'), 'USD')
+        self.assertEqual(trafaret.check('EUR'), 'Eur')
+        self.assertEqual(trafaret.check(1), 1)
+        self.assertEqual(extract_error(trafaret, 'gbp'), "value doesn't match any variant")
+        with self.assertRaises(TypeError):
+            t.Enum('a', case=True)
+
 
 
 class TestFloat(unittest.TestCase):
@@ -286,6 +719,115 @@ class TestForwardTrafaret(unittest.TestCase):
         res = extract_error(empty_node, 'something')
         self.assertEqual(res, 'trafaret not set yet')
 
+    def schemas(self, iterative, memoize=False):
+        node = t.Forward(iterative=iterative, memoize=memoize)
+        node << (t.Dict({
+            'name': t.String,
+            t.Key('kids', default=list) >> 'children': t.List(node, max_length=3),
+            t.Key('pair', optional=True): t.Tuple(t.Int, node),
+            t.Key('attrs', optional=True): t.Mapping(t.String, t.Or(t.Int, node)),
+            t.Key('tagged', optional=True): t.Or(
+                t.Dict(type=t.Atom('leaf'), value=t.Int),
+                t.Dict(type=t.Atom('node'), value=node),
+                discriminator='type',
+            ),
+            t.Key('subset', optional=True): t.Dict({KeysSubset('a', 'b'): lambda data: {'a': node(data['a'])}}),
+        }).allow_extra('x') >> (lambda value: sorted(value.items())))
+        return node
+
+    def test_iterative(self):
+        values = [
+            {'name': 'a'},
+            {'name': 'a', 'kids': [{'name': 'b', 'kids': [{'name': 1}]}], 'x': 5},
+            {'name': 'a', 'kids': [{'name': 'b'}] * 4},
+            {'name': 'a', 'pair': [1, {'name': 'b', 'pair': (2, {})}]},
+            {'name': 'a', 'pair': 5, 'y': 1},
+            {'name': 'a', 'attrs': {'b': 1, 'c': {'name': 'c'}, 1: {'name': 2}}},
+            {'name': 'a', 'tagged': {'type': 'node', 'value': {'name': 'b', 'tagged': {'type': 'leaf', 'value': 'x'}}}},
+            {'name': 'a', 'tagged': {'type': 'other'}},
+            {'name': 'a', 'subset': {'a': {'name': 'b'}, 'b': 1}},
+            {'name': 'a', 'subset': {'a': {'name': 2}}},
+            [],
+        ]
+        recursive = self.schemas(False)
+        for iterative in (self.schemas(True), self.schemas(False, memoize=True)):
+            for value in values:
+                expected = catch_error(recursive, value)
+                res = catch_error(iterative, value)
+                if isinstance(expected, DataError):
+                    self.assertIsInstance(res, DataError)
+                    self.assertEqual(res.as_dict(value=True), expected.as_dict(value=True))
+                else:
+                    self.assertEqual(res, expected)
+
+    def test_iterative_depth(self):
+        node = t.Forward(iterative=True)
+        node << t.Dict(name=t.String, children=t.List[node])
+        leaf = value = {'name': 'x', 'children': []}
+        depth = sys.getrecursionlimit() * 2
+        for _ in range(depth):
+            value = {'name': 'x', 'children': [value]}
+        res = node.check(value)
+        for _ in range(depth):
+            res = res['children'][0]
+        self.assertEqual(res, {'name': 'x', 'children': []})
+        leaf['name'] = 1
+        path = [name for name, _, _ in catch_error(node, value).flatten()][0]
+        self.assertEqual(len(path), depth * 2 + 1)
+        self.assertEqual(path[-1], 'name')
+
+    def test_iterative_cycle(self):
+        tree = t.Forward(iterative=True)
+        tree << t.Or(t.Null(), t.List(tree))
+        value = [None]
+        value.append(value)
+        self.assertEqual(extract_error(tree, value), {
+            0: 'value should be None',
+            1: {1: 'value contains reference to itself'},
+        })
+        node = t.Forward(iterative=True)
+        node << t.Dict(name=t.String, children=t.List[node])
+        value = {'name': 'a', 'children': []}
+        value['children'].append({'name': 'b', 'children': [value]})
+        self.assertEqual(extract_error(node, value), {
+            'children': {0: {'children': {0: 'value contains reference to itself'}}},
+        })
+        # the same object checked twice without nesting is not a cycle
+        shared = {'name': 'b', 'children': []}
+        self.assertEqual(node.check({'name': 'a', 'children': [shared, shared]})['children'], [shared, shared])
+
+    def test_iterative_reuse_input(self):
+        node = t.Forward(iterative=True)
+        node << t.Dict(
+            name=t.String,
+            children=t.List(node, reuse_input=True),
+            attrs=t.Mapping(t.String, t.Tuple(t.Int, reuse_input=True), reuse_input=True),
+        ).reuse_unchanged()
+        value = {'name': 'a', 'attrs': {}, 'children': [{'name': 'b', 'attrs': {'x': (1,)}, 'children': []}]}
+        self.assertIs(node.check(value), value)
+        value['children'][0]['attrs']['y'] = [2]
+        res = node.check(value)
+        self.assertIsNot(res, value)
+        self.assertEqual(res['children'][0]['attrs'], {'x': (1,), 'y': (2,)})
+        self.assertIs(res['children'][0]['attrs']['x'], value['children'][0]['attrs']['x'])
+
+    def test_memoize(self):
+        names = []
+        node = t.Forward(memoize=True)
+        node << t.Dict(name=t.Call(lambda value: names.append(value) or value), children=t.List[node])
+        shared = {'name': 'shared', 'children': []}
+        value = {'name': 'root', 'children': [shared, {'name': 'x', 'children': [shared]}, shared]}
+        res = node.check(value)
+        self.assertEqual(sorted(names), ['root', 'shared', 'x'])
+        self.assertIs(res['children'][0], res['children'][1]['children'][0])
+        node.check(value)
+        self.assertEqual(names.count('shared'), 2)
+        shared['children'].append(value)
+        res = extract_error(node, value)
+        self.assertEqual(res['children'][0], {'children': {0: 'value contains reference to itself'}})
+        codes = set(code for _, code, _ in catch_error(node, value).flatten())
+        self.assertEqual(codes, set(['cycle']))
+
 
 
 class TestIntTrafaret(unittest.TestCase):
@@ -320,9 +862,176 @@ class TestKey(unittest.TestCase):
         res = list(t.Key(name='test', optional=True)({}))
         self.assertEqual(res, [])
 
+    def test_key_extract(self):
+        calls = []
+
+        def default():
+            calls.append(1)
+            return 0
+        key = t.Key('a', default=default, to_name='b', trafaret=t.Int())
+        collect, errors = {}, {}
+        key.extract({'a': '1'}, collect, errors)
+        self.assertEqual((collect, errors, calls), ({'b': 1}, {}, []))
+        key.extract({}, collect, errors)
+        self.assertEqual((collect, errors, calls), ({'b': 0}, {}, [1]))
+        key.extract({'a': 'x'}, collect, errors)
+        self.assertEqual(errors['b'].as_dict(), "value can't be converted to int")
+        errors = {}
+        t.Key('c').extract({}, collect, errors)
+        self.assertEqual(errors['c'].as_dict(), 'is required')
+
+    def test_get_data_key(self):
+        class ListKey(t.Key):
+            def get_data(self, data, default):
+                return data.get_all(self.name, default)
+
+        class MultiDict(dict):
+            def get_all(self, name, default):
+                return [self[name]] if name in self else default
+
+        trafaret = t.Dict({ListKey('a'): t.List(t.Int)})
+        self.assertEqual(trafaret.check(MultiDict(a=1)), {'a': [1]})
+        self.assertEqual(extract_error(trafaret, MultiDict(b=1)),
+                         {'a': 'is required', 'b': 'b is not allowed key'})
+
 
 
 class TestList(unittest.TestCase):
+    def test_lazy(self):
+        taken = []
+
+        def source(count):
+            for number in range(count):
+                taken.append(number)
+                yield str(number)
+        trafaret = t.List(t.Int, lazy=True)
+        self.assertEqual(repr(t.List(t.Int, lazy=True, min_length=1)), '<List(lazy, min_length=1 | <Int>)>')
+        items = trafaret.check(source(100000))
+        self.assertEqual(taken, [])
+        self.assertEqual(next(items), 0)
+        self.assertEqual(sum(items), 4999950000)
+        self.assertEqual(len(taken), 100000)
+        self.assertEqual(list(trafaret.check((1, 2))), [1, 2])
+        self.assertEqual(extract_error(trafaret, 1), 'value is not iterable')
+        self.assertEqual(extract_error(trafaret, 'abc'), 'value is not iterable')
+        with self.assertRaises(DataError) as context:
+            list(trafaret.check(iter([1, 2, 'x', 'y'])))
+        self.assertEqual(context.exception.as_dict(), {2: "value can't be converted to int"})
+
+        del taken[:]
+        items = t.List(t.Int, lazy=True, max_length=2).check(source(10))
+        with self.assertRaises(DataError) as context:
+            list(items)
+        self.assertEqual(context.exception.code, 'list_too_long')
+        self.assertEqual(taken, [0, 1, 2])
+        with self.assertRaises(DataError) as context:
+            list(t.List(t.Int, lazy=True, min_length=3).check(source(2)))
+        self.assertEqual(context.exception.as_dict(), 'list length is less than 3')
+
+        self.assertTrue(t.List(t.Int, lazy=True, max_length=3).is_valid(source(3)))
+        self.assertFalse(t.List(t.Int, lazy=True, max_length=3).is_valid(source(4)))
+        self.assertFalse(t.List(t.Int, lazy=True, min_length=3).is_valid(source(2)))
+        self.assertFalse(trafaret.is_valid(['1', 'x']))
+        self.assertFalse(trafaret.is_valid('1'))
+        self.assertTrue((t.Null | trafaret).is_valid((1,)))
+
+    def test_reuse_input(self):
+        trafaret = t.List(t.Int | t.String, reuse_input=True)
+        value = [1, 'a', 2]
+        self.assertIs(trafaret.check(value), value)
+        value = [1, 2.0, 3]
+        res = trafaret.check(value)
+        self.assertIsNot(res, value)
+        self.assertEqual(res, [1, 2, 3])
+        self.assertEqual(extract_error(trafaret, [1, None]), {1: {0: 'value is not int', 1: 'value is not a string'}})
+        value = [1, 2]
+        self.assertIsNot(t.List(t.Int).check(value), value)
+
+    def test_max_errors(self):
+        trafaret = t.List(t.Int, max_errors=3, lightweight_errors=True)
+        with self.assertRaises(DataError) as context:
+            trafaret.check(['x'] * 200000)
+        error = context.exception.error
+        self.assertEqual(sorted(error, key=str), ['...', 0, 1, 2])
+        self.assertEqual(str(error[t.MORE_ERRORS]), 'and 199997 more items are not checked')
+        # same errors are shared and do not keep values
+        self.assertIs(error[0], error[1])
+        self.assertIs(error[0].value, t._empty)
+        self.assertEqual(extract_error(trafaret, ['x', 'y', 'z']), {
+            0: "value can't be converted to int",
+            1: "value can't be converted to int",
+            2: "value can't be converted to int",
+        })
+        self.assertEqual(extract_error(t.List(t.Int, lightweight_errors=True), 1), 'value is not a list')
+        nested = t.List(t.Dict(a=t.Int), lightweight_errors=True)
+        with self.assertRaises(DataError) as context:
+            nested.check([{'a': 'x'}, {'a': 'y'}])
+        error = context.exception
+        self.assertIs(error.error[0].error['a'], error.error[1].error['a'])
+        self.assertIs(error.error[0].error['a'].value, t._empty)
+
+        tup = t.Tuple(t.Int, t.Int, t.Int, max_errors=1, lightweight_errors=True)
+        self.assertEqual(extract_error(tup, ['x', 'y', 'z']), {
+            0: "value can't be converted to int",
+            '...': 'and 2 more items are not checked',
+        })
+        mapping = t.Mapping(t.String, t.Int, max_errors=1)
+        self.assertEqual(len(extract_error(mapping, {'a': 'x', 'b': 'y', 'c': 'z'})), 2)
+
+    def test_lightweight_errors_are_not_raised_shared(self):
+        import gc
+        import weakref
+
+        class Value(object):
+            pass
+        tree = t.Forward(iterative=True)
+        tree << t.List(t.Int, lightweight_errors=True)
+        trafarets = [
+            t.List(t.Int, lightweight_errors=True),
+            t.Tuple(t.Int, lightweight_errors=True),
+            t.Mapping(t.String, t.Int, lightweight_errors=True),
+            t.Dict(a=t.Int).limit_errors(1, lightweight_errors=True),
+            tree,
+        ]
+        for trafaret in trafarets:
+            first, second = catch_error(trafaret, 1), catch_error(trafaret, 1)
+            self.assertIsNot(first, second)
+            first.name = 'changed'
+            self.assertIs(second.name, None)
+
+            def check(value):
+                try:
+                    trafaret.check(value)
+                except DataError:
+                    pass
+            value = Value()
+            ref = weakref.ref(value)
+            check(value)
+            del value
+            gc.collect()
+            # raised error keeps frames, they must not be kept by later checks
+            self.assertIs(ref(), None)
+            self.assertIsNot(catch_error(trafaret, 1), catch_error(trafaret, 1))
+
+    def test_shared_errors_of_equal_params(self):
+        ints = t.List(t.Atom(1), lightweight_errors=True)
+        bools = t.List(t.Atom(True), lightweight_errors=True)
+        self.assertEqual(extract_error(ints, [2]), {0: "value is not exactly '1'"})
+        self.assertEqual(extract_error(bools, [2]), {0: "value is not exactly 'True'"})
+        ints = t.List(t.Float(gte=1), lightweight_errors=True)
+        floats = t.List(t.Float(gte=1.0), lightweight_errors=True)
+        self.assertEqual(extract_error(ints, [0]), {0: 'value is less than 1'})
+        self.assertEqual(extract_error(floats, [0]), {0: 'value is less than 1.0'})
+
+    def test_fail_fast(self):
+        self.assertEqual(extract_error(t.List(t.Int, fail_fast=True), [1, 'a', 'b']),
+                         {1: "value can't be converted to int"})
+        self.assertEqual(extract_error(t.Tuple(t.Int, t.Int, fail_fast=True), ['a', 'b']),
+                         {0: "value can't be converted to int"})
+        self.assertEqual(len(extract_error(t.Mapping(t.String, t.Int, fail_fast=True), {'a': 'a', 'b': 'b'})), 1)
+        with self.assertRaises(TypeError):
+            t.Tuple(t.Int, fast=True)
+
 
     def test_list_repr(self):
         res = t.List(t.Int)
@@ -380,6 +1089,14 @@ class TestMappingTrafaret(unittest.TestCase):
         res = extract_error(trafaret.check, None)
         self.assertEqual(res, 'value is not a dict')
 
+    def test_reuse_input(self):
+        trafaret = t.Mapping(t.String, t.Int, reuse_input=True)
+        value = {'a': 1, 'b': 2, 'c': 3}
+        self.assertIs(trafaret.check(value), value)
+        self.assertEqual(trafaret.check({'a': 1, 'b': 2.0, 'c': 3}), value)
+        self.assertEqual(t.Mapping(t.String >> str.upper, t.Int, reuse_input=True).check(value), {'A': 1, 'B': 2, 'C': 3})
+        self.assertIsNot(t.Mapping(t.String, t.Int).check(value), value)
+
 
 class TestNullTrafaret(unittest.TestCase):
 
@@ -432,6 +1149,114 @@ class TestOrNotToTest(unittest.TestCase):
 
 
 
+    def test_discriminator(self):
+        trafaret = t.Or(
+            t.Dict(type=t.Atom('a'), a=t.Int),
+            t.Dict(type=t.Enum('b', 'c'), b=t.String),
+            discriminator='type',
+        )
+        self.assertEqual(repr(t.Or(t.Int, discriminator='type')), "<Or(<Int>, discriminator='type')>")
+        self.assertEqual(trafaret.check({'type': 'c', 'b': 'x'}), {'type': 'c', 'b': 'x'})
+        self.assertEqual(extract_error(trafaret, {'type': 'a', 'a': 'x'}), {0: {'a': "value can't be converted to int"}})
+        self.assertEqual(extract_error(trafaret, {'type': 'd'}), {'type': "value doesn't match any variant"})
+        self.assertEqual(extract_error(trafaret, {'type': []}), {'type': "value doesn't match any variant"})
+        self.assertEqual(extract_error(trafaret, {}), {'type': 'is required'})
+        self.assertEqual(extract_error(trafaret, 1), 'value is not a dict')
+        # branches without tag are tried in declaration order together with tagged ones
+        trafaret << t.Null << t.Dict(type=t.String, d=t.Int)
+        self.assertEqual(trafaret.check(None), None)
+        self.assertEqual(trafaret.check({'type': 'd', 'd': 1}), {'type': 'd', 'd': 1})
+        self.assertEqual(
+            extract_error(trafaret, {'type': 'a'}),
+            {0: {'a': 'is required'}, 2: 'value should be None', 3: {'d': 'is required'}},
+        )
+        with self.assertRaises(TypeError):
+            t.Or(t.Int, discriminatr='type')
+
+
+    def test_accepted_types(self):
+        trafaret = t.Or(t.Int, t.String, t.Null, t.List(t.Int), t.Dict(a=t.Int), t.Type(set))
+        self.assertEqual(trafaret.check([1]), [1])
+        self.assertEqual(trafaret.check(set()), set())
+        self.assertEqual(trafaret._type_candidates(list), [3])
+        self.assertEqual(trafaret._type_candidates(bool), [0])
+        self.assertEqual(trafaret._type_candidates(type(None)), [2])
+        # skipped branches are still reported
+        self.assertEqual(extract_error(trafaret, [1, 'a']), {
+            0: 'value is not int',
+            1: 'value is not a string',
+            2: 'value should be None',
+            3: {1: "value can't be converted to int"},
+            4: 'value is not a dict',
+            5: 'value is not set',
+        })
+
+        class AnyString(t.String):
+            def check_and_return(self, value):
+                return str(value)
+        self.assertEqual((t.Null | AnyString).check(1), '1')
+        self.assertEqual(AnyString().accepted_types(), t.String().accepted_types())
+        self.assertEqual(t.Or(t.Any, lambda v: v)._type_candidates(int), [0, 1])
+
+    def test_error_order(self):
+        def make():
+            return t.Or(t.List(t.Int), t.Dict(a=t.Int), t.Int, t.Null)
+        guarded = make()
+        unguarded = make()
+        # without guards all branches are tried in declaration order
+        unguarded._guards = [None] * len(unguarded.trafarets)
+        iterative = t.Forward(iterative=True)
+        iterative << make()
+        for value in ['x', 1.5, [1, 'x'], {'a': 'x'}]:
+            expected = catch_error(unguarded, value)
+            for trafaret in (guarded, iterative):
+                error = catch_error(trafaret, value)
+                self.assertEqual(repr(error), repr(expected))
+                self.assertEqual(list(error.as_dict()), [0, 1, 2, 3])
+                stream, expected_stream = StringIO(), StringIO()
+                error.write_json(stream)
+                expected.write_json(expected_stream)
+                self.assertEqual(stream.getvalue(), expected_stream.getvalue())
+
+
+    def test_adaptive(self):
+        trafaret = t.Or(t.String >> (lambda v: 'string'), t.Any >> (lambda v: 'any'), adaptive=True)
+        self.assertEqual(repr(t.Or(t.Int, adaptive=True)), '<Or(<Int>, adaptive=True)>')
+        self.assertEqual(t.Or(t.Int).branch_hits(), None)
+        self.assertEqual(trafaret.check('x'), 'string')
+        self.assertEqual(trafaret.branch_hits(), [1, 0])
+        for value in range(trafaret.reorder_period - 1):
+            trafaret.check(value)
+        self.assertEqual(trafaret.branch_hits(), [1, 999])
+        # most frequent branch goes first, any matching branch may win
+        self.assertEqual(trafaret.check('x'), 'any')
+        self.assertEqual(trafaret.branch_hits(), [1, 1000])
+        self.assertEqual(extract_error(t.Or(t.Int, t.Null, adaptive=True), 'x'), {
+            0: "value can't be converted to int",
+            1: 'value should be None',
+        })
+        # reordered branches still report errors in declaration order
+        trafaret = t.Or(t.Int, t.Null, adaptive=True)
+        for _ in range(trafaret.reorder_period):
+            trafaret.check(None)
+        self.assertEqual(trafaret._order, (1, 0))
+        error = catch_error(trafaret, 'x')
+        self.assertEqual(list(error.error), [0, 1])
+        self.assertEqual(repr(error), repr(catch_error(t.Or(t.Int, t.Null), 'x')))
+
+
+    def test_atoms(self):
+        trafaret = t.Or(*[t.Atom('code%s' % i) for i in range(100)])
+        self.assertEqual(trafaret.check('code99'), 'code99')
+        self.assertEqual(trafaret.check('code1'), 'code1')
+        res = extract_error(trafaret, 'code100')
+        self.assertEqual(len(res), 100)
+        self.assertEqual(res[99], "value is not exactly 'code99'")
+        self.assertEqual(len(extract_error(trafaret, [])), 100)
+        self.assertEqual((t.Atom(1) | t.Atom(True) >> str).check(True), True)
+        self.assertEqual((t.Atom(1) >> str | t.Atom(2)).check(1), '1')
+
+
 class TestStrBoolTrafaret(unittest.TestCase):
 
     def test_str_bool(self):
@@ -510,6 +1335,222 @@ class TestTrafaretMeta(unittest.TestCase):
         self.assertEqual(res, 5)
 
 
+    def test_check_dispatch(self):
+        class Even(t.Trafaret):
+            def check_value(self, value):
+                if value % 2:
+                    self._failure('value is odd')
+
+        class Half(t.Trafaret):
+            def check_and_return(self, value):
+                return value / 2
+
+        class Manual(Even):
+            def check(self, value):
+                return 'manual'
+
+        self.assertEqual(Even().check(2), 2)
+        self.assertEqual(extract_error(Even(), 1), 'value is odd')
+        self.assertEqual(Half().check(4), 2)
+        self.assertEqual(Manual().check(1), 'manual')
+        self.assertEqual((Manual() >> str).check(1), 'manual')
+        doubled = Even() >> (lambda v: v * 2)
+        self.assertEqual(doubled.check(2), 4)
+        self.assertEqual(Even().check(2), 2)
+        self.assertEqual((t.String(regex=r'\d+') >> (lambda m: int(m.group()))).check('12'), 12)
+        self.assertEqual(t.String(regex=r'\d+').check('12'), '12')
+        # subclasses of built-in trafarets do not pick compatibility check_and_return
+        self.assertEqual(t.Int._check_method, '_check_or_error')
+        self.assertEqual(t.Type._check_method, '_check_or_error')
+
+    def test_dispatch_mro(self):
+        class Even(t.Trafaret):
+            def check_value(self, value):
+                if value % 2:
+                    self._failure('value is odd')
+
+        class Halved(Even):
+            def check_and_return(self, value):
+                return value // 2
+
+        class Logged(Even):
+            def check(self, value):
+                return ('logged', super(Logged, self).check(value))
+
+        # hook closest in MRO is used, not check_value first
+        self.assertEqual(Halved().check(3), 1)
+        self.assertEqual(Logged().check(2), ('logged', 2))
+        self.assertEqual((Logged() >> str).check(2), ('logged', '2'))
+        self.assertEqual(extract_error(Logged(), 1), 'value is odd')
+
+    def test_appended_converters(self):
+        import copy
+        import pickle
+        trafaret = t.List(t.Int() >> str)
+        # nothing is bound to instance, so it has no reference cycles
+        for name in ('check', '_validate', '_valid'):
+            self.assertNotIn(name, vars(trafaret.trafaret))
+        self.assertEqual(copy.deepcopy(trafaret).check([1]), ['1'])
+        self.assertEqual(pickle.loads(pickle.dumps(trafaret, 2)).check([1]), ['1'])
+        self.assertFalse((t.Int() >> int).is_valid('1.5'))
+        self.assertEqual(t.Int().check(1), 1)
+
+
+class TestValidate(unittest.TestCase):
+    def test_validate(self):
+        res = t.Int().validate(5)
+        self.assertTrue(res)
+        self.assertEqual(res, t.Ok(5))
+        self.assertEqual(res.value, 5)
+        res = t.Dict(a=t.List(t.Int | t.Null)).validate({'a': [1, 'b']})
+        self.assertFalse(res)
+        self.assertIsInstance(res, t.Err)
+        self.assertEqual(res.error.as_dict(), {'a': {1: {0: "value can't be converted to int", 1: 'value should be None'}}})
+
+    def test_converters(self):
+        def fail(value):
+            raise DataError('converter failed')
+        self.assertEqual((t.Int() >> str).validate(1), t.Ok('1'))
+        self.assertEqual((t.Int() >> fail).validate(1).error.as_dict(), 'converter failed')
+        self.assertEqual(t.Call(lambda v: DataError('nope')).validate(1).error.as_dict(), 'nope')
+
+    def test_subclasses(self):
+        class Lower(t.String):
+            def check_and_return(self, value):
+                return super(Lower, self).check_and_return(value).lower()
+
+        class Positive(t.Trafaret):
+            def check_value(self, value):
+                if value <= 0:
+                    self._failure('value is not positive')
+
+        self.assertEqual(Lower().check('AbC'), 'abc')
+        self.assertEqual(extract_error(Lower(), 1), 'value is not a string')
+        self.assertEqual(t.List(Lower).validate(['A']), t.Ok(['a']))
+        self.assertEqual(t.List(Positive).validate([1, 0]).error.as_dict(), {1: 'value is not positive'})
+        self.assertEqual(t.Int().check_and_return(1), 1)
+        with self.assertRaises(DataError):
+            t.Int().check_and_return('a')
+
+    def test_check_value_subclasses(self):
+        class Small(t.Atom):
+            def check_value(self, value):
+                super(Small, self).check_value(value)
+                if value > 5:
+                    self._failure('value is too big')
+
+        self.assertEqual(Small(1).check(1), 1)
+        self.assertEqual(extract_error(Small(1), 2), "value is not exactly '1'")
+        self.assertEqual(extract_error(Small(6), 6), 'value is too big')
+        self.assertIsNone(t.Atom(1).check_value(1))
+        with self.assertRaises(DataError) as ctx:
+            t.Atom(1).check_value(2)
+        self.assertEqual(ctx.exception.as_dict(), "value is not exactly '1'")
+        self.assertIsNone(t.Any().check_value(1))
+        for trafaret, value in [(t.Null(), 1), (t.Bool(), 1), (t.StrBool(), 'x'), (t.Enum(1), 2),
+                                (t.Callable(), 1), (t.Type(int), 'x'), (t.Subclass(int), str)]:
+            with self.assertRaises(DataError):
+                trafaret.check_value(value)
+
+
+class TestIsValid(unittest.TestCase):
+    def cases(self):
+        node = t.Forward()
+        node << t.Dict(name=t.String, children=t.List[node])
+        iterative = t.Forward(iterative=True)
+        iterative << t.Or(t.Null, t.List[iterative])
+        return [
+            (t.Any(), [1, None]),
+            (t.Null(), [None, 0]),
+            (t.Bool(), [True, 1]),
+            (t.StrBool(), ['yes', 'aloha', None]),
+            (t.Int(), [1, 1.0, 1.5, '2', 'x', None, 1 + 1j, True]),
+            (t.Float(gte=1, lte=2), [1, 1.5, 3, '1.5', 'x', float('nan')]),
+            (t.Int > 3, [3, 4]),
+            (t.Int < 3, [3, 2]),
+            (t.Atom('a'), ['a', 'b']),
+            (t.String(), ['a', '', 1, b'x']),
+            (t.String(min_length=2, max_length=3, regex=r'\d+'), ['12', '1', '1234', 'ab']),
+            (t.Email(), ['someone@example.net', 'foo', u'someone@\u043f\u0440\u0438\u043c\u0435\u0440.\u0440\u0444']),
+            (t.URL(), ['http://example.net/', 'foo', u'http://\u043f\u0440\u0438\u043c\u0435\u0440.\u0440\u0444/']),
+            (t.Type(int), [1, 'a']),
+            (t.Subclass(int), [bool, str]),
+            (t.Callable(), [len, 1]),
+            (t.Call(lambda v: v if v else DataError('empty')), [1, 0]),
+            (t.Enum('a', 1, [2], casefold=True), ['a', 'A', 1, [2], 'b', set()]),
+            (t.List(t.Int, min_length=1, max_length=2), [[1], [], [1, 2, 3], [1, 'a'], 1]),
+            (t.Tuple(t.Int, t.String), [(1, 'a'), [1, 'a'], (1, 2), (1,), 1]),
+            (t.Mapping(t.String, t.Int), [{'a': 1}, {1: 1}, {'a': 'b'}, []]),
+            (t.Or(t.Int, t.String), [1, 'a', None]),
+            (t.Or(t.Atom('a'), t.Atom('b')), ['a', 'b', 'c', []]),
+            (t.Or(t.Dict(type=t.Atom('a'), a=t.Int), t.Null, discriminator='type'),
+             [{'type': 'a', 'a': 1}, {'type': 'a'}, {'type': 'b'}, {}, None, 1]),
+            (t.Dict({t.Key('a') >> 'b': t.Int, t.Key('c', default='x'): t.Int, t.Key('d', optional=True): t.Int}),
+             [{'a': 1, 'c': 2}, {'a': 1}, {'c': 1}, {'a': 1, 'c': 1, 'd': 'x'}, {'a': 1, 'c': 1, 'e': 1}, 1]),
+            (t.Dict(a=t.Int).allow_extra('b'), [{'a': 1, 'b': 1}, {'a': 1, 'c': 1}]),
+            (t.Dict(a=t.Int).ignore_extra('*'), [{'a': 1, 'b': 1}]),
+            (t.Dict({KeysSubset('a', 'b'): lambda d: {'a': DataError('x')} if d.get('a') else {}}), [{}, {'a': 1}]),
+            (node, [{'name': 'a', 'children': [{'name': 'b', 'children': []}]}, {'name': 'a', 'children': [{}]}]),
+            (iterative, [[None, [None]], [[1]]]),
+            (t.Forward(), [1]),
+            (t.Int() >> (lambda v: v if v else t.Int().check('x')), [1, 0]),
+        ]
+
+    def test_same_as_check(self):
+        for trafaret, values in self.cases():
+            for value in values:
+                expected = not isinstance(catch_error(trafaret, value), DataError)
+                self.assertEqual(trafaret.is_valid(value), expected, (trafaret, value))
+
+    def test_no_errors(self):
+        created = []
+        init = DataError.__init__
+
+        def counting_init(self, *args, **kwargs):
+            created.append(self)
+            init(self, *args, **kwargs)
+        DataError.__init__ = counting_init
+        try:
+            trafaret = t.Dict(a=t.List(t.Int | t.Null), b=t.String(regex=r'\w+'), c=t.Email)
+            self.assertFalse(trafaret.is_valid({'a': [1, None, 'x'], 'b': 'a', 'c': 'a@b.cd'}))
+            self.assertFalse(trafaret.is_valid({'a': [1], 'b': '-', 'c': 'a@b.cd'}))
+            self.assertFalse(trafaret.is_valid({'a': [1], 'b': 'a'}))
+            self.assertTrue(trafaret.is_valid({'a': [1, None], 'b': 'a', 'c': 'a@b.cd'}))
+        finally:
+            DataError.__init__ = init
+        self.assertEqual(created, [])
+
+    def test_dispatch(self):
+        self.assertEqual(t.Int()._valid.__name__, '_is_valid')
+        self.assertEqual(t.Dict()._valid.__name__, '_is_valid')
+
+        class Upper(t.String):
+            def converter(self, value):
+                raise DataError('always')
+
+        class Positive(t.Int):
+            def _check_or_error(self, value):
+                value = super(Positive, self)._check_or_error(value)
+                if not isinstance(value, DataError) and value <= 0:
+                    return DataError('not positive')
+                return value
+
+        class Odd(t.Int):
+            def is_valid(self, value):
+                return value % 2 == 1
+
+        self.assertEqual(Upper()._valid.__name__, '_valid_by_validate')
+        self.assertEqual(Positive()._valid.__name__, '_valid_by_validate')
+        self.assertEqual(Odd()._valid.__name__, '_valid_by_is_valid')
+        self.assertFalse(Upper().is_valid('a'))
+        self.assertFalse(t.List(Positive).is_valid([1, 0]))
+        self.assertFalse(t.List(Odd).is_valid([1, 2]))
+        self.assertTrue(t.List(Odd).is_valid([1, 3]))
+        trafaret = t.Int()
+        self.assertTrue(trafaret.is_valid(1))
+        trafaret >> (lambda value: t.Int().check('x'))
+        self.assertFalse(trafaret.is_valid(1))
+
 
 class TestTupleTrafaret(unittest.TestCase):
     def test_tuple(self):
@@ -520,6 +1561,14 @@ class TestTupleTrafaret(unittest.TestCase):
         res = extract_error(tup, [3, 4, 5])
         self.assertEqual(res, {2: 'value is not a string'})
 
+    def test_reuse_input(self):
+        tup = t.Tuple(t.Int, t.String, reuse_input=True)
+        value = (1, 'a')
+        self.assertIs(tup.check(value), value)
+        self.assertEqual(tup.check((1.0, 'a')), (1, 'a'))
+        self.assertEqual(tup.check([1, 'a']), (1, 'a'))
+        self.assertIsNot(t.Tuple(t.Int, t.String).check(value), value)
+
 
 class TestTypeTrafaret(unittest.TestCase):
 
@@ -532,6 +1581,19 @@ class TestTypeTrafaret(unittest.TestCase):
         res = extract_error(c, "foo")
         self.assertEqual(res, 'value is not int')
 
+    def test_failure_message(self):
+        class Instance(t.Type):
+            failure_message = 'value is not a %s instance'
+
+        class Coded(Instance):
+            failure_code = 'not_instance'
+
+        self.assertEqual(extract_error(Instance(int), 'foo'), 'value is not a int instance')
+        self.assertEqual(extract_error(Instance[int], 'foo'), 'value is not a int instance')
+        self.assertEqual(extract_error(Coded(int), 'foo'), 'value is not int')
+        self.assertEqual(t.Type.failure_message, 'value is not %s')
+        self.assertEqual(t.Subclass.failure_message, 'value is not subclass of %s')
+
 
 class TestSubclassTrafaret(unittest.TestCase):
 
@@ -557,6 +1619,27 @@ class TestURLTrafaret(unittest.TestCase):
         res = str(t.URL().check('http://пример.рф/resource/?param=value#anchor'))
         self.assertEqual(res, 'http://xn--e1afmkfd.xn--p1ai/resource/?param=value#anchor')
 
+    def test_normalized(self):
+        # ASCII urls are checked again if ``urlsplit`` changed them
+        self.assertEqual(t.URL().check('http://example.net?'), 'http://example.net')
+        self.assertTrue(t.URL().is_valid('http://example.net?'))
+        self.assertEqual(extract_error(t.URL(), 'http://exa mple.net'), 'value is not URL')
+        self.assertFalse(t.URL().is_valid('http://exa mple.net'))
+        self.assertFalse(t.URL().is_valid(u'http://пример..рф'))
+
+    def test_split(self):
+        url = t.URL(split=True)
+        self.assertEqual(repr(url), '<URL(split)>')
+        res = url.check('http://example.net:8080/resource/?param=value#anchor')
+        self.assertEqual(
+            (res.scheme, res.netloc, res.path, res.query, res.fragment),
+            ('http', 'example.net:8080', '/resource/', 'param=value', 'anchor'),
+        )
+        res = url.check(u'http://пример.рф/resource/')
+        self.assertEqual(str(res.geturl()), 'http://xn--e1afmkfd.xn--p1ai/resource/')
+        self.assertEqual((url >> (lambda parts: parts.path)).check('http://example.net/a'), '/a')
+        self.assertEqual(extract_error(url, 'foo'), 'value is not URL')
+
 
 class TestKeysSubset(unittest.TestCase):
     def test_keys_subset(self):
@@ -593,6 +1676,83 @@ class TestDataError(unittest.TestCase):
             "Wait for good value, got 'BAD ONE'"
         )
 
+    def test_codes(self):
+        with self.assertRaises(DataError) as context:
+            t.Int(gte=5).check(3)
+        error = context.exception
+        self.assertEqual((error.code, error.params, error.value), ('gte', {'gte': 5}, 3))
+        self.assertEqual(error.error, 'value is less than 5')
+        self.assertEqual(str(error), 'value is less than 5')
+        with self.assertRaises(DataError) as context:
+            t.Dict(a=t.Int, b=t.String(regex='x+')).check({'a': 'x', 'b': 'y', 'c': 1})
+        errors = context.exception.error
+        self.assertEqual(
+            dict((k, (v.code, v.params)) for k, v in errors.items()),
+            {
+                'a': ('not_convertable', {'type': 'int'}),
+                'b': ('pattern', {'pattern': 'x+'}),
+                'c': ('not_allowed_key', {'key': 'c'}),
+            },
+        )
+        messages = {'not_convertable': 'need %(type)s', 'pattern': 'need %(pattern)s'}
+        self.assertEqual(context.exception.as_dict(messages=messages), {
+            'a': 'need int',
+            'b': 'need x+',
+            'c': 'c is not allowed key',
+        })
+        self.assertEqual(t.DataError(code='unknown').error, 'unknown')
+        error = t.DataError(code='required')
+        error.error = 'custom'
+        self.assertEqual(error.as_dict(), 'custom')
+
+    def test_flatten(self):
+        error = catch_error(t.Dict(a=t.List(t.Int), b=t.Int), {'a': [1, 'x', 'y'], 'b': 1.5})
+        self.assertEqual(sorted(error.flatten()), [
+            (('a', 1), 'not_convertable', "value can't be converted to int"),
+            (('a', 2), 'not_convertable', "value can't be converted to int"),
+            (('b',), 'not_number', 'value is not int'),
+        ])
+        self.assertEqual(list(t.DataError('bad').flatten()), [((), None, 'bad')])
+        self.assertEqual(list(t.DataError({'a': 'plain'}).flatten()), [(('a',), None, 'plain')])
+        self.assertEqual(list(t.DataError({}).flatten()), [])
+        self.assertEqual(
+            list(t.DataError(code='gte', params={'gte': 1}).flatten(messages={'gte': '>= %(gte)s'})),
+            [((), 'gte', '>= 1')],
+        )
+        # deeper than recursion limit
+        deep = t.DataError('bottom')
+        for _ in range(sys.getrecursionlimit() * 2):
+            deep = t.DataError({'child': deep})
+        [(path, code, message)] = list(deep.flatten())
+        self.assertEqual((len(path), code, message), (sys.getrecursionlimit() * 2, None, 'bottom'))
+
+    def test_write_json(self):
+        error = catch_error(t.List(t.Int), ['x'] * 100)
+        stream = StringIO()
+        self.assertTrue(error.write_json(stream))
+        entries = json.loads(stream.getvalue())
+        self.assertEqual(len(entries), 100)
+        self.assertEqual(entries[0], {'path': [0], 'code': 'not_convertable', 'message': "value can't be converted to int"})
+        stream = StringIO()
+        self.assertFalse(error.write_json(stream, max_size=500))
+        self.assertLessEqual(len(stream.getvalue()), 500)
+        self.assertEqual(len(json.loads(stream.getvalue())), 5)
+        stream = StringIO()
+        self.assertFalse(error.write_json(stream, max_size=10))
+        self.assertEqual(stream.getvalue(), '[]')
+        stream = StringIO()
+        t.DataError({(1, 2): t.DataError('bad')}).write_json(stream)
+        self.assertEqual(json.loads(stream.getvalue()), [{'path': ['(1, 2)'], 'code': None, 'message': 'bad'}])
+
+    def test_catalog(self):
+        original = t.DataError.messages
+        t.DataError.messages = dict(original, required='required field')
+        try:
+            self.assertEqual(extract_error(t.Dict(a=t.Int), {}), {'a': 'required field'})
+        finally:
+            t.DataError.messages = original
+        self.assertEqual(extract_error(t.Dict(a=t.Int), {}), {'a': 'is required'})
+
 
 # res = @guard(a=String, b=Int, c=String)
 #     def fn(a, b, c="default"):
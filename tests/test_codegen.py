@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import unittest
+import trafaret as t
+from trafaret import catch_error, DataError
+from trafaret.codegen import compile_trafaret
+from trafaret.extras import KeysSubset
+
+
+def outcome(checker, value):
+    res = catch_error(checker, value)
+    if isinstance(res, DataError):
+        return 'error', res.code, res.as_dict(value=True)
+    return 'ok', res
+
+
+class TestCompile(unittest.TestCase):
+    def assertSame(self, trafaret, *values):
+        compiled = compile_trafaret(trafaret)
+        for value in values:
+            self.assertEqual(outcome(compiled, value), outcome(trafaret, value))
+
+    def test_scalars(self):
+        self.assertSame(t.Int(), 5, 5.0, 5.5, '5', 'a', 1 + 1j, None)
+        self.assertSame(t.Float(gte=1, lte=10), 0, 1, 10.5, '3.5', 'x')
+        self.assertSame(t.Int > 3, 3, 4)
+        self.assertSame(t.Int < 3, 3, 2)
+        self.assertSame(t.String(), 'a', '', 1, b'x')
+        self.assertSame(t.String(allow_blank=True, max_length=2), '', 'abc')
+        self.assertSame(t.String(min_length=2), 'a', 'ab')
+        self.assertSame(t.String(regex=r'^\w+$'), 'abc', 'a b')
+        self.assertSame(t.String(regex=r'(\d+)') >> (lambda m: m.group(1)), '12x', 'x')
+        self.assertSame(t.Null(), None, 0)
+        self.assertSame(t.Bool(), True, 1)
+        self.assertSame(t.Atom('a'), 'a', 'b')
+        self.assertSame(t.Enum('a', 1), 'a', 1, 2)
+        self.assertSame(t.Enum('a', [1], casefold=True) >> repr, 'A', [1], [2])
+        self.assertSame(t.Or(t.Atom('a'), t.Atom('b') >> repr), 'b', 'c')
+        self.assertSame(t.Any() >> t.ignore, 1)
+        self.assertSame(t.Email(), 'someone@example.net', 'foo')
+        self.assertSame(t.StrBool(), 'yes', 'aloha')
+        self.assertSame(t.Int() >> (lambda v: v * 2) >> str, 4, 'x')
+
+    def test_containers(self):
+        self.assertSame(t.List(t.Int, min_length=1, max_length=2), [], [1], [1, 'a'], [1, 2, 3], 1)
+        self.assertSame(t.Tuple(t.Int, t.String), [1, 'a'], (1, 2), [1], 5)
+        self.assertSame(t.Mapping(t.String, t.Int), {'a': 1}, {1: 'a', 'b': None}, [])
+        self.assertSame(t.Or(t.Int, t.String, t.Null), 1, 'a', None, [])
+        self.assertSame(t.Int | t.List(t.Int | t.String), 1, [1, 'x', None])
+        self.assertSame(t.List(t.Int, fail_fast=True), [1, 'a', 'b'])
+        self.assertSame(t.List(t.Int, reuse_input=True), [1, 2], [1, 2.0], [1, 'a'])
+        self.assertSame(t.Dict(a=t.Int).reuse_unchanged(), {'a': 1}, {'a': 1.0}, {'a': 'x'})
+        self.assertSame(t.List(t.Int, max_errors=1, lightweight_errors=True), [1, 'a', 'b'])
+        self.assertSame(t.Dict(a=t.Int, b=t.Email).stop_on_first_error(), {'a': 'x', 'b': 'x'}, {'a': 1, 'b': 'a@b.cd'})
+        tagged = t.Or(t.Dict(type=t.Atom('a'), a=t.Int), t.Null, discriminator='type') >> repr
+        self.assertSame(tagged, {'type': 'a', 'a': 1}, {'type': 'b'}, None, [])
+
+    def test_dict(self):
+        trafaret = t.Dict({
+            t.Key('a') >> 'b': t.Int,
+            t.Key('c', default=lambda: 5): t.Int,
+            t.Key('d', optional=True): t.String,
+            t.Key('e', default='x'): t.String,
+        }, f=t.Bool)
+        self.assertSame(
+            trafaret,
+            {'a': 1, 'f': True},
+            {'a': 'x', 'c': None, 'd': 1, 'f': 1},
+            {'b': 1},
+            {'a': 1, 'f': True, 'g': 1},
+            None,
+        )
+        trafaret.allow_extra('g')
+        self.assertSame(trafaret, {'a': 1, 'f': True, 'g': 1}, {'a': 1, 'f': True, 'h': 1})
+        trafaret.ignore_extra('h')
+        self.assertSame(trafaret, {'a': 1, 'f': True, 'h': 1})
+        trafaret.allow_extra('*')
+        self.assertSame(trafaret, {'a': 1, 'f': True, 'i': 1, 'b': 3})
+        trafaret.ignore_extra('*')
+        self.assertSame(trafaret, {'a': 1, 'f': True, 'i': 1})
+
+    def test_dict_custom_keys(self):
+        cmp_pwds = lambda x: {'pwd': x['pwd'] if x.get('pwd') == x.get('pwd1') else DataError('Not equal')}
+        trafaret = t.Dict({KeysSubset('pwd', 'pwd1'): cmp_pwds, 'key1': t.String})
+        self.assertSame(
+            trafaret,
+            {'pwd': 'a', 'pwd1': 'a', 'key1': 'b'},
+            {'pwd': 'a', 'pwd1': 'c', 'key1': 'b'},
+            {'pwd': 'a', 'pwd1': 'a', 'key1': 'b', 'key2': 1},
+        )
+
+        def simple_key(value):
+            yield 'simple', 'simple data', []
+        self.assertSame(t.Dict(simple_key), {}, {'simple': 1})
+
+    def test_forward(self):
+        node = t.Forward()
+        node << t.Dict(name=t.String, children=t.List[node])
+        self.assertSame(
+            node,
+            {'name': 'foo', 'children': []},
+            {'name': 'foo', 'children': [1]},
+            {'name': 'foo', 'children': [{'name': 'bar', 'children': [{'name': 1}]}]},
+        )
+        self.assertSame(t.Forward(), 'something')
+        node = t.Forward(iterative=True)
+        node << t.Or(t.Null, t.List[node])
+        self.assertSame(node, None, [[None], []], [[1]])
+        node = t.Forward(memoize=True)
+        node << t.Or(t.Null, t.List[node])
+        shared = [None, []]
+        cycle = [None]
+        cycle.append(cycle)
+        self.assertSame(node, [shared, [shared]], cycle)
+
+    def test_deep_nesting(self):
+        trafaret = t.Int
+        for _ in range(30):
+            trafaret = t.List(t.Dict(a=t.Or(trafaret, t.Null)))
+        value = 1
+        for _ in range(30):
+            value = [{'a': value}]
+        self.assertSame(trafaret, value, [{'a': [{'a': 'x'}]}])
+
+    def test_lazy_list(self):
+        fn = compile_trafaret(t.Dict(a=t.List(t.Int, lazy=True)))
+        self.assertEqual(list(fn({'a': iter(['1', 2])})['a']), [1, 2])
+        self.assertEqual(outcome(fn, {'a': 1}), outcome(t.Dict(a=t.List(t.Int, lazy=True)), {'a': 1}))
+
+    def test_method(self):
+        fn = t.Dict(a=t.Int).compile()
+        self.assertEqual(fn({'a': 1}), {'a': 1})
+        self.assertIn('def ', fn.source)
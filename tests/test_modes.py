@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import unittest
+import trafaret as t
+from trafaret import catch_error, DataError
+from trafaret.codegen import compile_trafaret
+from trafaret.extras import KeysSubset
+from trafaret.patch import apply_patch
+
+
+def outcome(res):
+    if isinstance(res, DataError):
+        # flatten keeps order of errors, so it is compared too
+        return 'error', res.as_dict(), list(res.flatten())
+    return 'ok', res
+
+
+def forward(trafaret, **kwargs):
+    node = t.Forward(**kwargs)
+    node << trafaret
+    return node
+
+
+def operations(base, value):
+    """
+    Returns JSON Patch operations that turn ``base`` into ``value``
+    """
+    if type(base) is dict and type(value) is dict and all(isinstance(name, str) for name in value):
+        ops = [{'op': 'remove', 'path': '/' + name} for name in base if name not in value]
+        ops.extend(
+            {'op': 'replace' if name in base else 'add', 'path': '/' + name, 'value': item}
+            for name, item in value.items()
+        )
+        return ops
+    if type(base) is list and type(value) is list:
+        common = min(len(base), len(value))
+        ops = [{'op': 'replace', 'path': '/%d' % index, 'value': value[index]} for index in range(common)]
+        ops.extend({'op': 'add', 'path': '/-', 'value': item} for item in value[common:])
+        ops.extend({'op': 'remove', 'path': '/%d' % index} for index in reversed(range(common, len(base))))
+        return ops
+    return [{'op': 'replace', 'path': '', 'value': value}]
+
+
+def patched(trafaret, base, value):
+    try:
+        return apply_patch(trafaret, base, trafaret.check(base), operations(base, value))[1]
+    except DataError as err:
+        return err
+
+
+MODES = [
+    ('iterative', lambda trafaret, base, value: catch_error(forward(trafaret, iterative=True), value)),
+    ('memoize', lambda trafaret, base, value: catch_error(forward(trafaret, memoize=True), value)),
+    ('compiled', lambda trafaret, base, value: catch_error(compile_trafaret(trafaret), value)),
+    ('patch', patched),
+]
+
+
+def node():
+    tree = t.Forward()
+    tree << t.Dict(name=t.String, children=t.List[tree])
+    return tree
+
+
+# schema factory, valid value used as base for patch, values to check
+SCHEMAS = [
+    (lambda: t.List(t.Int, min_length=1, max_length=3), [1],
+     [[1], [], [1, '2'], [1, 'x', 'y'], [1, 2, 3, 4], 'x', [1.5, 2]]),
+    (lambda: t.List(t.Int, max_errors=1, lightweight_errors=True), [1],
+     [[1, 'a', 'b'], [1, 2], 5]),
+    (lambda: t.List(t.Int, fail_fast=True, reuse_input=True), [1],
+     [[1, 'a', 'b'], [1, 2.0]]),
+    (lambda: t.Tuple(t.Int, t.String), (1, 'a'),
+     [(1, 'a'), [1, 2], ('x', 2), (1,), 5]),
+    (lambda: t.Tuple(t.Int, t.Int, t.Int, max_errors=1, lightweight_errors=True), (1, 2, 3),
+     [('x', 'y', 'z'), (1, 2, 3)]),
+    (lambda: t.Mapping(t.String, t.Int), {'a': 1},
+     [{'a': '2', 'b': 'x'}, {1: 1}, {'a': 1}, []]),
+    (lambda: t.Mapping(t.String, t.Int, max_errors=1), {'a': 1},
+     [{'a': 'x', 'b': 'y', 'c': 'z'}]),
+    (lambda: t.Dict({
+        t.Key('a') >> 'b': t.Int,
+        t.Key('c', default=5): t.Int,
+        t.Key('d', optional=True): t.List(t.String),
+    }).allow_extra('e').ignore_extra('f'), {'a': 1},
+     [{'a': '2', 'd': ['x']}, {'a': 'x', 'd': [1]}, {'d': []}, {'a': 1, 'e': 1, 'f': 2, 'g': 3}, 1]),
+    (lambda: t.Dict(a=t.Int, b=t.Int, c=t.Int).limit_errors(1), {'a': 1, 'b': 2, 'c': 3},
+     [{'a': 'x', 'b': 'y', 'c': 'z'}, {'a': 1, 'b': 2, 'c': 3, 'd': 4, 'e': 5}]),
+    (lambda: t.Dict({KeysSubset('a', 'b'): lambda v: {'a': v.get('a'), 'b': v.get('b')}}, c=t.Int),
+     {'a': 1, 'c': 1}, [{'a': 2, 'c': 'x'}, {'c': 1, 'd': 1}]),
+    (lambda: t.Or(t.List(t.Int), t.Dict(a=t.Int), t.Int, t.Null), 1,
+     ['x', 1.5, None, [1, 'x'], {'a': 'x'}, {}]),
+    (lambda: t.Or(t.Dict(type=t.Atom('a'), a=t.Int), t.Null, discriminator='type'), None,
+     [{'type': 'a', 'a': 1}, {'type': 'a', 'a': 'x'}, {'type': 'b'}, {}, 1]),
+    (node, {'name': 'a', 'children': []},
+     [{'name': 'a', 'children': [{'name': 'b', 'children': []}]},
+      {'name': 'a', 'children': [{'name': 1, 'children': [1]}]},
+      {'name': 'a'}]),
+]
+
+
+class TestModes(unittest.TestCase):
+    def test_modes(self):
+        for make, base, values in SCHEMAS:
+            for value in values:
+                trafaret = make()
+                expected = outcome(catch_error(trafaret, value))
+                for mode, check in MODES:
+                    res = outcome(check(make(), base, value))
+                    self.assertEqual(res, expected, '%s %r %r' % (mode, trafaret, value))
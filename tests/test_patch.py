@@ -0,0 +1,134 @@
+import unittest
+import trafaret as t
+from trafaret import catch_error, DataError
+from trafaret.extras import KeysSubset
+from trafaret.patch import apply_patch, parse_path, _patched
+
+
+def outcome(checker, value):
+    res = catch_error(checker, value)
+    if isinstance(res, DataError):
+        return 'error', res.as_dict()
+    return 'ok', res
+
+
+class TestApplyPatch(unittest.TestCase):
+    def assertSame(self, trafaret, value, *operations):
+        """
+        Checks that patch gives the same outcome as full check of patched value
+        """
+        result = trafaret.check(value)
+        patched = value
+        for operation in operations:
+            op = operation['op']
+            patched = _patched(patched, parse_path(operation['path']), op, operation.get('value'))
+        expected = outcome(trafaret, patched)
+        try:
+            new_value, new_result = apply_patch(trafaret, value, result, operations)
+        except DataError as err:
+            self.assertEqual(('error', err.as_dict()), expected)
+        else:
+            self.assertEqual(new_value, patched)
+            self.assertEqual(('ok', new_result), expected)
+
+    def test_parse_path(self):
+        self.assertEqual(parse_path(''), [])
+        self.assertEqual(parse_path('/a~1b/0/~0c'), ['a/b', '0', '~c'])
+        self.assertEqual(parse_path(['a', 0]), ['a', 0])
+        with self.assertRaises(ValueError):
+            parse_path('a')
+
+    def test_dict(self):
+        trafaret = t.Dict({
+            t.Key('a') >> 'b': t.Int,
+            t.Key('c', default=5): t.Int,
+            t.Key('d', optional=True): t.String,
+        }).allow_extra('e').ignore_extra('f')
+        value = {'a': 1, 'd': 'x', 'e': 1}
+        self.assertSame(trafaret, value, {'op': 'replace', 'path': '/a', 'value': '2'})
+        self.assertSame(trafaret, value, {'op': 'replace', 'path': '/a', 'value': 'x'})
+        self.assertSame(trafaret, value, {'op': 'remove', 'path': '/a'})
+        self.assertSame(trafaret, value, {'op': 'remove', 'path': '/d'})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/c', 'value': 7})
+        self.assertSame(trafaret, dict(value, c=7), {'op': 'remove', 'path': '/c'})
+        self.assertSame(trafaret, value, {'op': 'remove', 'path': '/e'})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/f', 'value': 1})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/g', 'value': 1})
+        self.assertSame(trafaret.allow_extra('*'), value, {'op': 'add', 'path': '/g', 'value': 1})
+
+    def test_nested(self):
+        node = t.Forward()
+        node << t.Dict(name=t.String, children=t.List(node, max_length=2))
+        value = {'name': 'a', 'children': [{'name': 'b', 'children': []}]}
+        self.assertSame(node, value, {'op': 'add', 'path': '/children/0/children/0',
+                                      'value': {'name': 'c', 'children': []}})
+        self.assertSame(node, value, {'op': 'replace', 'path': '/children/0/name', 'value': 1})
+        self.assertSame(node, value, {'op': 'remove', 'path': '/children/0'})
+        self.assertSame(node, value, {'op': 'add', 'path': '/children/-', 'value': 1})
+        self.assertSame(
+            node, value,
+            {'op': 'add', 'path': '/children/-', 'value': {'name': 'c', 'children': []}},
+            {'op': 'add', 'path': '/children/-', 'value': {'name': 'd', 'children': []}},
+        )
+
+    def test_unchanged_parts(self):
+        trafaret = t.Dict(a=t.List(t.Int), b=t.Mapping(t.String, t.Int))
+        value = {'a': [1, 2], 'b': {'x': 1}}
+        result = trafaret.check(value)
+        new_value, new_result = apply_patch(trafaret, value, result, [{'op': 'add', 'path': '/a/1', 'value': 3}])
+        self.assertEqual(value, {'a': [1, 2], 'b': {'x': 1}})
+        self.assertEqual(new_value, {'a': [1, 3, 2], 'b': {'x': 1}})
+        self.assertIs(new_result['b'], result['b'])
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/b/y', 'value': 'z'})
+        self.assertSame(trafaret, value, {'op': 'remove', 'path': '/b/x'})
+
+    def test_list_length(self):
+        trafaret = t.List(t.Int, min_length=1, max_length=2)
+        self.assertSame(trafaret, [1], {'op': 'remove', 'path': '/0'})
+        self.assertSame(trafaret, [1, 2], {'op': 'add', 'path': '/0', 'value': 0})
+        self.assertSame(trafaret, [1, 2], {'op': 'replace', 'path': '/1', 'value': 'x'})
+
+    def test_keys_subset(self):
+        cmp_pwds = lambda x: {'pwd': x['pwd'] if x.get('pwd') == x.get('pwd1') else DataError('Not equal')}
+        trafaret = t.Dict({KeysSubset('pwd', 'pwd1'): cmp_pwds, 'key1': t.String})
+        value = {'pwd': 'a', 'pwd1': 'a', 'key1': 'b'}
+        self.assertSame(trafaret, value, {'op': 'replace', 'path': '/pwd1', 'value': 'c'})
+        self.assertSame(trafaret, value,
+                        {'op': 'replace', 'path': '/pwd1', 'value': 'c'},
+                        {'op': 'replace', 'path': '/pwd', 'value': 'c'})
+        self.assertSame(trafaret, value, {'op': 'replace', 'path': '/key1', 'value': 1})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/key2', 'value': 1})
+
+    def test_name_collisions(self):
+        trafaret = t.Dict({t.Key('a') >> 'b': t.Int}).allow_extra('*')
+        self.assertSame(trafaret, {'a': 1}, {'op': 'add', 'path': '/b', 'value': 5})
+        self.assertSame(trafaret, {'a': 1, 'b': 3}, {'op': 'remove', 'path': '/b'})
+        optional = t.Dict({t.Key('a', optional=True) >> 'b': t.Int}).allow_extra('*')
+        self.assertSame(optional, {'a': 1, 'b': 3}, {'op': 'remove', 'path': '/a'})
+        self.assertSame(optional, {'b': 3}, {'op': 'add', 'path': '/a', 'value': 1})
+        twice = t.Dict({t.Key('a', optional=True) >> 'c': t.Int, t.Key('b', optional=True) >> 'c': t.Int})
+        self.assertSame(twice, {'a': 1, 'b': 2}, {'op': 'replace', 'path': '/a', 'value': 3})
+        lower = t.Mapping(t.String >> (lambda name: name.lower()), t.Int)
+        self.assertSame(lower, {'A': 1, 'a': 2}, {'op': 'remove', 'path': '/a'})
+        self.assertSame(lower, {'A': 1}, {'op': 'add', 'path': '/a', 'value': 2})
+
+    def test_fallback(self):
+        trafaret = t.Dict(a=t.Tuple(t.Int, t.List(t.Int)), b=t.List(t.Int) >> sum)
+        value = {'a': [1, [2]], 'b': [1, 2]}
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/a/1/0', 'value': 3})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/a/1/0', 'value': 'x'})
+        self.assertSame(trafaret, value, {'op': 'add', 'path': '/b/0', 'value': 3})
+        self.assertSame(trafaret, value, {'op': 'replace', 'path': '', 'value': {'a': [1, []], 'b': []}})
+
+    def test_bad_operations(self):
+        trafaret = t.Dict(a=t.List(t.Int))
+        value = {'a': [1]}
+        for operation in (
+            {'op': 'move', 'path': '/a', 'from': '/b'},
+            {'op': 'replace', 'path': '/b', 'value': 1},
+            {'op': 'remove', 'path': '/a/1'},
+            {'op': 'add', 'path': '/a/x', 'value': 1},
+            {'op': 'remove', 'path': ''},
+        ):
+            with self.assertRaises(ValueError):
+                apply_patch(trafaret, value, trafaret.check(value), [operation])
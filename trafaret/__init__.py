@@ -5,9 +5,13 @@ import functools
 import inspect
 import re
 import itertools
+import json
 import numbers
+import threading
+import time
 import warnings
-from collections import Mapping as AbcMapping
+import weakref
+from collections import Mapping as AbcMapping, OrderedDict, namedtuple
 import pkg_resources
 import types
 
@@ -41,11 +45,24 @@ Look at doctests for usage examples
 __all__ = ("DataError", "Trafaret", "Any", "Int", "String",
            "List", "Dict", "Or", "Null", "Float", "Enum", "Callable",
            "Call", "Forward", "Bool", "Type", "Subclass", "Mapping", "guard", "Key",
-           "Tuple", "Atom", "Email", "URL")
+           "Tuple", "Atom", "Email", "URL", "Ok", "Err", "LazyDict", "Cached")
 
 ENTRY_POINT = 'trafaret'
 _empty = object()
 MAX_EMAIL_LEN = 254
+# number of domains kept by cache of IDNA conversions
+IDNA_CACHE_SIZE = 1024
+# Dict walks over value instead of keys if value is so many times smaller
+# than number of optional keys
+SPARSE_RATIO = 4
+# key of marker error added when ``max_errors`` is reached
+MORE_ERRORS = '...'
+MAX_SHARED_ERRORS = 1024
+_shared_errors = {}
+ShapeCacheInfo = namedtuple('ShapeCacheInfo', 'hits misses maxsize currsize')
+CacheInfo = namedtuple('CacheInfo', 'hits misses evictions maxsize currsize')
+# total number of results kept by all ``Cached`` trafarets
+MAX_CACHED_RESULTS = 65536
 
 
 def py3metafix(cls):
@@ -57,18 +74,94 @@ def py3metafix(cls):
         return newcls
 
 
+# default messages for error codes of built-in trafarets
+MESSAGES = {
+    'required': 'is required',
+    'not_allowed_key': '%(key)s is not allowed key',
+    'more': 'and %(count)s more %(what)s are not checked',
+    'not_none': 'value should be None',
+    'not_bool': 'value should be True or False',
+    'not_str_bool': "value can't be converted to Bool",
+    'not_number': 'value is not %(type)s',
+    'not_convertable': "value can't be converted to %(type)s",
+    'gte': 'value is less than %(gte)s',
+    'lte': 'value is greater than %(lte)s',
+    'lt': 'value should be less than %(lt)s',
+    'gt': 'value should be greater than %(gt)s',
+    'not_exact': "value is not exactly '%(value)s'",
+    'not_string': 'value is not a string',
+    'blank': 'blank value is not allowed',
+    'too_short': 'String is shorter than %(min_length)s characters',
+    'too_long': 'String is longer than %(max_length)s characters',
+    'pattern': 'value does not match pattern: %(pattern)r',
+    'not_email': 'value is not a valid email address',
+    'not_url': 'value is not URL',
+    'not_list': 'value is not a list',
+    'not_iterable': 'value is not iterable',
+    'list_too_short': 'list length is less than %(min_length)s',
+    'list_too_long': 'list length is greater than %(max_length)s',
+    'not_tuple': 'value must be convertable to tuple',
+    'tuple_length': 'value must contain %(length)s items',
+    'not_dict': 'value is not a dict',
+    'not_variant': "value doesn't match any variant",
+    'not_callable': 'value is not callable',
+    'not_instance': 'value is not %(type)s',
+    'not_subclass': 'value is not subclass of %(type)s',
+    'not_set': 'trafaret not set yet',
+    'cycle': 'value contains reference to itself',
+}
+
+
 class DataError(ValueError):
     """
     Error with data preserve
     error can be a message or None if error raised in childs
     data can be anything
+
+    Built-in trafarets pass error ``code`` and its ``params`` instead of message,
+    message is rendered from ``messages`` catalog on access to ``error``.
+    Assign other catalog to ``DataError.messages`` or pass it to ``as_dict``
+    to change messages, missing codes are taken from ``MESSAGES``.
+
+    >>> error = DataError(code='gte', params={'gte': 5})
+    >>> error.code, error.error
+    ('gte', 'value is less than 5')
+    >>> error.as_dict(messages={'gte': 'at least %(gte)s'})
+    'at least 5'
     """
-    __slots__ = ['error', 'name', 'value']
+    __slots__ = ['_error', 'name', 'value', 'code', 'params']
 
-    def __init__(self, error=None, name=None, value=_empty):
-        self.error = error
+    messages = MESSAGES
+
+    def __init__(self, error=None, name=None, value=_empty, code=None, params=None):
+        self._error = error
         self.name = name
         self.value = value
+        self.code = code
+        self.params = params
+
+    @property
+    def error(self):
+        if self._error is None and self.code is not None:
+            return self.render()
+        return self._error
+
+    @error.setter
+    def error(self, error):
+        self._error = error
+
+    def render(self, messages=None):
+        """
+        Returns message for error code
+        """
+        if self._error is not None or self.code is None:
+            return self._error
+        template = (messages or self.messages).get(self.code)
+        if template is None:
+            template = MESSAGES.get(self.code, self.code)
+        if self.params is None:
+            return template
+        return template % self.params
 
     def __str__(self):
         return str(self.error)
@@ -76,17 +169,408 @@ class DataError(ValueError):
     def __repr__(self):
         return 'DataError(%s)' % str(self)
 
-    def as_dict(self, value=False):
+    def as_dict(self, value=False, messages=None):
         def as_dict(dataerror):
-            if not isinstance(dataerror.error, dict):
+            error = dataerror.render(messages)
+            if not isinstance(error, dict):
                 if value and dataerror.value != _empty:
-                    return '%s, got %r' % (str(dataerror.error), dataerror.value)
+                    return '%s, got %r' % (str(error), dataerror.value)
                 else:
-                    return str(dataerror.error)
-            return dict((k, v.as_dict() if isinstance(v, DataError) else v)
-                        for k, v in dataerror.error.items())
+                    return str(error)
+            return dict((k, v.as_dict(messages=messages) if isinstance(v, DataError) else v)
+                        for k, v in error.items())
         return as_dict(self)
 
+    def flatten(self, messages=None):
+        """
+        Yields ``(path, code, message)`` for every error without nested errors,
+        ``path`` is tuple of names and indexes from root error. Errors are walked
+        without recursion, so deep errors do not hit recursion limit.
+
+        >>> list(catch_error(Dict(a=List(Int)), {'a': [1, 'x']}).flatten())
+        [(('a', 1), 'not_convertable', "value can't be converted to int")]
+        """
+        stack = [((), self)]
+        while stack:
+            path, error = stack.pop()
+            if not isinstance(error, DataError):
+                yield path, None, error
+                continue
+            rendered = error.render(messages)
+            if isinstance(rendered, dict):
+                items = list(rendered.items())
+                for name, nested in reversed(items):
+                    stack.append((path + (name,), nested))
+            else:
+                yield path, error.code, rendered
+
+    def write_json(self, stream, max_size=None, messages=None):
+        """
+        Writes flattened errors to ``stream`` as JSON list of
+        ``{"path": [...], "code": ..., "message": ...}`` objects. With
+        ``max_size`` stops before output gets longer than ``max_size``
+        characters, output is still valid JSON. Returns ``False`` if some
+        errors were not written.
+
+        >>> catch_error(List(Int), [1, 'x']).write_json(sys.stdout)
+        [{"path": [1], "code": "not_convertable", "message": "value can't be converted to int"}]True
+        """
+        # paths are kept encoded, messages and codes repeat, so their
+        # encoded values are cached
+        encoded = {None: 'null'}
+        stream.write('[')
+        size = 2
+        separator = ''
+        stack = [('', self)]
+        while stack:
+            path, error = stack.pop()
+            if isinstance(error, DataError):
+                code = error.code
+                message = error.render(messages)
+                if isinstance(message, dict):
+                    prefix = path + ', ' if path else ''
+                    for name, nested in reversed(list(message.items())):
+                        if type(name) is int:
+                            name = str(name)
+                        else:
+                            if not isinstance(name, str_types):
+                                name = str(name)
+                            try:
+                                name = encoded[name]
+                            except KeyError:
+                                name = encoded[name] = _json_string(name)
+                        stack.append((prefix + name, nested))
+                    continue
+            else:
+                code, message = None, error
+            if not isinstance(message, str_types):
+                message = str(message)
+            try:
+                json_message = encoded[message]
+            except KeyError:
+                json_message = encoded[message] = _json_string(message)
+            try:
+                json_code = encoded[code]
+            except KeyError:
+                json_code = encoded[code] = _json_string(code)
+            entry = '%s{"path": [%s], "code": %s, "message": %s}' % (
+                separator, path, json_code, json_message)
+            if max_size is not None and size + len(entry) > max_size:
+                stream.write(']')
+                return False
+            stream.write(entry)
+            size += len(entry)
+            separator = ', '
+        stream.write(']')
+        return True
+
+
+def _json_string(value):
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    return json.encoder.encode_basestring_ascii(value)
+
+
+def _defined_in(cls, names):
+    """
+    Returns name from ``names`` defined closest to ``cls`` in its MRO
+    and class that defines it
+    """
+    for klass in cls.__mro__:
+        for name in names:
+            if name in klass.__dict__:
+                return name, klass
+    return None, None
+
+
+def _accepted_types(trafaret):
+    """
+    Returns ``accepted_types`` of trafaret if they describe its check method,
+    i.e. subclass did not redefine check method after ``accepted_types``
+    """
+    if not isinstance(trafaret, Trafaret):
+        return None
+    cls = type(trafaret)
+    if cls._check_method is None:
+        return None
+    _, guard_owner = _defined_in(cls, ('accepted_types',))
+    _, check_owner = _defined_in(cls, (cls._check_method,))
+    if not issubclass(guard_owner, check_owner):
+        return None
+    return trafaret.accepted_types()
+
+
+def _lightweight(error):
+    """
+    Returns new error without references to checked values, so it can be
+    raised. Its nested errors are taken from ``_shared_error``.
+    """
+    message = error._error
+    if isinstance(message, dict):
+        message = dict(
+            (key, _shared_error(nested) if isinstance(nested, DataError) else nested)
+            for key, nested in message.items()
+        )
+    return DataError(error=message, name=error.name, code=error.code, params=error.params)
+
+
+def _shared_error(error):
+    """
+    Returns copy of nested error without references to checked values. Errors
+    with same message and without nested errors are shared by all checks, so
+    they are never returned as top level error, raised or changed.
+    """
+    if isinstance(error._error, dict) or error.name is not None:
+        return _lightweight(error)
+    if error.code is not None:
+        # equal params like 1, True and 1.0 are rendered differently
+        key = error.code, tuple(sorted(
+            (name, type(param), param) for name, param in error.params.items()
+        )) if error.params else None
+    else:
+        key = error._error
+    try:
+        shared = _shared_errors.get(key)
+    except TypeError:
+        return _lightweight(error)
+    if shared is None:
+        if len(_shared_errors) >= MAX_SHARED_ERRORS:
+            return _lightweight(error)
+        shared = _shared_errors.setdefault(key, _lightweight(error))
+    return shared
+
+
+def _or_error(errors):
+    """
+    Returns error of ``Or`` with errors of branches in declaration order,
+    whatever order branches were tried in
+    """
+    return DataError(dict(sorted(errors.items())))
+
+
+def _more_errors(errors, rest, what):
+    """
+    Adds marker of items skipped after errors budget is over
+    """
+    if rest:
+        errors[MORE_ERRORS] = DataError(code='more', params={'count': rest, 'what': what})
+
+
+def _collect_error(trafaret, errors, name, error, rest, what):
+    """
+    Puts error of item ``name`` to ``errors`` of ``List``, ``Tuple`` or ``Mapping``
+    and returns ``True`` if check must stop by ``fail_fast`` or ``max_errors``,
+    ``rest`` is number of items left. Used by ``trafaret.iterative`` and
+    ``trafaret.patch`` too, so errors are the same in all modes.
+    """
+    errors[name] = _shared_error(error) if trafaret.lightweight_errors else error
+    if trafaret.fail_fast:
+        return True
+    if trafaret.max_errors is not None and len(errors) >= trafaret.max_errors:
+        _more_errors(errors, rest, what)
+        return True
+    return False
+
+
+def _casefold(value):
+    casefold = getattr(value, 'casefold', None)
+    if casefold is None:
+        return value.lower()
+    return casefold()
+
+
+if hasattr(str, 'isascii'):
+    def _is_ascii(value):
+        return value.isascii()
+else:
+    def _is_ascii(value):
+        try:
+            if isinstance(value, bytes):
+                value.decode('ascii')
+            else:
+                value.encode('ascii')
+        except UnicodeError:
+            return False
+        return True
+
+
+def _idna(domain):
+    """
+    Returns ASCII form of international domain or ``None`` if domain is invalid
+    """
+    try:
+        return domain.encode('idna').decode('ascii')
+    except UnicodeError:
+        return None
+
+
+if hasattr(functools, 'lru_cache'):
+    _idna = functools.lru_cache(maxsize=IDNA_CACHE_SIZE)(_idna)
+else:
+    # python 2 has no lru_cache, cache is dropped whole when it is full
+    _idna_cache = {}
+
+    def _idna(domain, _convert=_idna):
+        try:
+            return _idna_cache[domain]
+        except KeyError:
+            pass
+        converted = _convert(domain)
+        if len(_idna_cache) >= IDNA_CACHE_SIZE:
+            _idna_cache.clear()
+        _idna_cache[domain] = converted
+        return converted
+
+
+def _check_value(self, value):
+    self.check_value(value)
+    if self.converters is None:
+        return value
+    return self._convert(value)
+
+
+def _check_value_and_convert(self, value):
+    self.check_value(value)
+    return self._convert(value)
+
+
+def _check_and_return(self, value):
+    if self.converters is None:
+        return self.check_and_return(value)
+    return self._convert(self.check_and_return(value))
+
+
+def _check_and_return_and_convert(self, value):
+    return self._convert(self.check_and_return(value))
+
+
+def _validate_and_convert(self, value):
+    value = self._check_or_error(value)
+    if isinstance(value, DataError):
+        return value
+    try:
+        return self._convert(value)
+    except DataError as err:
+        return err
+
+
+def _validate_by_check(self, value):
+    try:
+        return self.check(value)
+    except DataError as err:
+        return err
+
+
+def _valid_by_validate(self, value):
+    return not isinstance(self._validate(value), DataError)
+
+
+def _valid_by_is_valid(self, value):
+    return self.is_valid(value)
+
+
+def _check_or_raise(self, value):
+    value = self._check_or_error(value)
+    if isinstance(value, DataError):
+        raise value
+    if self.converters is None:
+        return value
+    return self._convert(value)
+
+
+def _check_validated(self, value):
+    value = self._validate(value)
+    if isinstance(value, DataError):
+        raise value
+    return value
+
+
+def _check_and_return_or_raise(self, value):
+    value = self._check_or_error(value)
+    if isinstance(value, DataError):
+        raise value
+    return value
+
+
+def _check_value_or_raise(self, value):
+    """
+    ``check_value`` of built-in trafarets that had it before ``_check_or_error``,
+    kept for direct calls and subclasses that call it through ``super``
+    """
+    error = self._check_or_error(value)
+    if isinstance(error, DataError):
+        raise error
+
+
+_DISPATCHERS = {
+    ('check_value', False): _check_value,
+    ('check_value', True): _check_value_and_convert,
+    ('check_and_return', False): _check_and_return,
+    ('check_and_return', True): _check_and_return_and_convert,
+    ('_check_or_error', False): _check_or_raise,
+    ('_check_or_error', True): _check_validated,
+}
+
+
+class _Dispatch(object):
+    """
+    Class attribute that gives ``plain`` implementation for trafarets without
+    appended converters and ``converted`` one for trafarets with them. Containers
+    take ``_validate`` of items once per check, so the choice is made once too.
+    """
+    __slots__ = ['plain', 'converted']
+
+    def __init__(self, plain, converted):
+        self.plain = plain
+        self.converted = converted
+
+    def __get__(self, trafaret, cls):
+        if trafaret is None:
+            return self
+        if trafaret.converters is None:
+            return self.plain.__get__(trafaret, cls)
+        return self.converted.__get__(trafaret, cls)
+
+
+class Ok(object):
+    """
+    Successful result of ``Trafaret.validate``, keeps checked value
+    """
+    __slots__ = ['value']
+
+    def __init__(self, value):
+        self.value = value
+
+    def __bool__(self):
+        return True
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        return isinstance(other, Ok) and self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Ok(%r)' % (self.value,)
+
+
+class Err(object):
+    """
+    Failed result of ``Trafaret.validate``, keeps ``DataError``
+    """
+    __slots__ = ['error']
+
+    def __init__(self, error):
+        self.error = error
+
+    def __bool__(self):
+        return False
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return 'Err(%s)' % self.error
+
 
 class TrafaretMeta(type):
     """
@@ -99,7 +583,76 @@ class TrafaretMeta(type):
     <Or(<Int>, <String>, <Null>)>
     >>> (Int >> (lambda v: v if v ** 2 > 15 else 0)).check(5)
     5
-    """
+
+    Also metaclass picks ``check`` and ``_validate`` implementations for a class
+    once, so calls do not look for ``check_value`` or ``check_and_return`` methods
+    and trafarets without converters do not call them at all. Hook defined
+    closest to class in its MRO is used, so subclass ``check_and_return``
+    wins over parent ``check_value``. Converters appended to instance are
+    found by ``converters`` attribute, nothing is bound to instance.
+
+    Built-in trafarets implement ``_check_or_error`` method, that returns
+    ``DataError`` instead of raising it. For them ``check`` raises error returned
+    by ``_validate``, and ``check_and_return`` is provided for subclasses.
+
+    Built-in trafarets also implement ``_is_valid`` method, used by ``is_valid``,
+    that does not build result and errors. It is used only if subclass did not
+    redefine check method or converter after it.
+    """
+
+    def __init__(cls, name, bases, attrs):
+        super(TrafaretMeta, cls).__init__(name, bases, attrs)
+        cls._pick_check(attrs)
+        valid = cls._pick_valid()
+        if valid is not _valid_by_validate:
+            # appended converters can fail, so they are called by is_valid
+            valid = _Dispatch(valid, _valid_by_validate)
+        cls._valid = valid
+
+    def _pick_check(cls, attrs):
+        cls._check_method = None
+        cls._validate = _validate_by_check
+        _, owner = _defined_in(cls, ('check',))
+        if owner is not None and owner.__dict__['check'] not in _DISPATCHERS.values() \
+                and any(hasattr(base, 'check') for base in owner.__bases__):
+            # check is redefined by hand
+            return
+        method, owner = _defined_in(cls, ('_check_or_error', 'check_value', 'check_and_return'))
+        if method is None:
+            return
+        if owner.__dict__[method] in (_check_and_return_or_raise, _check_value_or_raise):
+            # compatibility method added to parent class below
+            method, owner = _defined_in(cls, ('_check_or_error',))
+        cls._check_method = method
+        cls.check = _DISPATCHERS[method, cls._has_converter()]
+        if method == '_check_or_error':
+            if cls._has_converter():
+                cls._validate = _validate_and_convert
+            else:
+                cls._validate = _Dispatch(owner.__dict__['_check_or_error'], _validate_and_convert)
+            if 'check_and_return' not in attrs:
+                cls.check_and_return = _check_and_return_or_raise
+
+    def _pick_valid(cls):
+        _, owner = _defined_in(cls, ('is_valid',))
+        if any(hasattr(base, 'is_valid') for base in owner.__bases__):
+            # is_valid is redefined by hand
+            return _valid_by_is_valid
+        if cls._check_method != '_check_or_error':
+            return _valid_by_validate
+        _, native_owner = _defined_in(cls, ('_is_valid',))
+        if native_owner is None:
+            return _valid_by_validate
+        _, check_owner = _defined_in(cls, ('_check_or_error',))
+        _, converter_owner = _defined_in(cls, ('converter',))
+        # converters of built-in trafarets can not fail
+        if not issubclass(native_owner, check_owner) or not issubclass(native_owner, converter_owner):
+            return _valid_by_validate
+        return native_owner.__dict__['_is_valid']
+
+    def _has_converter(cls):
+        _, owner = _defined_in(cls, ('converter',))
+        return any(hasattr(base, 'converter') for base in owner.__bases__)
 
     def __or__(cls, other):
         return cls() | other
@@ -125,11 +678,15 @@ class Trafaret(object):
 
     __metaclass__ = TrafaretMeta
 
+    converters = None
+
     def check(self, value):
         """
         Common logic. In subclasses you need to implement check_value or
         check_and_return.
         """
+        # metaclass replaces this method when class defines a hook, it is
+        # called only by subclasses that redefine ``check`` and call parent one
         if hasattr(self, 'check_value'):
             self.check_value(value)
             return self._convert(value)
@@ -139,6 +696,47 @@ class Trafaret(object):
         raise NotImplementedError("You must implement check_value or"
                                   " check_and_return methods '%s'" % cls)
 
+    def validate(self, value):
+        """
+        Checks value like ``check``, but returns ``Ok`` with result or ``Err``
+        with ``DataError`` instead of raising it.
+
+        >>> Int().validate(1)
+        Ok(1)
+        >>> Int().validate('a')
+        Err(value can't be converted to int)
+        >>> bool(List(Int).validate([1, 'a']))
+        False
+        """
+        value = self._validate(value)
+        if isinstance(value, DataError):
+            return Err(value)
+        return Ok(value)
+
+    def is_valid(self, value):
+        """
+        Returns ``True`` if ``check`` accepts value. Built-in trafarets do not
+        build result and errors, do not call their own converters, that can not
+        fail, and stop on first invalid item.
+
+        >>> List(Int).is_valid([1, 2])
+        True
+        >>> List(Int).is_valid([1, 'a'])
+        False
+        """
+        return self._valid(value)
+
+    def accepted_types(self):
+        """
+        Returns tuple of types that trafaret can accept or ``None`` if it
+        can accept value of any type. ``Or`` skips branches which can not accept
+        type of value.
+
+        >>> List(Int).accepted_types() == (list,)
+        True
+        """
+        return None
+
     def converter(self, value):
         """
         You can change converter with `>>` operator or append method
@@ -146,10 +744,12 @@ class Trafaret(object):
         return value
 
     def _convert(self, value):
-        val = value
-        for converter in getattr(self, 'converters', [self.converter]):
-            val = converter(val)
-        return val
+        converters = self.converters
+        if converters is None:
+            return self.converter(value)
+        for converter in converters:
+            value = converter(value)
+        return value
 
     @staticmethod
     def _failure(error=None, value=_empty):
@@ -178,7 +778,7 @@ class Trafaret(object):
         """
         Appends new converter to list.
         """
-        if hasattr(self, 'converters'):
+        if self.converters is not None:
             self.converters.append(converter)
         else:
             self.converters = [converter]
@@ -194,9 +794,24 @@ class Trafaret(object):
     def __call__(self, val):
         return self.check(val)
 
+    def compile(self):
+        """
+        Returns function generated from this trafaret tree, that checks values
+        like ``check`` does but without interpretation overhead.
+        See ``trafaret.codegen`` for details.
+        """
+        from .codegen import compile_trafaret
+        return compile_trafaret(self)
+
 
 class TypeMeta(TrafaretMeta):
 
+    def __init__(cls, name, bases, attrs):
+        super(TypeMeta, cls).__init__(name, bases, attrs)
+        # subclass that sets only failure_message gets it rendered as before
+        attr, _ = _defined_in(cls, ('failure_code', 'failure_message'))
+        cls._failure_code = cls.failure_code if attr == 'failure_code' else None
+
     def __getitem__(self, type_):
         return self(type_)
 
@@ -210,9 +825,17 @@ class TypingTrafaret(Trafaret):
     def __init__(self, type_):
         self.type_ = type_
 
-    def check_value(self, value):
+    def _check_or_error(self, value):
         if not self.typing_checker(value, self.type_):
-            self._failure(self.failure_message % self.type_.__name__, value=value)
+            if self._failure_code is None:
+                return DataError(self.failure_message % self.type_.__name__, value=value)
+            return DataError(code=self._failure_code, params={'type': self.type_.__name__}, value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return bool(self.typing_checker(value, self.type_))
 
     def __repr__(self):
         return "<%s(%s)>" % (self.__class__.__name__, self.type_.__name__)
@@ -233,6 +856,7 @@ class Subclass(TypingTrafaret):
 
     typing_checker = issubclass
     failure_message = "value is not subclass of %s"
+    failure_code = 'not_subclass'
 
 
 class Type(TypingTrafaret):
@@ -250,6 +874,12 @@ class Type(TypingTrafaret):
 
     typing_checker = isinstance
     failure_message = "value is not %s"
+    failure_code = 'not_instance'
+
+    def accepted_types(self):
+        if isinstance(self.type_, type):
+            return (self.type_,)
+        return None
 
 
 class Any(Trafaret):
@@ -259,8 +889,13 @@ class Any(Trafaret):
     >>> (Any() >> ignore).check(object())
     """
 
-    def check_value(self, value):
-        pass
+    def _check_or_error(self, value):
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return True
 
     def __repr__(self):
         return "<Any>"
@@ -289,25 +924,253 @@ class Or(Trafaret):
     'test'
     >>> extract_error(nullString, 1)
     {0: 'value is not a string', 1: 'value should be None'}
+
+    With ``discriminator`` key name ``Or`` picks ``Dict`` branches by value of this
+    key, if branch declares it with ``Atom`` or ``Enum`` trafaret. Other branches
+    are tried for every value, so result is the same as without ``discriminator``,
+    but errors contain only branches that were tried:
+
+    >>> event = Or(
+    ...     Dict(type=Atom('click'), x=Int, y=Int),
+    ...     Dict(type=Enum('key', 'keyup'), code=Int),
+    ...     discriminator='type',
+    ... )
+    >>> event.check({'type': 'keyup', 'code': 13}) == {'type': 'keyup', 'code': 13}
+    True
+    >>> extract_error(event, {'type': 'click', 'x': 1})
+    {0: {'y': 'is required'}}
+    >>> extract_error(event, {'type': 'scroll'})
+    {'type': "value doesn't match any variant"}
+
+    With ``adaptive=True`` ``Or`` counts successful branches and every
+    ``reorder_period`` checks moves most frequent winners first. Value accepted
+    by several branches gets result of any of them, so use it only with branches
+    that give the same result. Errors are the same as without ``adaptive`` and
+    are reported in declaration order:
+
+    >>> number = Or(Int, Float, adaptive=True)
+    >>> number.check(1.5)
+    1.5
+    >>> number.branch_hits()
+    [0, 1]
     """
 
     __metaclass__ = OrMeta
-    __slots__ = ['trafarets']
-
-    def __init__(self, *trafarets):
+    __slots__ = [
+        'trafarets', 'discriminator', 'adaptive', '_tags', '_untagged', '_guards', '_by_type',
+        '_order', '_hits', '_calls', '_atoms',
+    ]
+
+    reorder_period = 1000
+
+    def __init__(self, *trafarets, **kwargs):
+        self.discriminator = kwargs.pop('discriminator', None)
+        self.adaptive = kwargs.pop('adaptive', False)
+        if kwargs:
+            raise TypeError('Or got unexpected keyword arguments %s' % ', '.join(kwargs))
         self.trafarets = list(map(self._trafaret, trafarets))
+        self._prepare()
+
+    def _branch_tags(self, trafaret):
+        """
+        Returns tag values of ``Dict`` branch or ``None`` if branch can not be
+        selected by discriminator key
+        """
+        if not isinstance(trafaret, Dict):
+            return None
+        for key in trafaret.keys:
+            if type(key) is not Key or key.name != self.discriminator:
+                continue
+            if key.optional or key.default is not _empty:
+                return None
+            if type(key.trafaret) is Atom:
+                tags = (key.trafaret.value,)
+            elif type(key.trafaret) is Enum:
+                tags = key.trafaret.variants
+            else:
+                return None
+            try:
+                set(tags)
+            except TypeError:
+                return None
+            return tags
+        return None
+
+    def _prepare(self):
+        self._guards = [_accepted_types(trafaret) for trafaret in self.trafarets]
+        self._by_type = {}
+        self._order = tuple(range(len(self.trafarets)))
+        self._hits = [0] * len(self.trafarets)
+        self._calls = 0
+        self._atoms = self._atoms_index()
+        self._tags = None
+        self._untagged = None
+        if self.discriminator is None:
+            return
+        tags = {}
+        untagged = []
+        for index, trafaret in enumerate(self.trafarets):
+            branch_tags = self._branch_tags(trafaret)
+            if branch_tags is None:
+                untagged.append(index)
+                continue
+            for tag in branch_tags:
+                tags.setdefault(tag, []).append(index)
+        # tagged branches are tried together with untagged ones in declaration order
+        self._tags = dict(
+            (tag, sorted(set(indexes).union(untagged)))
+            for tag, indexes in tags.items()
+        )
+        self._untagged = untagged
+
+    def _candidates(self, value):
+        """
+        Returns indexes of branches which can accept ``value`` or ``DataError``
+        """
+        if not isinstance(value, AbcMapping):
+            if self._untagged:
+                return self._untagged
+            return DataError(code='not_dict', value=value)
+        if self.discriminator not in value:
+            if self._untagged:
+                return self._untagged
+            return DataError({self.discriminator: DataError(code='required')})
+        tag = value[self.discriminator]
+        try:
+            indexes = self._tags.get(tag)
+        except TypeError:
+            indexes = None
+        if indexes is not None:
+            return indexes
+        if self._untagged:
+            return self._untagged
+        return DataError({self.discriminator: DataError(code='not_variant', value=tag)})
+
+    def _type_candidates(self, type_):
+        """
+        Returns indexes of branches which ``accepted_types`` admit ``type_``
+        """
+        guards = self._guards
+        return [
+            index for index in self._order
+            if guards[index] is None or issubclass(type_, guards[index])
+        ]
+
+    def _atoms_index(self):
+        """
+        Returns dict of value to index of first ``Atom`` with this value, if all
+        branches are ``Atom``, or ``None``
+        """
+        if not self.trafarets or any(type(trafaret) is not Atom for trafaret in self.trafarets):
+            return None
+        index = {}
+        try:
+            for number, trafaret in enumerate(self.trafarets):
+                index.setdefault(trafaret.value, number)
+        except TypeError:
+            return None
+        return index
 
-    def check_and_return(self, value):
-        errors = []
-        for trafaret in self.trafarets:
+    def branch_hits(self):
+        """
+        Returns list with count of successful checks for every branch of
+        ``adaptive`` trafaret or ``None`` for regular one
+        """
+        if not self.adaptive:
+            return None
+        return list(self._hits)
+
+    def _hit(self, index):
+        # counters are updated without lock, increments lost by concurrent
+        # checks only make order approximate. New order and type index are
+        # assigned as new objects, so other threads see old or new ones whole
+        self._hits[index] += 1
+        self._calls += 1
+        if self._calls % self.reorder_period == 0:
+            hits = self._hits
+            self._order = tuple(sorted(self._order, key=lambda i: -hits[i]))
+            self._by_type = {}
+
+    def _check_or_error(self, value):
+        if self._tags is not None:
+            return self._check_tagged(value)
+        trafarets = self.trafarets
+        if self._atoms is not None:
+            try:
+                index = self._atoms.get(value)
+            except TypeError:
+                index = None
+            if index is not None:
+                result = trafarets[index]._validate(value)
+                if not isinstance(result, DataError):
+                    if self.adaptive:
+                        self._hit(index)
+                    return result
+        type_ = type(value)
+        try:
+            indexes = self._by_type[type_]
+        except KeyError:
+            indexes = self._by_type[type_] = self._type_candidates(type_)
+        errors = {}
+        for index in indexes:
+            result = trafarets[index]._validate(value)
+            if not isinstance(result, DataError):
+                if self.adaptive:
+                    self._hit(index)
+                return result
+            errors[index] = result
+        if len(errors) < len(trafarets):
+            # skipped branches can not accept value, check them only for errors
+            for index, trafaret in enumerate(trafarets):
+                if index not in errors:
+                    errors[index] = trafaret._validate(value)
+        return _or_error(errors)
+
+    def _is_valid(self, value):
+        trafarets = self.trafarets
+        if self._tags is not None:
+            indexes = None
+            if isinstance(value, AbcMapping) and self.discriminator in value:
+                try:
+                    indexes = self._tags.get(value[self.discriminator])
+                except TypeError:
+                    pass
+            if indexes is None:
+                indexes = self._untagged
+        else:
+            if self._atoms is not None:
+                try:
+                    index = self._atoms.get(value)
+                except TypeError:
+                    index = None
+                if index is not None and trafarets[index]._valid(value):
+                    return True
+            type_ = type(value)
             try:
-                return trafaret.check(value)
-            except DataError as e:
-                errors.append(e)
-        raise DataError(dict(enumerate(errors)))
+                indexes = self._by_type[type_]
+            except KeyError:
+                indexes = self._by_type[type_] = self._type_candidates(type_)
+        for index in indexes:
+            if trafarets[index]._valid(value):
+                return True
+        return False
+
+    def _check_tagged(self, value):
+        indexes = self._candidates(value)
+        if isinstance(indexes, DataError):
+            return indexes
+        errors = {}
+        trafarets = self.trafarets
+        for index in indexes:
+            result = trafarets[index]._validate(value)
+            if not isinstance(result, DataError):
+                return result
+            errors[index] = result
+        return DataError(errors)
 
     def __lshift__(self, trafaret):
         self.trafarets.append(self._trafaret(trafaret))
+        self._prepare()
         return self
 
     def __or__(self, trafaret):
@@ -315,7 +1178,12 @@ class Or(Trafaret):
         return self
 
     def __repr__(self):
-        return "<Or(%s)>" % (", ".join(map(repr, self.trafarets)))
+        args = list(map(repr, self.trafarets))
+        if self.discriminator is not None:
+            args.append('discriminator=%r' % self.discriminator)
+        if self.adaptive:
+            args.append('adaptive=True')
+        return "<Or(%s)>" % (", ".join(args))
 
 
 class Null(Trafaret):
@@ -327,9 +1195,18 @@ class Null(Trafaret):
     'value should be None'
     """
 
-    def check_value(self, value):
+    def _check_or_error(self, value):
         if value is not None:
-            self._failure("value should be None", value=value)
+            return DataError(code='not_none', value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return value is None
+
+    def accepted_types(self):
+        return (type(None),)
 
     def __repr__(self):
         return "<Null>"
@@ -347,9 +1224,18 @@ class Bool(Trafaret):
     'value should be True or False'
     """
 
-    def check_value(self, value):
+    def accepted_types(self):
+        return (bool,)
+
+    def _check_or_error(self, value):
         if not isinstance(value, bool):
-            self._failure("value should be True or False", value=value)
+            return DataError(code='not_bool', value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return isinstance(value, bool)
 
     def __repr__(self):
         return "<Bool>"
@@ -386,10 +1272,16 @@ class StrBool(Trafaret):
     convertable = ('t', 'true', 'false', 'y', 'n', 'yes', 'no', 'on',
                    '1', '0', 'none')
 
-    def check_value(self, value):
+    def _check_or_error(self, value):
         _value = str(value).strip().lower()
         if _value not in self.convertable:
-            self._failure("value can't be converted to Bool", value=value)
+            return DataError(code='not_str_bool', value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return str(value).strip().lower() in self.convertable
 
     def converter(self, value):
         if value is None:
@@ -481,30 +1373,60 @@ class Float(Trafaret):
 
     def _converter(self, value):
         if not isinstance(value, self.convertable):
-            self._failure('value is not %s' % self.value_type.__name__, value=value)
+            return DataError(code='not_number', params={'type': self.value_type.__name__}, value=value)
         try:
             return self.value_type(value)
         except ValueError:
-            self._failure(
-                "value can't be converted to %s" % self.value_type.__name__,
-                value=value
-            )
+            return DataError(
+                code='not_convertable', params={'type': self.value_type.__name__}, value=value)
+
+    def _number(self, value):
+        """
+        Returns value converted to number or ``None``, like ``_converter``
+        but without errors
+        """
+        if not isinstance(value, self.convertable):
+            return None
+        try:
+            return self.value_type(value)
+        except ValueError:
+            return None
 
-    def check_and_return(self, val):
+    def accepted_types(self):
+        return self.convertable + (self.value_type,)
+
+    def _check_or_error(self, val):
         if not isinstance(val, self.value_type):
             value = self._converter(val)
+            if isinstance(value, DataError):
+                return value
         else:
             value = val
         if self.gte is not None and value < self.gte:
-            self._failure("value is less than %s" % self.gte, value=val)
+            return DataError(code='gte', params={'gte': self.gte}, value=val)
         if self.lte is not None and value > self.lte:
-            self._failure("value is greater than %s" % self.lte, value=val)
+            return DataError(code='lte', params={'lte': self.lte}, value=val)
         if self.lt is not None and value >= self.lt:
-            self._failure("value should be less than %s" % self.lt, value=val)
+            return DataError(code='lt', params={'lt': self.lt}, value=val)
         if self.gt is not None and value <= self.gt:
-            self._failure("value should be greater than %s" % self.gt, value=val)
+            return DataError(code='gt', params={'gt': self.gt}, value=val)
         return value
 
+    def _is_valid(self, value):
+        if not isinstance(value, self.value_type):
+            value = self._number(value)
+            if value is None:
+                return False
+        if self.gte is not None and value < self.gte:
+            return False
+        if self.lte is not None and value > self.lte:
+            return False
+        if self.lt is not None and value >= self.lt:
+            return False
+        if self.gt is not None and value <= self.gt:
+            return False
+        return True
+
     def __lt__(self, lt):
         return type(self)(gte=self.gte, lte=self.lte, gt=self.gt, lt=lt)
 
@@ -540,9 +1462,14 @@ class Int(Float):
     def _converter(self, value):
         if isinstance(value, float):
             if not value.is_integer():
-                self._failure('value is not int', value=value)
+                return DataError(code='not_number', params={'type': 'int'}, value=value)
         return super(Int, self)._converter(value)
 
+    def _number(self, value):
+        if isinstance(value, float) and not value.is_integer():
+            return None
+        return super(Int, self)._number(value)
+
 
 class Atom(Trafaret):
     """
@@ -556,9 +1483,15 @@ class Atom(Trafaret):
     def __init__(self, value):
         self.value = value
 
-    def check_value(self, value):
+    def _check_or_error(self, value):
         if self.value != value:
-            self._failure("value is not exactly '%s'" % self.value, value=value)
+            return DataError(code='not_exact', params={'value': self.value}, value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return not self.value != value
 
 
 class String(Trafaret):
@@ -602,22 +1535,38 @@ class String(Trafaret):
         self.max_length = max_length
         self._raw_regex = self.regex.pattern if self.regex else None
 
-    def check_and_return(self, value):
+    def accepted_types(self):
+        return str_types
+
+    def _check_or_error(self, value):
         if not isinstance(value, str_types):
-            self._failure("value is not a string", value=value)
+            return DataError(code='not_string', value=value)
         if not self.allow_blank and len(value) == 0:
-            self._failure("blank value is not allowed", value=value)
+            return DataError(code='blank', value=value)
         if self.min_length is not None and len(value) < self.min_length:
-            self._failure('String is shorter than %s characters' % self.min_length, value=value)
+            return DataError(code='too_short', params={'min_length': self.min_length}, value=value)
         if self.max_length is not None and len(value) > self.max_length:
-            self._failure('String is longer than %s characters' % self.max_length, value=value)
+            return DataError(code='too_long', params={'max_length': self.max_length}, value=value)
         if self.regex is not None:
             match = self.regex.match(value)
             if not match:
-                self._failure("value does not match pattern: %s" % repr(self._raw_regex), value=value)
+                return DataError(code='pattern', params={'pattern': self._raw_regex}, value=value)
             return match
         return value
 
+    def _is_valid(self, value):
+        if not isinstance(value, str_types):
+            return False
+        if not self.allow_blank and len(value) == 0:
+            return False
+        if self.min_length is not None and len(value) < self.min_length:
+            return False
+        if self.max_length is not None and len(value) > self.max_length:
+            return False
+        if self.regex is not None:
+            return self.regex.match(value) is not None
+        return True
+
     def converter(self, value):
         if isinstance(value, str_types):
             return value
@@ -656,28 +1605,44 @@ class Email(String):
                                     regex=self.regex,
                                     max_length=MAX_EMAIL_LEN)
 
-    def check_and_return(self, value):
-        try:
-            return super(Email, self).check_and_return(value)
-        except DataError:
-            if value and isinstance(value, bytes):
-                decoded = value.decode('utf-8')
-            else:
-                decoded = value
-            # Trivial case failed. Try for possible IDN domain-part
-            if decoded and '@' in decoded:
-                parts = decoded.split('@')
-                try:
-                    parts[-1] = parts[-1].encode('idna').decode('ascii')
-                except UnicodeError:
-                    pass
-                else:
-                    try:
-                        return super(Email, self).check_and_return('@'.join(parts))
-                    except DataError:
-                        # Will fail with main error
-                        pass
-        self._failure('value is not a valid email address', value=value)
+    def accepted_types(self):
+        return str_types
+
+    def _check_or_error(self, value):
+        result = super(Email, self)._check_or_error(value)
+        if not isinstance(result, DataError):
+            return result
+        if isinstance(value, str_types) and _is_ascii(value):
+            # IDNA form of ASCII domain is the same, regex will fail again
+            return DataError(code='not_email', value=value)
+        if value and isinstance(value, bytes):
+            decoded = value.decode('utf-8')
+        else:
+            decoded = value
+        # Trivial case failed. Try for possible IDN domain-part
+        if decoded and '@' in decoded:
+            parts = decoded.split('@')
+            parts[-1] = _idna(parts[-1])
+            if parts[-1] is not None:
+                result = super(Email, self)._check_or_error('@'.join(parts))
+                if not isinstance(result, DataError):
+                    return result
+        return DataError(code='not_email', value=value)
+
+    def _is_valid(self, value):
+        if super(Email, self)._is_valid(value):
+            return True
+        if isinstance(value, str_types) and _is_ascii(value):
+            return False
+        if value and isinstance(value, bytes):
+            value = value.decode('utf-8')
+        if not value or '@' not in value:
+            return False
+        parts = value.split('@')
+        parts[-1] = _idna(parts[-1])
+        if parts[-1] is None:
+            return False
+        return super(Email, self)._is_valid('@'.join(parts))
 
     def __repr__(self):
         return '<Email>'
@@ -689,6 +1654,14 @@ class URL(String):
     'http://example.net/resource/?param=value#anchor'
     >>> str(URL().check('http://пример.рф/resource/?param=value#anchor'))
     'http://xn--e1afmkfd.xn--p1ai/resource/?param=value#anchor'
+
+    With ``split=True`` result of ``urlsplit`` is returned, converters get it
+    instead of match object:
+
+    >>> URL(split=True).check('http://example.net/resource/?param=value').netloc
+    'example.net'
+    >>> str(URL(split=True).check('http://пример.рф/').netloc)
+    'xn--e1afmkfd.xn--p1ai'
     """
 
     regex = re.compile(
@@ -701,35 +1674,57 @@ class URL(String):
     min_length = None
     max_length = None
 
-    def __init__(self, allow_blank=False):
+    def __init__(self, allow_blank=False, split=False):
         super(URL, self).__init__(allow_blank=allow_blank, regex=self.regex)
-
-    def check_and_return(self, value):
-        try:
-            return super(URL, self).check_and_return(value)
-        except DataError:
-            # Trivial case failed. Try for possible IDN domain-part
-            if value:
-                if isinstance(value, bytes):
-                    decoded = value.decode('utf-8')
-                else:
-                    decoded = value
-                scheme, netloc, path, query, fragment = urlparse.urlsplit(decoded)
-                try:
-                    netloc = netloc.encode('idna').decode('ascii') # IDN -> ACE
-                except UnicodeError: # invalid domain part
-                    pass
-                else:
-                    url = urlparse.urlunsplit((scheme, netloc, path, query, fragment))
-                    try:
-                        return super(URL, self).check_and_return(url)
-                    except DataError:
-                        # Will fail with main error
-                        pass
-        self._failure('value is not URL', value=value)
+        self.split = split
+
+    def accepted_types(self):
+        return str_types
+
+    def _check_or_error(self, value):
+        result = super(URL, self)._check_or_error(value)
+        if not isinstance(result, DataError):
+            return urlparse.urlsplit(result.group()) if self.split else result
+        # Trivial case failed. Try for possible IDN domain-part
+        if value:
+            if isinstance(value, bytes):
+                decoded = value.decode('utf-8')
+            else:
+                decoded = value
+            scheme, netloc, path, query, fragment = urlparse.urlsplit(decoded)
+            netloc = _idna(netloc)  # IDN -> ACE, None for invalid domain part
+            if netloc is not None:
+                url = urlparse.urlunsplit((scheme, netloc, path, query, fragment))
+                # same url would fail again, only ``urlsplit`` can change ASCII url
+                if url != decoded:
+                    result = super(URL, self)._check_or_error(url)
+                    if not isinstance(result, DataError):
+                        if self.split:
+                            return urlparse.SplitResult(scheme, netloc, path, query, fragment)
+                        return result
+        return DataError(code='not_url', value=value)
+
+    def _is_valid(self, value):
+        if super(URL, self)._is_valid(value):
+            return True
+        if not value:
+            return False
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        scheme, netloc, path, query, fragment = urlparse.urlsplit(value)
+        netloc = _idna(netloc)
+        if netloc is None:
+            return False
+        url = urlparse.urlunsplit((scheme, netloc, path, query, fragment))
+        return url != value and super(URL, self)._is_valid(url)
+
+    def converter(self, value):
+        if isinstance(value, (urlparse.SplitResult,) + str_types):
+            return value
+        return value.group()
 
     def __repr__(self):
-        return '<URL>'
+        return '<URL(split)>' if self.split else '<URL>'
 
 
 class SquareBracketsMeta(TrafaretMeta):
@@ -794,37 +1789,177 @@ class List(Trafaret):
     'list length is greater than 2'
     >>> extract_error(List(Int), ["a"])
     {0: "value can't be converted to int"}
+
+    With ``fail_fast=True`` check stops on first invalid item:
+
+    >>> extract_error(List(Int, fail_fast=True), [1, "a", "b"])
+    {1: "value can't be converted to int"}
+
+    With ``max_errors`` check stops when this number of errors is found, and
+    ``lightweight_errors=True`` drops checked values from errors and shares
+    same errors:
+
+    >>> errors = extract_error(List(Int, max_errors=2), [1.5, 2.5, 3.5, 4.5])
+    >>> errors[0], errors[1], errors['...']
+    ('value is not int', 'value is not int', 'and 2 more items are not checked')
+
+    With ``reuse_input=True`` list is returned as is, if all items are returned
+    unchanged, and copy is made only from first changed item:
+
+    >>> value = [1, 2]
+    >>> List(Int, reuse_input=True).check(value) is value
+    True
+    >>> List(Int >> str, reuse_input=True).check(value)
+    ['1', '2']
+
+    With ``lazy=True`` any iterable except string is accepted and generator of
+    checked items is returned. Items are checked when they are taken from it,
+    and first invalid item or wrong length raises ``DataError``:
+
+    >>> items = List(Int, lazy=True, max_length=3).check(iter(['1', 2, 'x']))
+    >>> next(items), next(items)
+    (1, 2)
+    >>> extract_error(next, items)
+    {2: "value can't be converted to int"}
     """
 
     __metaclass__ = SquareBracketsMeta
-    __slots__ = ['trafaret', 'min_length', 'max_length']
+    __slots__ = ['trafaret', 'min_length', 'max_length', 'fail_fast', 'max_errors', 'lightweight_errors',
+                 'reuse_input', 'lazy']
 
-    def __init__(self, trafaret, min_length=0, max_length=None):
+    def __init__(self, trafaret, min_length=0, max_length=None, fail_fast=False,
+                 max_errors=None, lightweight_errors=False, reuse_input=False, lazy=False):
         self.trafaret = self._trafaret(trafaret)
         self.min_length = min_length
         self.max_length = max_length
+        self.fail_fast = fail_fast
+        self.max_errors = max_errors
+        self.lightweight_errors = lightweight_errors
+        self.reuse_input = reuse_input
+        self.lazy = lazy
+
+    def accepted_types(self):
+        if self.lazy:
+            return None
+        return (list,)
+
+    def _check_lazy(self, value):
+        if isinstance(value, str_types):
+            iterator = None
+        else:
+            try:
+                iterator = iter(value)
+            except TypeError:
+                iterator = None
+        if iterator is None:
+            return self._error(DataError(code='not_iterable', value=value))
+        return self._iter_checked(iterator)
+
+    def _error(self, error):
+        if self.lightweight_errors:
+            return _lightweight(error)
+        return error
 
-    def check_and_return(self, value):
+    def _length_error(self, value):
+        """
+        Returns ``DataError`` if value is not list or its length is out of bounds
+        """
         if not isinstance(value, list):
-            self._failure("value is not a list", value=value)
-        if len(value) < self.min_length:
-            self._failure("list length is less than %s" % self.min_length, value=value)
-        if self.max_length is not None and len(value) > self.max_length:
-            self._failure("list length is greater than %s" % self.max_length, value=value)
-        lst = []
+            error = DataError(code='not_list', value=value)
+        elif len(value) < self.min_length:
+            error = DataError(code='list_too_short', params={'min_length': self.min_length}, value=value)
+        elif self.max_length is not None and len(value) > self.max_length:
+            error = DataError(code='list_too_long', params={'max_length': self.max_length}, value=value)
+        else:
+            return None
+        return self._error(error)
+
+    def _iter_checked(self, iterator):
+        """
+        Yields checked items of ``iterator`` and raises ``DataError`` for first
+        invalid item or when length is out of bounds
+        """
+        validate = self.trafaret._validate
+        max_length = self.max_length
+        count = 0
+        for item in iterator:
+            if max_length is not None and count >= max_length:
+                raise DataError(code='list_too_long', params={'max_length': max_length})
+            result = validate(item)
+            if isinstance(result, DataError):
+                if self.lightweight_errors:
+                    result = _shared_error(result)
+                raise DataError(error={count: result})
+            count += 1
+            yield result
+        if count < self.min_length:
+            raise DataError(code='list_too_short', params={'min_length': self.min_length})
+
+    def _check_or_error(self, value):
+        if self.lazy:
+            return self._check_lazy(value)
+        error = self._length_error(value)
+        if error is not None:
+            return error
+        validate = self.trafaret._validate
+        # with reuse_input list is copied only when item is changed
+        lst = None if self.reuse_input and type(value) is list else []
         errors = {}
         for index, item in enumerate(value):
-            try:
-                lst.append(self.trafaret.check(item))
-            except DataError as err:
-                errors[index] = err
+            result = validate(item)
+            if isinstance(result, DataError):
+                if _collect_error(self, errors, index, result, len(value) - index - 1, 'items'):
+                    break
+            elif lst is not None:
+                lst.append(result)
+            elif result is not item:
+                lst = value[:index]
+                lst.append(result)
         if errors:
-            raise DataError(error=errors)
+            return DataError(error=errors)
+        if lst is None:
+            return value
         return lst
 
+    def _is_valid(self, value):
+        if self.lazy:
+            return self._is_valid_lazy(value)
+        if not isinstance(value, list) or len(value) < self.min_length:
+            return False
+        if self.max_length is not None and len(value) > self.max_length:
+            return False
+        valid = self.trafaret._valid
+        for item in value:
+            if not valid(item):
+                return False
+        return True
+
+    def _is_valid_lazy(self, value):
+        """
+        Checks all items of iterable, it is consumed, like result of ``check``
+        would be
+        """
+        if isinstance(value, str_types):
+            return False
+        try:
+            iterator = iter(value)
+        except TypeError:
+            return False
+        valid = self.trafaret._valid
+        count = 0
+        for item in iterator:
+            if self.max_length is not None and count >= self.max_length:
+                return False
+            if not valid(item):
+                return False
+            count += 1
+        return count >= self.min_length
+
     def __repr__(self):
         r = "<List("
         options = []
+        if self.lazy:
+            options.append("lazy")
         if self.min_length:
             options.append("min_length=%s" % self.min_length)
         if self.max_length:
@@ -848,31 +1983,81 @@ class Tuple(Trafaret):
     {2: 'value is not a string'}
     >>> t
     <Tuple(<Int>, <Int>, <String>)>
+
+    With ``fail_fast=True`` check stops on first invalid item. ``max_errors``,
+    ``lightweight_errors`` and ``reuse_input`` work like for ``List``, tuple is
+    returned as is only if value is tuple.
     """
-    __slots__ = ['trafarets', 'length']
+    __slots__ = ['trafarets', 'length', 'fail_fast', 'max_errors', 'lightweight_errors', 'reuse_input']
 
-    def __init__(self, *args):
+    def __init__(self, *args, **kwargs):
+        self.fail_fast = kwargs.pop('fail_fast', False)
+        self.max_errors = kwargs.pop('max_errors', None)
+        self.lightweight_errors = kwargs.pop('lightweight_errors', False)
+        self.reuse_input = kwargs.pop('reuse_input', False)
+        if kwargs:
+            raise TypeError('Tuple got unexpected keyword arguments %s' % ', '.join(kwargs))
         self.trafarets = list(map(self._trafaret, args))
         self.length = len(self.trafarets)
 
-    def check_and_return(self, value):
+    def _as_tuple(self, value):
+        """
+        Returns value converted to tuple or ``DataError`` if it can not be
+        converted or has wrong length
+        """
         try:
             value = tuple(value)
         except TypeError:
-            self._failure('value must be convertable to tuple', value=value)
-        if len(value) != self.length:
-            self._failure('value must contain %s items' % self.length, value=value)
-        result = []
+            error = DataError(code='not_tuple', value=value)
+        else:
+            if len(value) == self.length:
+                return value
+            error = DataError(code='tuple_length', params={'length': self.length}, value=value)
+        if self.lightweight_errors:
+            return _lightweight(error)
+        return error
+
+    def _items_error(self, errors, value):
+        if self.lightweight_errors:
+            return DataError(errors)
+        return DataError(errors, value=value)
+
+    def _check_or_error(self, value):
+        original = value
+        value = self._as_tuple(value)
+        if isinstance(value, DataError):
+            return value
+        # ``tuple`` returns tuple value itself, so it can be reused
+        result = None if self.reuse_input and value is original else []
         errors = {}
         for idx, (item, trafaret) in enumerate(zip(value, self.trafarets)):
-            try:
-                result.append(trafaret.check(item))
-            except DataError as err:
-                errors[idx] = err
+            checked = trafaret._validate(item)
+            if isinstance(checked, DataError):
+                if _collect_error(self, errors, idx, checked, self.length - idx - 1, 'items'):
+                    break
+            elif result is not None:
+                result.append(checked)
+            elif checked is not item:
+                result = list(value[:idx])
+                result.append(checked)
         if errors:
-            self._failure(errors, value=value)
+            return self._items_error(errors, value)
+        if result is None:
+            return value
         return tuple(result)
 
+    def _is_valid(self, value):
+        try:
+            value = tuple(value)
+        except TypeError:
+            return False
+        if len(value) != self.length:
+            return False
+        for item, trafaret in zip(value, self.trafarets):
+            if not trafaret._valid(item):
+                return False
+        return True
+
     def __repr__(self):
         return '<Tuple(' + ', '.join(repr(t) for t in self.trafarets) + ')>'
 
@@ -881,12 +2066,13 @@ class Key(object):
     """
     Helper class for Dict.
 
-    It gets ``name``, and provides method ``extract(data)`` that extract key value
-    from data through mapping ``get`` method.
+    It gets ``name``, and provides method ``extract(data, collect, errors)`` that extract key value
+    from data through mapping ``get`` method and puts result to ``collect`` or ``errors`` dict.
     Key `__call__` method yields ``(key name, Maybe(DataError), [touched keys])`` triples.
+    ``Dict`` uses ``extract`` if key supports it and ``__call__`` otherwise.
 
     You can redefine ``get_data(data, default)`` method in subclassed ``Key`` if you want to use something other
-    then ``.get(...)`` method.
+    then ``.get(...)`` method, such keys are called through ``__call__``.
 
     Like this for the aiohttp MultiDict::
 
@@ -917,7 +2103,31 @@ class Key(object):
             return
 
         if not self.optional:
-            yield self.name, DataError(error='is required'), (self.name,)
+            yield self.name, DataError(code='required'), (self.name,)
+
+    def extract(self, data, collect, errors):
+        """
+        Non generator version of ``__call__`` used by ``Dict``. Puts checked value
+        to ``collect`` or error to ``errors`` dict. Value is taken from data with
+        one lookup, default is calculated only if data has no key.
+        """
+        value = data.get(self.name, _empty)
+        if value is _empty:
+            default = self.default
+            if default is _empty:
+                if not self.optional:
+                    errors[self.name] = DataError(code='required')
+                return
+            value = default() if callable(default) else default
+        trafaret = self.trafaret
+        if isinstance(trafaret, Trafaret):
+            value = trafaret._validate(value)
+        else:
+            value = catch_error(trafaret, value)
+        if isinstance(value, DataError):
+            errors[self.to_name or self.name] = value
+        else:
+            collect[self.to_name or self.name] = value
 
     def get_data(self, data, default):
         return data.get(self.name, default)
@@ -944,6 +2154,36 @@ class Key(object):
            ' to "%s"' % self.to_name if getattr(self, 'to_name', False) else '')
 
 
+def _check_cost(trafaret):
+    """
+    Rough relative cost of trafaret check, used to order keys of fail fast ``Dict``
+    """
+    if type(trafaret) in (Any, Null, Bool, Atom, Int, Float, Enum, Type, Subclass, Callable):
+        return 0
+    if type(trafaret) is String and trafaret.regex is None:
+        return 1
+    if type(trafaret) in (String, Email, URL, StrBool):
+        return 2
+    return 3
+
+
+def _key_cost(key):
+    if type(key) is not Key:
+        return 3
+    return _check_cost(key.trafaret)
+
+
+def _key_extractor(key):
+    """
+    Returns bound ``extract`` method if key supports it. Key subclasses that
+    redefine ``__call__`` or ``get_data`` but not ``extract`` are called as
+    generators.
+    """
+    if _defined_in(type(key), ('extract', '__call__', 'get_data'))[0] == 'extract':
+        return key.extract
+    return None
+
+
 class Dict(Trafaret):
     """
     >>> trafaret = Dict(foo=Int, bar=String) >> ignore
@@ -985,7 +2225,11 @@ class Dict(Trafaret):
     >>> _dd(trafaret.check({'foo': 4, 'foor': 5}))
     "{'baz': 'nyanya', 'foo': 4}"
     """
-    __slots__ = ['extras', 'allow_any', 'ignore', 'ignore_any', 'keys']
+    __slots__ = ['extras', 'allow_any', 'ignore', 'ignore_any', '_keys',
+                 '_names', '_ignore_names', '_extras_names', '_always', '_sparse',
+                 '_plan', '_shapes', '_shapes_maxsize', '_shape_hits', '_shape_misses', '_shapes_lock',
+                 'fail_fast', 'max_errors', 'lightweight_errors', '_fast_plan', '_static',
+                 'reuse_input', '_plain', '_projections']
 
     def __init__(self, *args, **trafarets):
         if args and isinstance(args[0], AbcMapping):
@@ -999,11 +2243,339 @@ class Dict(Trafaret):
         self.allow_any = False
         self.ignore = []
         self.ignore_any = False
-        self.keys = list(args)
+        keys_ = list(args)
         for key, trafaret in itertools.chain(trafarets.items(), keys.items()):
             key_ = Key(key) if isinstance(key, str_types) else key
             key_.set_trafaret(self._trafaret(trafaret))
-            self.keys.append(key_)
+            keys_.append(key_)
+        self._shapes_maxsize = 0
+        self.fail_fast = False
+        self.max_errors = None
+        self.lightweight_errors = False
+        self.reuse_input = False
+        self.keys = keys_
+
+    @property
+    def keys(self):
+        """
+        Tuple of keys, assigned keys are prepared for check again
+        """
+        return self._keys
+
+    @keys.setter
+    def keys(self, keys):
+        self._keys = tuple(keys)
+        self._prepare()
+
+    def _prepare(self):
+        """
+        Precomputes sets of names used by check. Must be called after
+        any change of keys or extra names.
+
+        Keys that support ``extract`` protocol are called through it and their
+        names are known in advance. Generator keys, like ``KeysSubset``, and
+        old ``pop`` based keys report touched names on every check.
+        """
+        self._plan = [(_key_extractor(key), key) for key in self.keys]
+        self._names = frozenset(
+            name
+            for extract, key in self._plan if extract is not None
+            for name in key.keys_names()
+        )
+        self._ignore_names = frozenset(self.ignore)
+        self._extras_names = frozenset(self.extras)
+        # all keys names are known before check
+        self._static = all(extract is not None for extract, key in self._plan)
+        self._plain = all(type(key) is Key for key in self.keys)
+        self._projections = {}
+        self._fast_plan = None
+        if self.fail_fast:
+            self._fast_plan = sorted(self._plan, key=lambda item: _key_cost(item[1]))
+        elif self.max_errors is not None or self.lightweight_errors:
+            self._fast_plan = self._plan
+        # optional keys without default can be skipped if value has no such
+        # name, ``_sparse`` maps names to their positions in ``keys``
+        self._always = []
+        self._sparse = {}
+        for position, key in enumerate(self.keys):
+            if type(key) is Key and key.optional and key.default is _empty:
+                self._sparse.setdefault(key.name, []).append(position)
+            else:
+                self._always.append(position)
+        self._shapes = None
+        self._shapes_lock = None
+        self._shape_hits = self._shape_misses = 0
+        if self._shapes_maxsize and all(type(key) is Key for key in self.keys):
+            self._shapes = OrderedDict()
+            self._shapes_lock = threading.Lock()
+
+    def cache_shapes(self, maxsize=128):
+        """
+        Enables cache of value shapes, sets of value keys, that passed
+        structure checks. For known shape ``Dict`` does not look for extra,
+        missing and required keys, and checks values in precomputed order.
+        Cache keeps ``maxsize`` recently used shapes, zero disables it.
+        Works for dicts with plain ``Key`` keys only. Cache and its statistics
+        are updated under lock, so trafaret can be used by several threads.
+
+        >>> trafaret = Dict(a=Int, b=String).cache_shapes(16)
+        >>> _ = trafaret.check({'a': 1, 'b': 'x'})
+        >>> _dd(trafaret.check({'a': 2, 'b': 'y'}))
+        "{'a': 2, 'b': 'y'}"
+        >>> trafaret.shape_cache_info()
+        ShapeCacheInfo(hits=1, misses=1, maxsize=16, currsize=1)
+        """
+        self._shapes_maxsize = maxsize
+        self._prepare()
+        return self
+
+    def stop_on_first_error(self, fail_fast=True):
+        """
+        Makes check stop on first error, so ``DataError`` contains only one
+        key. Not allowed keys are reported first, then keys are checked from
+        cheap trafarets, like ``Int`` or ``Atom``, to expensive ones, like ``Email``
+        or nested containers. It is method instead of ``fail_fast`` argument like
+        ``List`` has, because keyword arguments of ``Dict`` are keys.
+
+        >>> trafaret = Dict(email=Email, id=Int).stop_on_first_error()
+        >>> extract_error(trafaret, {'email': 'foo', 'id': 'x'})
+        {'id': "value can't be converted to int"}
+        """
+        self.fail_fast = fail_fast
+        self._prepare()
+        return self
+
+    def limit_errors(self, max_errors=None, lightweight_errors=False):
+        """
+        Makes check stop when ``max_errors`` keys have errors, marker error
+        with number of keys or not allowed names left is added under
+        ``MORE_ERRORS`` name.
+        With ``lightweight_errors`` errors do not keep checked values and
+        same errors are shared.
+
+        >>> trafaret = Dict(a=Int, b=Int, c=Int).limit_errors(1)
+        >>> errors = extract_error(trafaret, {'a': 1.5, 'b': 1.5, 'c': 1.5})
+        >>> len(errors), errors['...']
+        (2, 'and 2 more keys are not checked')
+        """
+        self.max_errors = max_errors
+        self.lightweight_errors = lightweight_errors
+        self._prepare()
+        return self
+
+    def _check_limited(self, value):
+        """
+        Check for ``stop_on_first_error`` and ``limit_errors`` modes
+        """
+        max_errors = 1 if self.fail_fast else self.max_errors
+        if self.fail_fast and self._static and not self.ignore_any and not self.allow_any:
+            for name in value:
+                if name not in self._names and name not in self._ignore_names \
+                        and name not in self._extras_names:
+                    return self._limited_error({name: DataError(code='not_allowed_key', params={'key': name})})
+        collect = {}
+        errors = {}
+        touched_names = set()
+        plan = self._fast_plan
+        for checked, (extract, key) in enumerate(plan, 1):
+            if extract is not None:
+                extract(value, collect, errors)
+            else:
+                for k, v, name in key(value):
+                    if isinstance(v, DataError):
+                        errors[k] = v
+                        if self.fail_fast:
+                            break
+                    else:
+                        collect[k] = v
+                    touched_names.update(name)
+            if max_errors is not None and len(errors) >= max_errors:
+                if not self.fail_fast:
+                    _more_errors(errors, len(plan) - checked, 'keys')
+                return self._limited_error(errors)
+        if not self.ignore_any:
+            unknown = set(value).difference(self._names, touched_names, self._ignore_names)
+            left = len(unknown)
+            for key in value:
+                if key not in unknown:
+                    continue
+                left -= 1
+                if not self.allow_any and key not in self._extras_names:
+                    errors[key] = DataError(code='not_allowed_key', params={'key': key})
+                    if max_errors is not None and len(errors) >= max_errors:
+                        if not self.fail_fast:
+                            _more_errors(errors, left, 'keys')
+                        return self._limited_error(errors)
+                elif key not in collect:
+                    collect[key] = value[key]
+        if errors:
+            return self._limited_error(errors)
+        if self.reuse_input:
+            return self._reused(value, collect)
+        return collect
+
+    def reuse_unchanged(self, reuse_input=True):
+        """
+        Makes check return value itself, if it is ``dict`` and checked dict
+        would be equal to it with the same objects as values, so no keys were
+        renamed, added by defaults or ignored and no values were changed.
+
+        >>> trafaret = Dict(a=Int, b=List(String, reuse_input=True)).reuse_unchanged()
+        >>> value = {'a': 1, 'b': ['x']}
+        >>> trafaret.check(value) is value
+        True
+        >>> trafaret.check({'a': '1', 'b': []}) == {'a': 1, 'b': []}
+        True
+        """
+        self.reuse_input = reuse_input
+        return self
+
+    def check_lazy(self, value):
+        """
+        Checks only structure of value: that it is mapping, has required keys
+        and has no not allowed keys, and returns ``LazyDict``, that checks
+        value of key on first access. Raises ``DataError`` for wrong structure.
+
+        >>> trafaret = Dict(a=Int, b=Int)
+        >>> view = trafaret.check_lazy({'a': '1', 'b': 'x'})
+        >>> view['a']
+        1
+        >>> extract_error(view.materialize)
+        {'b': "value can't be converted to int"}
+        >>> extract_error(trafaret.check_lazy, {'a': 1})
+        {'b': 'is required'}
+        """
+        if not isinstance(value, AbcMapping):
+            raise DataError(code='not_dict', value=value)
+        if not self._plain:
+            # custom keys can check any names, so check value now
+            checked = self._check_or_error(value)
+            if isinstance(checked, DataError):
+                raise checked
+            return LazyDict(self, value, OrderedDict((name, None) for name in checked), checked)
+        names = OrderedDict()
+        errors = {}
+        for key in self.keys:
+            if key.name in value or key.default is not _empty:
+                names[key.to_name or key.name] = key
+            elif not key.optional:
+                errors[key.name] = DataError(code='required')
+        if not self.ignore_any:
+            for name in value:
+                if name in self._names or name in self._ignore_names:
+                    continue
+                if not self.allow_any and name not in self._extras_names:
+                    errors[name] = DataError(code='not_allowed_key', params={'key': name})
+                elif name not in names:
+                    names[name] = None
+        if errors:
+            raise DataError(error=errors)
+        return LazyDict(self, value, names)
+
+    def project(self, only):
+        """
+        Returns ``Dict`` that checks and returns only keys from ``only``,
+        other keys of value are ignored. Paths are result names separated by
+        dots, like ``'user.email'``, or tuples of names. Path is followed through
+        nested ``Dict``, ``List`` and ``Forward`` trafarets. Trafarets with
+        converters and ``Dict`` with custom keys are kept whole, because their
+        result can depend on all keys. Projections are cached, so use
+        ``project`` on every check, but do not change trafaret after it.
+
+        >>> envelope = Dict(user=Dict(id=Int, email=Email), items=List(Dict(id=Int, name=String)))
+        >>> slim = envelope.project(['user.id', 'items.name'])
+        >>> slim is envelope.project(['user.id', 'items.name'])
+        True
+        >>> slim.check({'user': {'id': 1, 'email': 'bad'}, 'items': [{'name': 'x'}]}) == \\
+        ...     {'user': {'id': 1}, 'items': [{'name': 'x'}]}
+        True
+        """
+        only = frozenset(only)
+        projected = self._projections.get(only)
+        if projected is None:
+            projected = self._projections[only] = _project(self, _projection_tree(only))
+        return projected
+
+    def _reused(self, value, collect):
+        """
+        Returns ``value`` instead of ``collect`` if they have the same items
+        """
+        if type(value) is not dict or len(value) != len(collect):
+            return collect
+        for name, item in collect.items():
+            if value.get(name, _empty) is not item:
+                return collect
+        return value
+
+    def _limited_error(self, errors):
+        if self.lightweight_errors:
+            return _lightweight(DataError(error=errors))
+        return DataError(error=errors)
+
+    def shape_cache_info(self):
+        """
+        Returns shape cache statistics like ``functools.lru_cache`` does
+        """
+        shapes, lock = self._shapes, self._shapes_lock
+        if shapes is None:
+            return ShapeCacheInfo(self._shape_hits, self._shape_misses, self._shapes_maxsize, 0)
+        with lock:
+            return ShapeCacheInfo(self._shape_hits, self._shape_misses, self._shapes_maxsize, len(shapes))
+
+    def _shape_plan(self, shape, value):
+        """
+        Returns list of ``(name, key)`` pairs to check value of this shape or
+        ``None`` if shape has missing or not allowed keys. ``name`` is
+        ``None`` for keys with default, ``key`` is ``None`` for extra names.
+        """
+        plan = []
+        to_names = set()
+        for key in self.keys:
+            if key.name in shape:
+                plan.append((key.name, key))
+            elif key.default is not _empty:
+                plan.append((None, key))
+            elif not key.optional:
+                return None
+            to_names.add(key.get_name())
+        if self.ignore_any:
+            return plan
+        for name in value:
+            if name in self._names or name in self._ignore_names:
+                continue
+            if not self.allow_any and name not in self._extras_names:
+                return None
+            if name in to_names:
+                return None
+            plan.append((name, None))
+        return plan
+
+    def _check_shape(self, value, plan):
+        collect = {}
+        errors = {}
+        for name, key in plan:
+            if key is None:
+                collect[name] = value[name]
+                continue
+            if name is None:
+                default = key.default
+                item = default() if callable(default) else default
+            else:
+                item = value[name]
+            trafaret = key.trafaret
+            if isinstance(trafaret, Trafaret):
+                item = trafaret._validate(item)
+            else:
+                item = catch_error(trafaret, item)
+            if isinstance(item, DataError):
+                errors[key.to_name or key.name] = item
+            else:
+                collect[key.to_name or key.name] = item
+        if errors:
+            return DataError(error=errors)
+        if self.reuse_input:
+            return self._reused(value, collect)
+        return collect
 
     def allow_extra(self, *names):
         for name in names:
@@ -1011,6 +2583,7 @@ class Dict(Trafaret):
                 self.allow_any = True
             else:
                 self.extras.append(name)
+        self._prepare()
         return self
 
     def ignore_extra(self, *names):
@@ -1019,28 +2592,60 @@ class Dict(Trafaret):
                 self.ignore_any = True
             else:
                 self.ignore.append(name)
+        self._prepare()
         return self
 
     def make_optional(self, *args):
         for key in self.keys:
             if key.name in args or '*' in args:
                 key.make_optional()
+        self._prepare()
         return self
 
-    def check_and_return(self, value):
+    def accepted_types(self):
+        return (AbcMapping,)
+
+    def _check_or_error(self, value):
         if not isinstance(value, AbcMapping):
-            self._failure("value is not a dict", value=value)
+            return DataError(code='not_dict', value=value)
+        if self._fast_plan is not None:
+            return self._check_limited(value)
+        shapes, lock = self._shapes, self._shapes_lock
+        if shapes is not None:
+            shape = frozenset(value)
+            # only bookkeeping is locked, values are checked outside of lock
+            with lock:
+                plan = shapes.pop(shape, None)
+                if plan is not None:
+                    self._shape_hits += 1
+                    shapes[shape] = plan
+                else:
+                    self._shape_misses += 1
+            if plan is not None:
+                return self._check_shape(value, plan)
+            plan = self._shape_plan(shape, value)
+            if plan is not None:
+                with lock:
+                    shapes[shape] = plan
+                    while len(shapes) > self._shapes_maxsize:
+                        shapes.popitem(last=False)
+                return self._check_shape(value, plan)
         collect = {}
         errors = {}
-        touched_names = []
-        for key in self.keys:
-            if callable(key):
+        touched_names = set()
+        plan = self._plan
+        if len(value) * SPARSE_RATIO < len(self._sparse):
+            plan = self._sparse_plan(value)
+        for extract, key in plan:
+            if extract is not None:
+                extract(value, collect, errors)
+            elif callable(key):
                 for k, v, name in key(value):
                     if isinstance(v, DataError):
                         errors[k] = v
                     else:
                         collect[k] = v
-                    touched_names.extend(name)
+                    touched_names.update(name)
             else:
                 warnings.warn(
                     'Old pop based Keys subclasses deprecated. See README',
@@ -1052,21 +2657,77 @@ class Dict(Trafaret):
                         errors[k] = v
                     else:
                         collect[k] = v
-                touched_names.extend(value_keys - set(value.keys()))
+                touched_names.update(value_keys - set(value.keys()))
 
         if not self.ignore_any:
+            self._check_unknown(value, collect, errors, touched_names)
+        if errors:
+            return DataError(error=errors)
+        if self.reuse_input:
+            return self._reused(value, collect)
+        return collect
+
+    def _check_unknown(self, value, collect, errors, touched_names=()):
+        """
+        Puts names of value that are not checked by keys to ``collect`` or
+        ``errors`` if they are not allowed
+        """
+        unknown = set(value).difference(self._names, touched_names, self._ignore_names)
+        if unknown:
+            # walk over value to keep keys order
             for key in value:
-                if key in touched_names:
-                    continue
-                if key in self.ignore:
+                if key not in unknown:
                     continue
-                if not self.allow_any and key not in self.extras:
-                    errors[key] = DataError("%s is not allowed key" % key)
+                if not self.allow_any and key not in self._extras_names:
+                    errors[key] = DataError(code='not_allowed_key', params={'key': key})
                 elif key not in collect:
                     collect[key] = value[key]
-        if errors:
-            raise DataError(error=errors)
-        return collect
+
+    def _is_valid(self, value):
+        if not isinstance(value, AbcMapping):
+            return False
+        if not self._plain:
+            return not isinstance(self._check_or_error(value), DataError)
+        plan = self._plan
+        if len(value) * SPARSE_RATIO < len(self._sparse):
+            plan = self._sparse_plan(value)
+        for _, key in plan:
+            item = value.get(key.name, _empty)
+            if item is _empty:
+                default = key.default
+                if default is _empty:
+                    if not key.optional:
+                        return False
+                    continue
+                item = default() if callable(default) else default
+            trafaret = key.trafaret
+            if isinstance(trafaret, Trafaret):
+                if not trafaret._valid(item):
+                    return False
+            elif isinstance(catch_error(trafaret, item), DataError):
+                return False
+        if not self.ignore_any and not self.allow_any:
+            for name in value:
+                if name not in self._names and name not in self._ignore_names \
+                        and name not in self._extras_names:
+                    return False
+        return True
+
+    def _sparse_plan(self, value):
+        """
+        Returns plan for keys that must be checked for value, in ``keys`` order.
+        Used when value is much smaller than Dict, then lookup of value names
+        is cheaper than walking over all optional keys.
+        """
+        positions = list(self._always)
+        sparse = self._sparse
+        for name in value:
+            found = sparse.get(name)
+            if found is not None:
+                positions.extend(found)
+        positions.sort()
+        plan = self._plan
+        return [plan[position] for position in positions]
 
     def keys_names(self):
         for key in self.keys:
@@ -1122,12 +2783,156 @@ class Dict(Trafaret):
             raise ValueError('Merged dicts should have '
                             'no interlapping keys to names')
         new_trafaret = self.__class__()
-        new_trafaret.keys = self.keys + other_keys
+        new_trafaret.keys = self.keys + tuple(other_keys)
         return new_trafaret
 
     __add__ = merge
 
 
+def _projection_tree(paths):
+    """
+    Returns dict of names to dicts of nested names, ``None`` stands for
+    whole value
+    """
+    tree = {}
+    for path in paths:
+        names = path.split('.') if isinstance(path, str_types) else path
+        node = tree
+        for name in names[:-1]:
+            child = node.get(name, _empty)
+            if child is None:
+                # whole value is already requested
+                break
+            if child is _empty:
+                child = node[name] = {}
+            node = child
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def _project(trafaret, tree):
+    """
+    Returns trafaret, that checks only names of ``tree``, see ``Dict.project``
+    """
+    if tree is None or getattr(trafaret, 'converters', None) is not None:
+        return trafaret
+    if type(trafaret) is List:
+        return List(
+            _project(trafaret.trafaret, tree),
+            min_length=trafaret.min_length, max_length=trafaret.max_length,
+            fail_fast=trafaret.fail_fast, max_errors=trafaret.max_errors,
+            lightweight_errors=trafaret.lightweight_errors, reuse_input=trafaret.reuse_input,
+            lazy=trafaret.lazy,
+        )
+    if type(trafaret) is Forward:
+        if trafaret.trafaret is None:
+            return trafaret
+        projected = Forward(iterative=trafaret.iterative, memoize=trafaret.memoize)
+        projected << _project(trafaret.trafaret, tree)
+        return projected
+    if type(trafaret) is not Dict or not trafaret._plain:
+        return trafaret
+    keys = [
+        Key(
+            key.name, default=key.default, optional=key.optional, to_name=key.to_name,
+            trafaret=_project(key.trafaret, tree[key.get_name()]),
+        )
+        for key in trafaret.keys
+        if key.get_name() in tree
+    ]
+    projected = Dict(*keys)
+    projected.ignore_any = True
+    projected.fail_fast = trafaret.fail_fast
+    projected.max_errors = trafaret.max_errors
+    projected.lightweight_errors = trafaret.lightweight_errors
+    projected.reuse_input = trafaret.reuse_input
+    projected._shapes_maxsize = trafaret._shapes_maxsize
+    projected._prepare()
+    return projected
+
+
+class LazyDict(AbcMapping):
+    """
+    Read-only mapping returned by ``Dict.check_lazy``. Value of key is checked
+    with its trafaret on first access and result is cached. Invalid value
+    raises ``DataError`` with error of this key on every access.
+    ``materialize`` checks all keys and returns result of ``check``.
+
+    >>> view = Dict({Key('a') >> 'b': Int}, c=List(Int)).check_lazy({'a': '1', 'c': [1, 'x']})
+    >>> sorted(view)
+    ['b', 'c']
+    >>> view['b']
+    1
+    >>> extract_error(view.get, 'c')
+    {'c': {1: "value can't be converted to int"}}
+    """
+
+    def __init__(self, trafaret, value, names, checked=None):
+        self._trafaret = trafaret
+        self._value = value
+        # maps result names to keys, ``None`` for extra names
+        self._names = names
+        self._checked = {} if checked is None else dict(checked)
+
+    def _check(self, name):
+        key = self._names[name]
+        if key is None:
+            return self._value[name]
+        item = self._value.get(key.name, _empty)
+        if item is _empty:
+            default = key.default
+            item = default() if callable(default) else default
+        trafaret = key.trafaret
+        if isinstance(trafaret, Trafaret):
+            return trafaret._validate(item)
+        return catch_error(trafaret, item)
+
+    def __getitem__(self, name):
+        try:
+            result = self._checked[name]
+        except KeyError:
+            result = self._checked[name] = self._check(name)
+        if isinstance(result, DataError):
+            raise DataError(error={name: result})
+        return result
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def materialize(self):
+        """
+        Checks values of all keys and returns dict with converters of ``Dict``
+        applied or raises ``DataError`` with errors of all invalid keys
+        """
+        collect = {}
+        errors = {}
+        for name in self._names:
+            try:
+                result = self._checked[name]
+            except KeyError:
+                result = self._checked[name] = self._check(name)
+            if isinstance(result, DataError):
+                errors[name] = result
+            else:
+                collect[name] = result
+        if errors:
+            raise DataError(error=errors)
+        return self._trafaret._convert(collect)
+
+    def __repr__(self):
+        return '<LazyDict(%s)>' % ', '.join(
+            '%s=%s' % (name, 'checked' if name in self._checked else 'unchecked')
+            for name in self._names
+        )
+
+
 def DictKeys(keys):
     """
     Checks if dict has all given keys
@@ -1153,36 +2958,64 @@ class Mapping(Trafaret):
     """
     Mapping gets two trafarets as arguments, one for key and one for value,
     like `Mapping(t.Int, t.List(t.Str))`.
+    With ``fail_fast=True`` check stops on first invalid pair. ``max_errors``,
+    ``lightweight_errors`` and ``reuse_input`` work like for ``List``.
     """
-    __slots__ = ['key', 'value']
+    __slots__ = ['key', 'value', 'fail_fast', 'max_errors', 'lightweight_errors', 'reuse_input']
 
-    def __init__(self, key, value):
+    def __init__(self, key, value, fail_fast=False, max_errors=None, lightweight_errors=False,
+                 reuse_input=False):
         self.key = self._trafaret(key)
         self.value = self._trafaret(value)
+        self.fail_fast = fail_fast
+        self.max_errors = max_errors
+        self.lightweight_errors = lightweight_errors
+        self.reuse_input = reuse_input
 
-    def check_and_return(self, mapping):
+    def accepted_types(self):
+        return (AbcMapping,)
+
+    def _check_or_error(self, mapping):
         if not isinstance(mapping, dict):
-            self._failure("value is not a dict", value=mapping)
-        checked_mapping = {}
+            error = DataError(code='not_dict', value=mapping)
+            return _lightweight(error) if self.lightweight_errors else error
+        validate_key = self.key._validate
+        validate_value = self.value._validate
+        # with reuse_input mapping is copied only when pair is changed
+        checked_mapping = None if self.reuse_input and type(mapping) is dict else {}
         errors = {}
-        for key, value in mapping.items():
+        for checked, (key, value) in enumerate(mapping.items(), 1):
             pair_errors = {}
-            try:
-                checked_key = self.key.check(key)
-            except DataError as err:
-                pair_errors['key'] = err
-            try:
-                checked_value = self.value.check(value)
-            except DataError as err:
-                pair_errors['value'] = err
+            checked_key = validate_key(key)
+            if isinstance(checked_key, DataError):
+                pair_errors['key'] = checked_key
+            checked_value = validate_value(value)
+            if isinstance(checked_value, DataError):
+                pair_errors['value'] = checked_value
             if pair_errors:
-                errors[key] = DataError(error=pair_errors)
-            else:
+                if _collect_error(self, errors, key, DataError(error=pair_errors), len(mapping) - checked, 'pairs'):
+                    break
+            elif checked_mapping is not None:
+                checked_mapping[checked_key] = checked_value
+            elif checked_key is not key or checked_value is not value:
+                checked_mapping = dict(itertools.islice(mapping.items(), checked - 1))
                 checked_mapping[checked_key] = checked_value
         if errors:
-            raise DataError(error=errors)
+            return DataError(error=errors)
+        if checked_mapping is None:
+            return mapping
         return checked_mapping
 
+    def _is_valid(self, mapping):
+        if not isinstance(mapping, dict):
+            return False
+        valid_key = self.key._valid
+        valid_value = self.value._valid
+        for key, value in mapping.items():
+            if not valid_key(key) or not valid_value(value):
+                return False
+        return True
+
     def __repr__(self):
         return "<Mapping(%r => %r)>" % (self.key, self.value)
 
@@ -1196,18 +3029,75 @@ class Enum(Trafaret):
     >>> trafaret.check(1)
     >>> extract_error(trafaret, 2)
     "value doesn't match any variant"
+
+    Hashable variants are looked up in set, unhashable ones are compared one by one.
+    With ``casefold=True`` strings are matched case insensitive and variant
+    is returned:
+
+    >>> Enum('USD', 'EUR', casefold=True).check('usd')
+    'USD'
     """
-    __slots__ = ['variants']
+    __slots__ = ['variants', 'casefold', '_index', '_unhashable', '_folded']
 
-    def __init__(self, *variants):
+    def __init__(self, *variants, **kwargs):
+        self.casefold = kwargs.pop('casefold', False)
+        if kwargs:
+            raise TypeError('Enum got unexpected keyword arguments %s' % ', '.join(kwargs))
         self.variants = variants[:]
+        index = set()
+        unhashable = []
+        for variant in variants:
+            try:
+                index.add(variant)
+            except TypeError:
+                unhashable.append(variant)
+        self._index = frozenset(index)
+        self._unhashable = tuple(unhashable)
+        self._folded = None
+        if self.casefold:
+            self._folded = {}
+            for variant in variants:
+                if isinstance(variant, str_types):
+                    self._folded.setdefault(_casefold(variant), variant)
+
+    def _check_or_error(self, value):
+        try:
+            if value in self._index:
+                return value
+        except TypeError:
+            # unhashable value, like set, still can be equal to hashable variant
+            if value in self.variants:
+                return value
+        else:
+            if self._unhashable and value in self._unhashable:
+                return value
+        if self._folded is not None and isinstance(value, str_types):
+            variant = self._folded.get(_casefold(value), _empty)
+            if variant is not _empty:
+                return variant
+        return DataError(code='not_variant', value=value)
 
-    def check_value(self, value):
-        if value not in self.variants:
-            self._failure("value doesn't match any variant", value=value)
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        try:
+            if value in self._index:
+                return True
+        except TypeError:
+            if value in self.variants:
+                return True
+        else:
+            if self._unhashable and value in self._unhashable:
+                return True
+        if self._folded is not None and isinstance(value, str_types):
+            return _casefold(value) in self._folded
+        return False
 
     def __repr__(self):
-        return "<Enum(%s)>" % (", ".join(map(repr, self.variants)))
+        args = list(map(repr, self.variants))
+        if self.casefold:
+            args.append('casefold=True')
+        return "<Enum(%s)>" % (", ".join(args))
 
 
 class Callable(Trafaret):
@@ -1217,9 +3107,15 @@ class Callable(Trafaret):
     'value is not callable'
     """
 
-    def check_value(self, value):
+    def _check_or_error(self, value):
         if not callable(value):
-            self._failure("value is not callable", value=value)
+            return DataError(code='not_callable', value=value)
+        return value
+
+    check_value = _check_value_or_raise
+
+    def _is_valid(self, value):
+        return callable(value)
 
     def __repr__(self):
         return "<Callable>"
@@ -1251,12 +3147,17 @@ class Call(Trafaret):
                                " one argument function")
         self.fn = fn
 
-    def check_and_return(self, value):
-        res = self.fn(value)
-        if isinstance(res, DataError):
-            raise res
-        else:
-            return res
+    def _check_or_error(self, value):
+        try:
+            return self.fn(value)
+        except DataError as err:
+            return err
+
+    def _is_valid(self, value):
+        try:
+            return not isinstance(self.fn(value), DataError)
+        except DataError:
+            return False
 
     def __repr__(self):
         return "<Call(%s)>" % self.fn.__name__
@@ -1281,10 +3182,41 @@ class Forward(Trafaret):
     <Forward(None)>
     >>> extract_error(empty_node, 'something')
     'trafaret not set yet'
+
+    With ``iterative=True`` containers under ``Forward`` are checked with
+    explicit stack, see ``trafaret.iterative``, so depth of value is not
+    limited by recursion limit, and value that contains itself gives error:
+
+    >>> tree = Forward(iterative=True)
+    >>> tree << Or(Null, List[tree])
+    >>> value = None
+    >>> for _ in range(10000):
+    ...     value = [value]
+    >>> result = tree.check(value)
+    >>> for _ in range(10000):
+    ...     result = result[0]
+    >>> result is None
+    True
+
+    With ``memoize=True`` explicit stack is used too, and object met several
+    times in value is checked once by every trafaret, its result is reused.
+    Object that contains itself gives error instead of endless recursion:
+
+    >>> tree = Forward(memoize=True)
+    >>> tree << Or(Null, List[tree])
+    >>> shared = [None]
+    >>> result = tree.check([shared, shared])
+    >>> result[0] is result[1]
+    True
+    >>> shared.append(shared)
+    >>> extract_error(tree, shared) == {0: 'value should be None', 1: {1: 'value contains reference to itself'}}
+    True
     """
 
-    def __init__(self):
+    def __init__(self, iterative=False, memoize=False):
         self.trafaret = None
+        self.iterative = iterative
+        self.memoize = memoize
         self._recur_repr = False
 
     def __lshift__(self, trafaret):
@@ -1295,10 +3227,20 @@ class Forward(Trafaret):
             raise RuntimeError("trafaret for Forward is already specified")
         self.trafaret = self._trafaret(trafaret)
 
-    def check_and_return(self, value):
+    def _check_or_error(self, value):
         if self.trafaret is None:
-            self._failure('trafaret not set yet', value=value)
-        return self.trafaret.check(value)
+            return DataError(code='not_set', value=value)
+        if self.iterative or self.memoize:
+            from .iterative import run
+            return run(self.trafaret, value, memoize=self.memoize)
+        return self.trafaret._validate(value)
+
+    def _is_valid(self, value):
+        if self.trafaret is None:
+            return False
+        if self.iterative or self.memoize:
+            return not isinstance(self._check_or_error(value), DataError)
+        return self.trafaret._valid(value)
 
     def __repr__(self):
         # XXX not threadsafe
@@ -1310,6 +3252,164 @@ class Forward(Trafaret):
         return r
 
 
+class Cached(Trafaret):
+    """
+    Keeps results and errors of trafaret for recently checked values. Values
+    are looked up by type and value, so ``1`` and ``True`` are different
+    values, unhashable values are checked without cache. ``maxsize`` limits
+    number of kept results, results older than ``ttl`` seconds are checked
+    again. Cache is thread safe, every cache has its own lock, but the same
+    value can be checked by several threads at once.
+
+    All caches share ``MAX_CACHED_RESULTS`` limit, when it is reached the
+    oldest result of the biggest cache is evicted. Results are returned as is,
+    so cache costly leaf trafarets, like ``Email``, rather than containers:
+
+    >>> email = Cached(Email, maxsize=1024)
+    >>> email
+    <Cached(<Email>, maxsize=1024)>
+    >>> email.check('someone@example.net')
+    'someone@example.net'
+    >>> email.check('someone@example.net')
+    'someone@example.net'
+    >>> extract_error(email, 'foo')
+    'value is not a valid email address'
+    >>> extract_error(email, ['someone@example.net'])
+    'value is not a valid email address'
+    >>> email.cache_info()
+    CacheInfo(hits=1, misses=2, evictions=0, maxsize=1024, currsize=2)
+    """
+    _registry = weakref.WeakSet()
+    # guards registry and ``_total``, every cache has its own lock for results
+    _registry_lock = threading.Lock()
+    # number of results kept by all caches, caches collected by gc are
+    # subtracted when limit is reached and sizes are summed again
+    _total = 0
+    _clock = staticmethod(time.monotonic if py3 else time.time)
+
+    def __init__(self, trafaret, maxsize=128, ttl=None):
+        self.trafaret = self._trafaret(trafaret)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._results = OrderedDict()
+        self._hits = self._misses = self._evictions = 0
+        self._lock = threading.Lock()
+        with Cached._registry_lock:
+            Cached._registry.add(self)
+
+    def accepted_types(self):
+        return _accepted_types(self.trafaret)
+
+    def _check_or_error(self, value):
+        key = (type(value), value)
+        try:
+            hash(key)
+        except TypeError:
+            return self.trafaret._validate(value)
+        removed = 0
+        with self._lock:
+            found = self._results.pop(key, None)
+            if found is not None and (found[1] is None or found[1] > self._clock()):
+                self._results[key] = found
+                self._hits += 1
+                result = found[0]
+            else:
+                if found is not None:
+                    removed = 1
+                self._misses += 1
+                result = _empty
+        if removed:
+            self._count(-removed)
+        if result is _empty:
+            result = self.trafaret._validate(value)
+            self._store(key, result)
+        if isinstance(result, DataError):
+            # raised error gets traceback, so cached one is not given out
+            return DataError(result._error, result.name, result.value, result.code, result.params)
+        return result
+
+    def _is_valid(self, value):
+        return not isinstance(self._check_or_error(value), DataError)
+
+    def _store(self, key, result):
+        if self.maxsize <= 0:
+            return
+        expires = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            size = len(self._results)
+            self._results[key] = (result, expires)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+                self._evictions += 1
+            added = len(self._results) - size
+        if added and self._count(added) > MAX_CACHED_RESULTS:
+            self._evict_biggest()
+
+    @staticmethod
+    def _count(delta):
+        """
+        Changes number of results kept by all caches and returns it
+        """
+        with Cached._registry_lock:
+            Cached._total += delta
+            return Cached._total
+
+    @staticmethod
+    def _evict_biggest():
+        """
+        Evicts oldest result of the biggest cache if all caches keep more than
+        ``MAX_CACHED_RESULTS`` results. Sizes are summed again here only.
+        """
+        with Cached._registry_lock:
+            caches = list(Cached._registry)
+            Cached._total = sum(len(cache._results) for cache in caches)
+            if Cached._total <= MAX_CACHED_RESULTS or not caches:
+                return
+        biggest = max(caches, key=lambda cache: len(cache._results))
+        with biggest._lock:
+            if not biggest._results:
+                return
+            biggest._results.popitem(last=False)
+            biggest._evictions += 1
+        Cached._count(-1)
+
+    def cache_info(self):
+        """
+        Returns cache statistics like ``functools.lru_cache`` does
+        """
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, self.maxsize, len(self._results))
+
+    def cache_clear(self):
+        with self._lock:
+            removed = len(self._results)
+            self._results.clear()
+            self._hits = self._misses = self._evictions = 0
+        self._count(-removed)
+
+    @classmethod
+    def registry_info(cls):
+        """
+        Returns statistics summed over all caches, ``maxsize`` is
+        ``MAX_CACHED_RESULTS``
+        """
+        hits = misses = evictions = currsize = 0
+        with Cached._registry_lock:
+            caches = list(Cached._registry)
+        for cache in caches:
+            info = cache.cache_info()
+            hits += info.hits
+            misses += info.misses
+            evictions += info.evictions
+            currsize += info.currsize
+        return CacheInfo(hits, misses, evictions, MAX_CACHED_RESULTS, currsize)
+
+    def __repr__(self):
+        if self.ttl is None:
+            return '<Cached(%r, maxsize=%r)>' % (self.trafaret, self.maxsize)
+        return '<Cached(%r, maxsize=%r, ttl=%r)>' % (self.trafaret, self.maxsize, self.ttl)
+
+
 class GuardError(DataError):
     """
     Raised when guarded function gets invalid arguments,
@@ -1406,6 +3506,8 @@ def catch_error(checker, *a, **kw):
     Helper for tests - catch error and return it as dict
     """
 
+    if isinstance(checker, Trafaret) and len(a) == 1 and not kw:
+        return checker._validate(a[0])
     try:
         if hasattr(checker, 'check'):
             return checker.check(*a, **kw)
@@ -0,0 +1,427 @@
+"""
+Compiles trafaret trees into plain python functions.
+
+Interpreted ``check`` walks the trafaret objects on every call. ``compile_trafaret``
+walks them once and generates source of a single function with range checks,
+regex matches, key renames and converters inlined. Generated function returns the
+same values and raises the same ``DataError`` as ``check`` of the original tree.
+
+Compiled function is a snapshot: changes made to trafarets after compilation
+(``>>``, ``allow_extra`` etc) are not seen by it. Trafarets unknown to compiler,
+including subclasses of built-in ones, are called through their ``check`` method.
+
+>>> from trafaret import Dict, Key, Int, String, List
+>>> fn = compile_trafaret(Dict({Key('a') >> 'b': Int[1:]}, c=List(String)))
+>>> fn({'a': 5, 'c': ['x']}) == {'b': 5, 'c': ['x']}
+True
+>>> from trafaret import extract_error
+>>> extract_error(fn, {'a': 0, 'c': [1]}) == {'b': 'value is less than 1', 'c': {0: 'value is not a string'}}
+True
+"""
+import warnings
+from . import (
+    Trafaret, DataError, Any, Null, Bool, Atom, Enum, Float, Int, String,
+    List, Tuple, Dict, Key, Mapping, Or, Forward, str_types, _empty,
+)
+from collections import Mapping as AbcMapping
+
+
+# CPython does not allow more than 20 statically nested blocks in one function,
+# deeper trees are split to several generated functions
+MAX_INDENT = 12
+
+
+def _func(method):
+    return getattr(method, '__func__', method)
+
+
+class Compiler(object):
+    """
+    Accumulates generated functions source and namespace with bound objects.
+    """
+
+    def __init__(self):
+        self.namespace = {
+            'DataError': DataError,
+            'AbcMapping': AbcMapping,
+            'str_types': str_types,
+            'warnings': warnings,
+            '_empty': _empty,
+        }
+        self.functions = []
+        self.compiled = {}
+        self.counter = 0
+
+    def name(self, prefix):
+        self.counter += 1
+        return '%s%d' % (prefix, self.counter)
+
+    def bind(self, obj, prefix='c'):
+        name = self.name(prefix)
+        self.namespace[name] = obj
+        return name
+
+    def function(self, trafaret):
+        """
+        Returns name of generated function for trafaret. Functions are cached by
+        trafaret identity, so recursive ``Forward`` trees compile to recursive
+        functions.
+        """
+        key = id(trafaret)
+        if key in self.compiled:
+            return self.compiled[key][0]
+        name = self.name('check_')
+        # keep trafaret alive, so id will not be reused while compiling
+        self.compiled[key] = (name, trafaret)
+        lines = ['def %s(value):' % name]
+        self.node(trafaret, 'value', 'result', lines, 1)
+        lines.append('    return result')
+        self.functions.append('\n'.join(lines))
+        return name
+
+    def node(self, trafaret, src, dst, lines, indent):
+        """
+        Emits code which checks ``src`` variable with ``trafaret`` and stores
+        result to ``dst`` variable or raises ``DataError``.
+        """
+        if type(trafaret) is Forward:
+            self.node_forward(trafaret, src, dst, lines, indent)
+            return
+        if indent > MAX_INDENT:
+            self._emitter(lines, indent)('%s = %s(%s)' % (dst, self.function(trafaret), src))
+            return
+        emitter = self.emitters.get(type(trafaret))
+        if emitter is None or not isinstance(trafaret, Trafaret):
+            self.fallback(trafaret, src, dst, lines, indent)
+            return
+        if getattr(trafaret, 'fail_fast', False) or getattr(trafaret, 'max_errors', None) is not None \
+                or getattr(trafaret, 'lightweight_errors', False) or getattr(trafaret, 'reuse_input', False) \
+                or getattr(trafaret, 'lazy', False):
+            emitter = type(self).native
+        emitter(self, trafaret, src, dst, lines, indent)
+        self.converters(trafaret, dst, lines, indent)
+
+    @staticmethod
+    def _emitter(lines, indent):
+        def emit(line, shift=0):
+            lines.append('    ' * (indent + shift) + line)
+        return emit
+
+    def fallback(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        if isinstance(trafaret, Trafaret) or hasattr(trafaret, 'check'):
+            emit('%s = %s(%s)' % (dst, self.bind(trafaret.check, 'check'), src))
+        else:
+            emit('%s = %s(%s)' % (dst, self.bind(trafaret, 'fn'), src))
+
+    def converters(self, trafaret, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        converters = getattr(trafaret, 'converters', None)
+        if converters is None:
+            if _func(type(trafaret).converter) is _func(Trafaret.converter):
+                return
+            if type(trafaret) is String:
+                # String converter is inlined by String emitter
+                return
+            converters = [trafaret.converter]
+        for converter in converters:
+            emit('%s = %s(%s)' % (dst, self.bind(converter, 'conv'), dst))
+
+    def native(self, trafaret, src, dst, lines, indent):
+        """
+        Emits call of ``_check_or_error`` of trafaret without its converters
+        """
+        emit = self._emitter(lines, indent)
+        emit('%s = %s(%s)' % (dst, self.bind(trafaret._check_or_error, 'native'), src))
+        emit('if isinstance(%s, DataError):' % dst)
+        emit('raise %s' % dst, 1)
+
+    def failure(self, emit, code, value, shift=0, params=None):
+        if params is None:
+            emit('raise DataError(code=%r, value=%s)' % (code, value), shift)
+        else:
+            emit('raise DataError(code=%r, params=%s, value=%s)' % (
+                code, self.bind(params, 'params'), value), shift)
+
+    def node_forward(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        if trafaret.trafaret is None:
+            self.failure(emit, 'not_set', src)
+        elif trafaret.iterative or trafaret.memoize:
+            # generated functions are recursive, keep explicit stack check
+            self.native(trafaret, src, dst, lines, indent)
+        else:
+            emit('%s = %s(%s)' % (dst, self.function(trafaret.trafaret), src))
+        self.converters(trafaret, dst, lines, indent)
+
+    def node_any(self, trafaret, src, dst, lines, indent):
+        self._emitter(lines, indent)('%s = %s' % (dst, src))
+
+    def node_null(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        emit('if %s is not None:' % src)
+        self.failure(emit, 'not_none', src, 1)
+        emit('%s = %s' % (dst, src))
+
+    def node_bool(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        emit('if not isinstance(%s, bool):' % src)
+        self.failure(emit, 'not_bool', src, 1)
+        emit('%s = %s' % (dst, src))
+
+    def node_atom(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        emit('if %s != %s:' % (self.bind(trafaret.value, 'atom'), src))
+        self.failure(emit, 'not_exact', src, 1, {'value': trafaret.value})
+        emit('%s = %s' % (dst, src))
+
+    def node_enum(self, trafaret, src, dst, lines, indent):
+        self.native(trafaret, src, dst, lines, indent)
+
+    def node_number(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        value_type = self.bind(trafaret.value_type, 'type')
+        type_name = trafaret.value_type.__name__
+        emit('if not isinstance(%s, %s):' % (src, value_type))
+        if type(trafaret) is Int:
+            emit('if isinstance(%s, float) and not %s.is_integer():' % (src, src), 1)
+            self.failure(emit, 'not_number', src, 2, {'type': 'int'})
+        emit('if not isinstance(%s, %s):' % (src, self.bind(trafaret.convertable, 'types')), 1)
+        self.failure(emit, 'not_number', src, 2, {'type': type_name})
+        emit('try:', 1)
+        emit('%s = %s(%s)' % (dst, value_type, src), 2)
+        emit('except ValueError:', 1)
+        self.failure(emit, 'not_convertable', src, 2, {'type': type_name})
+        emit('else:')
+        emit('%s = %s' % (dst, src), 1)
+        for param, op in (('gte', '<'), ('lte', '>'), ('lt', '>='), ('gt', '<=')):
+            limit = getattr(trafaret, param)
+            if limit is not None:
+                emit('if %s %s %s:' % (dst, op, self.bind(limit, param)))
+                self.failure(emit, param, src, 1, {param: limit})
+
+    def node_string(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        emit('if not isinstance(%s, str_types):' % src)
+        self.failure(emit, 'not_string', src, 1)
+        if not trafaret.allow_blank:
+            emit('if len(%s) == 0:' % src)
+            self.failure(emit, 'blank', src, 1)
+        if trafaret.min_length is not None:
+            emit('if len(%s) < %s:' % (src, self.bind(trafaret.min_length, 'min')))
+            self.failure(emit, 'too_short', src, 1, {'min_length': trafaret.min_length})
+        if trafaret.max_length is not None:
+            emit('if len(%s) > %s:' % (src, self.bind(trafaret.max_length, 'max')))
+            self.failure(emit, 'too_long', src, 1, {'max_length': trafaret.max_length})
+        if trafaret.regex is not None:
+            emit('%s = %s(%s)' % (dst, self.bind(trafaret.regex.match, 'match'), src))
+            emit('if not %s:' % dst)
+            self.failure(emit, 'pattern', src, 1, {'pattern': trafaret._raw_regex})
+            if getattr(trafaret, 'converters', None) is None:
+                emit('%s = %s.group()' % (dst, dst))
+        else:
+            emit('%s = %s' % (dst, src))
+
+    def node_list(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        result, errors, index, item, err = (
+            self.name('lst'), self.name('errors'), self.name('idx'),
+            self.name('item'), self.name('err'))
+        emit('if not isinstance(%s, list):' % src)
+        self.failure(emit, 'not_list', src, 1)
+        emit('if len(%s) < %s:' % (src, self.bind(trafaret.min_length, 'min')))
+        self.failure(emit, 'list_too_short', src, 1, {'min_length': trafaret.min_length})
+        if trafaret.max_length is not None:
+            emit('if len(%s) > %s:' % (src, self.bind(trafaret.max_length, 'max')))
+            self.failure(emit, 'list_too_long', src, 1, {'max_length': trafaret.max_length})
+        emit('%s = []' % result)
+        emit('%s = {}' % errors)
+        emit('for %s, %s in enumerate(%s):' % (index, item, src))
+        emit('try:', 1)
+        checked = self.name('checked')
+        self.node(trafaret.trafaret, item, checked, lines, indent + 2)
+        emit('%s.append(%s)' % (result, checked), 2)
+        emit('except DataError as %s:' % err, 1)
+        emit('%s[%s] = %s' % (errors, index, err), 2)
+        emit('if %s:' % errors)
+        emit('raise DataError(error=%s)' % errors, 1)
+        emit('%s = %s' % (dst, result))
+
+    def node_tuple(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        value, result, errors, err = (
+            self.name('tup'), self.name('result'), self.name('errors'), self.name('err'))
+        emit('try:')
+        emit('%s = tuple(%s)' % (value, src), 1)
+        emit('except TypeError:')
+        self.failure(emit, 'not_tuple', src, 1)
+        emit('if len(%s) != %s:' % (value, trafaret.length))
+        self.failure(emit, 'tuple_length', value, 1, {'length': trafaret.length})
+        emit('%s = []' % result)
+        emit('%s = {}' % errors)
+        for idx, item_trafaret in enumerate(trafaret.trafarets):
+            checked = self.name('checked')
+            emit('try:')
+            self.node(item_trafaret, '%s[%d]' % (value, idx), checked, lines, indent + 1)
+            emit('%s.append(%s)' % (result, checked), 1)
+            emit('except DataError as %s:' % err)
+            emit('%s[%d] = %s' % (errors, idx, err), 1)
+        emit('if %s:' % errors)
+        emit('raise DataError(error=%s, value=%s)' % (errors, value), 1)
+        emit('%s = tuple(%s)' % (dst, result))
+
+    def node_mapping(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        result, errors, key, value, pair_errors, err, checked_key, checked_value = (
+            self.name('mapping'), self.name('errors'), self.name('key'), self.name('value'),
+            self.name('pair_errors'), self.name('err'), self.name('ckey'), self.name('cvalue'))
+        emit('if not isinstance(%s, dict):' % src)
+        self.failure(emit, 'not_dict', src, 1)
+        emit('%s = {}' % result)
+        emit('%s = {}' % errors)
+        emit('for %s, %s in %s.items():' % (key, value, src))
+        emit('%s = {}' % pair_errors, 1)
+        emit('try:', 1)
+        self.node(trafaret.key, key, checked_key, lines, indent + 2)
+        emit('except DataError as %s:' % err, 1)
+        emit("%s['key'] = %s" % (pair_errors, err), 2)
+        emit('try:', 1)
+        self.node(trafaret.value, value, checked_value, lines, indent + 2)
+        emit('except DataError as %s:' % err, 1)
+        emit("%s['value'] = %s" % (pair_errors, err), 2)
+        emit('if %s:' % pair_errors, 1)
+        emit('%s[%s] = DataError(error=%s)' % (errors, key, pair_errors), 2)
+        emit('else:', 1)
+        emit('%s[%s] = %s' % (result, checked_key, checked_value), 2)
+        emit('if %s:' % errors)
+        emit('raise DataError(error=%s)' % errors, 1)
+        emit('%s = %s' % (dst, result))
+
+    def node_or(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        if trafaret.discriminator is not None or trafaret.adaptive or trafaret._atoms is not None:
+            self.native(trafaret, src, dst, lines, indent)
+            return
+        errors, err = self.name('errors'), self.name('err')
+        emit('%s = []' % errors)
+        # ``while`` gives ``break`` to leave on first success without nesting
+        emit('while True:')
+        for branch in trafaret.trafarets:
+            emit('try:', 1)
+            self.node(branch, src, dst, lines, indent + 2)
+            emit('break', 2)
+            emit('except DataError as %s:' % err, 1)
+            emit('%s.append(%s)' % (errors, err), 2)
+        emit('raise DataError(dict(enumerate(%s)))' % errors, 1)
+
+    def node_dict(self, trafaret, src, dst, lines, indent):
+        emit = self._emitter(lines, indent)
+        collect, errors, dynamic, err = (
+            self.name('collect'), self.name('errors'), self.name('touched'), self.name('err'))
+        emit('if not isinstance(%s, AbcMapping):' % src)
+        self.failure(emit, 'not_dict', src, 1)
+        emit('%s = {}' % collect)
+        emit('%s = {}' % errors)
+        touched = set()
+        has_dynamic = False
+        for key in trafaret.keys:
+            if type(key) is Key:
+                self.key(key, src, collect, errors, lines, indent)
+                touched.add(key.name)
+                continue
+            if not has_dynamic:
+                emit('%s = set()' % dynamic)
+                has_dynamic = True
+            k, v, names = self.name('k'), self.name('v'), self.name('names')
+            if callable(key):
+                emit('for %s, %s, %s in %s(%s):' % (k, v, names, self.bind(key, 'key'), src))
+                self.store(emit, k, v, collect, errors, 1)
+                emit('%s.update(%s)' % (dynamic, names), 1)
+            else:
+                emit("warnings.warn('Old pop based Keys subclasses deprecated. See README', DeprecationWarning)")
+                emit('%s = set(%s.keys())' % (names, src))
+                emit('for %s, %s in %s(%s):' % (k, v, self.bind(key.pop, 'pop'), src))
+                self.store(emit, k, v, collect, errors, 1)
+                emit('%s.update(%s - set(%s.keys()))' % (dynamic, names, src))
+        if not trafaret.ignore_any:
+            name = self.name('name')
+            emit('for %s in %s:' % (name, src))
+            emit('if %s in %s:' % (name, self.bind(frozenset(touched), 'touched')), 1)
+            emit('continue', 2)
+            if has_dynamic:
+                emit('if %s in %s:' % (name, dynamic), 1)
+                emit('continue', 2)
+            if trafaret.ignore:
+                emit('if %s in %s:' % (name, self.bind(list(trafaret.ignore), 'ignore')), 1)
+                emit('continue', 2)
+            if not trafaret.allow_any:
+                emit('if %s not in %s:' % (name, self.bind(list(trafaret.extras), 'extras')), 1)
+                emit("%s[%s] = DataError(code='not_allowed_key', params={'key': %s})" % (errors, name, name), 2)
+                emit('elif %s not in %s:' % (name, collect), 1)
+            else:
+                emit('if %s not in %s:' % (name, collect), 1)
+            emit('%s[%s] = %s[%s]' % (collect, name, src, name), 2)
+        emit('if %s:' % errors)
+        emit('raise DataError(error=%s)' % errors, 1)
+        emit('%s = %s' % (dst, collect))
+
+    def store(self, emit, name, value, collect, errors, shift):
+        emit('if isinstance(%s, DataError):' % value, shift)
+        emit('%s[%s] = %s' % (errors, name, value), shift + 1)
+        emit('else:', shift)
+        emit('%s[%s] = %s' % (collect, name, value), shift + 1)
+
+    def key(self, key, src, collect, errors, lines, indent):
+        emit = self._emitter(lines, indent)
+        name = self.bind(key.name, 'name')
+        to_name = self.bind(key.get_name(), 'to_name')
+        value, checked, err = self.name('value'), self.name('checked'), self.name('err')
+        emit('%s = %s.get(%s, _empty)' % (value, src, name))
+        if key.default is _empty:
+            emit('if %s is not _empty:' % value)
+            shift = 1
+        else:
+            emit('if %s is _empty:' % value)
+            emit('%s = %s%s' % (
+                value, self.bind(key.default, 'default'), '()' if callable(key.default) else ''), 1)
+            shift = 0
+        emit('try:', shift)
+        self.node(key.trafaret, value, checked, lines, indent + shift + 1)
+        emit('except DataError as %s:' % err, shift)
+        emit('%s[%s] = %s' % (errors, to_name, err), shift + 1)
+        emit('else:', shift)
+        self.store(emit, to_name, checked, collect, errors, shift + 1)
+        if key.default is _empty and not key.optional:
+            emit('else:')
+            emit("%s[%s] = DataError(code='required')" % (errors, name), 1)
+
+    emitters = {
+        Any: node_any,
+        Null: node_null,
+        Bool: node_bool,
+        Atom: node_atom,
+        Enum: node_enum,
+        Float: node_number,
+        Int: node_number,
+        String: node_string,
+        List: node_list,
+        Tuple: node_tuple,
+        Mapping: node_mapping,
+        Or: node_or,
+        Dict: node_dict,
+    }
+
+
+def compile_trafaret(trafaret):
+    """
+    Returns function that checks value same way as ``trafaret.check`` does.
+    Source of generated code is available as ``source`` attribute of function.
+    """
+    compiler = Compiler()
+    name = compiler.function(Trafaret._trafaret(trafaret))
+    source = '\n\n'.join(compiler.functions)
+    code = compile(source, '<trafaret %s>' % type(trafaret).__name__, 'exec')
+    exec(code, compiler.namespace)
+    fn = compiler.namespace[name]
+    fn.source = source
+    return fn
@@ -0,0 +1,321 @@
+"""
+Checks trafaret trees with explicit stack instead of recursive calls.
+
+``Forward(iterative=True)`` checks values with ``run``. Every supported container
+is checked by generator, that yields ``(trafaret, value)`` pairs for its items
+and receives checked items back. ``run`` keeps these generators in a list, so
+python stack does not grow with depth of value, and values nested deeper than
+recursion limit can be checked. Results and errors are the same as ``check``
+gives.
+
+Generators exist for ``Forward``, ``List``, ``Tuple``, ``Mapping``, ``Or`` and
+``Dict`` with plain ``Key`` keys. Other trafarets, including subclasses of
+built-in ones, ``Dict`` with custom keys, ``stop_on_first_error`` or
+``limit_errors`` and lazy ``List``, are called recursively as usual.
+
+>>> from trafaret import Forward, Dict, List, String, extract_error
+>>> node = Forward()
+>>> node << Dict(name=String, children=List[node])
+>>> value = {'name': 'a', 'children': [{'name': 'b', 'children': []}]}
+>>> run(node, value) == value
+True
+>>> for _ in range(5000):
+...     value = {'name': 'a', 'children': [value]}
+>>> run(node, value)['name']
+'a'
+>>> extract_error(run, node, {'name': 'a', 'children': [{'name': 1, 'children': []}]})
+{'children': {0: {'name': 'value is not a string'}}}
+
+Value that contains itself gives ``cycle`` error. With ``memoize=True`` every
+object is checked once by every trafaret during call, so shared objects are
+not checked again:
+
+>>> value = {'name': 'a', 'children': []}
+>>> value['children'].append(value)
+>>> extract_error(run, node, value, memoize=True)
+{'children': {0: 'value contains reference to itself'}}
+"""
+from itertools import islice
+from . import (
+    Trafaret, DataError, Forward, List, Tuple, Mapping, Or, Dict,
+    AbcMapping, SPARSE_RATIO, _empty, _lightweight, _collect_error, _or_error, catch_error,
+)
+
+
+# first item of pair yielded by generator when it has result
+_DONE = object()
+# result of value that is checked now
+_PENDING = object()
+
+
+def _validate(trafaret, value):
+    if isinstance(trafaret, Trafaret):
+        return trafaret._validate(value)
+    return catch_error(trafaret, value)
+
+
+def _stepper(trafaret):
+    """
+    Returns generator function that checks values with ``trafaret`` or
+    ``None`` if trafaret must be called recursively
+    """
+    if not isinstance(trafaret, Trafaret):
+        return None
+    stepper = _STEPPERS.get(type(trafaret))
+    if stepper is None:
+        return None
+    if type(trafaret) is Forward and trafaret.trafaret is None:
+        return None
+    if type(trafaret) is List and trafaret.lazy:
+        return None
+    if type(trafaret) is Dict and (trafaret._fast_plan is not None or not trafaret._plain):
+        return None
+    return stepper
+
+
+def run(trafaret, value, memoize=False):
+    """
+    Checks ``value`` with ``trafaret`` like ``_validate`` does and returns
+    result or ``DataError``
+
+    Containers that are checked now are kept by ``(id(trafaret), id(value))``,
+    so object met again while it is checked by the same trafaret gives
+    ``cycle`` error instead of endless loop. With ``memoize`` results are kept
+    by these keys until the end of call and reused when same object is met
+    again.
+    """
+    stepper = _stepper(trafaret)
+    if stepper is None:
+        return _validate(trafaret, value)
+    steppers = {}
+    # values are alive while they are checked, so their ids are not reused,
+    # memo keeps values too, because their ids are used after check
+    memo = {} if memoize else None
+    active = set()
+    key = (id(trafaret), id(value))
+    if memo is not None:
+        memo[key] = (value, _PENDING)
+    else:
+        active.add(key)
+    stack = [(stepper(trafaret, value), trafaret, key)]
+    result = None
+    while True:
+        frame, owner, key = stack[-1]
+        child, item = frame.send(result)
+        if child is _DONE:
+            stack.pop()
+            result = item
+            if not isinstance(result, DataError) and getattr(owner, 'converters', None) is not None:
+                try:
+                    result = owner._convert(result)
+                except DataError as err:
+                    result = err
+            if memo is not None:
+                memo[key] = (memo[key][0], result)
+            else:
+                active.discard(key)
+            if not stack:
+                return result
+            continue
+        # trafarets are alive while checking, so their ids are not reused
+        try:
+            stepper = steppers[id(child)]
+        except KeyError:
+            stepper = steppers[id(child)] = _stepper(child)
+        if stepper is None:
+            result = _validate(child, item)
+            continue
+        key = (id(child), id(item))
+        if memo is not None:
+            found = memo.get(key)
+            if found is not None:
+                result = found[1]
+                if result is _PENDING:
+                    result = DataError(code='cycle', value=item)
+                continue
+            memo[key] = (item, _PENDING)
+        elif key in active:
+            result = DataError(code='cycle', value=item)
+            continue
+        else:
+            active.add(key)
+        stack.append((stepper(child, item), child, key))
+        result = None
+
+
+def _forward(trafaret, value):
+    result = yield trafaret.trafaret, value
+    yield _DONE, result
+
+
+def _list(trafaret, value):
+    error = trafaret._length_error(value)
+    if error is not None:
+        yield _DONE, error
+        return
+    child = trafaret.trafaret
+    lst = None if trafaret.reuse_input and type(value) is list else []
+    errors = {}
+    for index, item in enumerate(value):
+        result = yield child, item
+        if isinstance(result, DataError):
+            if _collect_error(trafaret, errors, index, result, len(value) - index - 1, 'items'):
+                break
+        elif lst is not None:
+            lst.append(result)
+        elif result is not item:
+            lst = value[:index]
+            lst.append(result)
+    if errors:
+        yield _DONE, DataError(error=errors)
+    elif lst is None:
+        yield _DONE, value
+    else:
+        yield _DONE, lst
+
+
+def _tuple(trafaret, value):
+    original = value
+    value = trafaret._as_tuple(value)
+    if isinstance(value, DataError):
+        yield _DONE, value
+        return
+    result = None if trafaret.reuse_input and value is original else []
+    errors = {}
+    for idx, (item, child) in enumerate(zip(value, trafaret.trafarets)):
+        checked = yield child, item
+        if isinstance(checked, DataError):
+            if _collect_error(trafaret, errors, idx, checked, trafaret.length - idx - 1, 'items'):
+                break
+        elif result is not None:
+            result.append(checked)
+        elif checked is not item:
+            result = list(value[:idx])
+            result.append(checked)
+    if errors:
+        yield _DONE, trafaret._items_error(errors, value)
+    else:
+        yield _DONE, value if result is None else tuple(result)
+
+
+def _mapping(trafaret, mapping):
+    if not isinstance(mapping, dict):
+        error = DataError(code='not_dict', value=mapping)
+        yield _DONE, _lightweight(error) if trafaret.lightweight_errors else error
+        return
+    checked_mapping = None if trafaret.reuse_input and type(mapping) is dict else {}
+    errors = {}
+    for checked, (key, value) in enumerate(mapping.items(), 1):
+        pair_errors = {}
+        checked_key = yield trafaret.key, key
+        if isinstance(checked_key, DataError):
+            pair_errors['key'] = checked_key
+        checked_value = yield trafaret.value, value
+        if isinstance(checked_value, DataError):
+            pair_errors['value'] = checked_value
+        if pair_errors:
+            if _collect_error(trafaret, errors, key, DataError(error=pair_errors), len(mapping) - checked, 'pairs'):
+                break
+        elif checked_mapping is not None:
+            checked_mapping[checked_key] = checked_value
+        elif checked_key is not key or checked_value is not value:
+            checked_mapping = dict(islice(mapping.items(), checked - 1))
+            checked_mapping[checked_key] = checked_value
+    if errors:
+        yield _DONE, DataError(error=errors)
+    elif checked_mapping is None:
+        yield _DONE, mapping
+    else:
+        yield _DONE, checked_mapping
+
+
+def _or(trafaret, value):
+    trafarets = trafaret.trafarets
+    if trafaret._tags is not None:
+        indexes = trafaret._candidates(value)
+        if isinstance(indexes, DataError):
+            yield _DONE, indexes
+            return
+        errors = {}
+        for index in indexes:
+            result = yield trafarets[index], value
+            if not isinstance(result, DataError):
+                yield _DONE, result
+                return
+            errors[index] = result
+        yield _DONE, DataError(errors)
+        return
+    if trafaret._atoms is not None:
+        try:
+            index = trafaret._atoms.get(value)
+        except TypeError:
+            index = None
+        if index is not None:
+            result = trafarets[index]._validate(value)
+            if not isinstance(result, DataError):
+                if trafaret.adaptive:
+                    trafaret._hit(index)
+                yield _DONE, result
+                return
+    type_ = type(value)
+    try:
+        indexes = trafaret._by_type[type_]
+    except KeyError:
+        indexes = trafaret._by_type[type_] = trafaret._type_candidates(type_)
+    errors = {}
+    for index in indexes:
+        result = yield trafarets[index], value
+        if not isinstance(result, DataError):
+            if trafaret.adaptive:
+                trafaret._hit(index)
+            yield _DONE, result
+            return
+        errors[index] = result
+    if len(errors) < len(trafarets):
+        for index, branch in enumerate(trafarets):
+            if index not in errors:
+                errors[index] = yield branch, value
+    yield _DONE, _or_error(errors)
+
+
+def _dict(trafaret, value):
+    if not isinstance(value, AbcMapping):
+        yield _DONE, DataError(code='not_dict', value=value)
+        return
+    collect = {}
+    errors = {}
+    plan = trafaret._plan
+    if len(value) * SPARSE_RATIO < len(trafaret._sparse):
+        plan = trafaret._sparse_plan(value)
+    for _, key in plan:
+        item = value.get(key.name, _empty)
+        if item is _empty:
+            default = key.default
+            if default is _empty:
+                if not key.optional:
+                    errors[key.name] = DataError(code='required')
+                continue
+            item = default() if callable(default) else default
+        item = yield key.trafaret, item
+        if isinstance(item, DataError):
+            errors[key.to_name or key.name] = item
+        else:
+            collect[key.to_name or key.name] = item
+    if not trafaret.ignore_any:
+        trafaret._check_unknown(value, collect, errors)
+    if errors:
+        yield _DONE, DataError(error=errors)
+    elif trafaret.reuse_input:
+        yield _DONE, trafaret._reused(value, collect)
+    else:
+        yield _DONE, collect
+
+
+_STEPPERS = {
+    Forward: _forward,
+    List: _list,
+    Tuple: _tuple,
+    Mapping: _mapping,
+    Or: _or,
+    Dict: _dict,
+}
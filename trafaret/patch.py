@@ -0,0 +1,346 @@
+"""
+Checks values changed by JSON Patch operations without checking them again.
+
+``apply_patch`` takes trafaret, value that passed it and result of its check,
+and applies ``add``, ``replace`` and ``remove`` operations from RFC 6902. Only
+values put by operations are checked. Containers on the path of operation are
+copied and their own constraints are checked again: required and not allowed
+keys of ``Dict``, custom keys like ``KeysSubset`` that use changed name, and
+length of ``List``. Containers that can not be walked this way, like ``Tuple``,
+``Or``, trafarets with converters and subclasses of built-in ones, are checked
+completely from the point where path enters them. So are ``Dict`` and
+``Mapping`` when changed name can give the same name in result as other keys.
+
+>>> from trafaret import Dict, Key, Int, String, List, extract_error
+>>> trafaret = Dict(name=String, tags=List(String, max_length=2))
+>>> value = {'name': 'a', 'tags': ['x']}
+>>> result = trafaret.check(value)
+>>> value, result = apply_patch(trafaret, value, result, [
+...     {'op': 'add', 'path': '/tags/-', 'value': 'y'},
+...     {'op': 'replace', 'path': '/name', 'value': 'b'},
+... ])
+>>> result == {'name': 'b', 'tags': ['x', 'y']}
+True
+>>> extract_error(apply_patch, trafaret, value, result, [{'op': 'add', 'path': '/tags/0', 'value': 'z'}])
+{'tags': 'list length is greater than 2'}
+>>> extract_error(apply_patch, trafaret, value, result, [{'op': 'remove', 'path': '/name'}])
+{'name': 'is required'}
+"""
+import copy
+from . import (
+    Trafaret, DataError, Forward, List, Mapping, Dict, Key,
+    Any, Atom, Enum, String, Type, AbcMapping, str_types, _shared_error, catch_error,
+)
+
+
+OPERATIONS = ('add', 'replace', 'remove')
+
+
+def _validate(trafaret, value):
+    if isinstance(trafaret, Trafaret):
+        return trafaret._validate(value)
+    return catch_error(trafaret, value)
+
+
+def parse_path(path):
+    """
+    Returns list of reference tokens of JSON Pointer. Lists and tuples of
+    tokens are returned as list.
+    """
+    if not isinstance(path, str_types):
+        return list(path)
+    if not path:
+        return []
+    if not path.startswith('/'):
+        raise ValueError('path must start with "/": %r' % path)
+    return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+
+def _index(lst, token, op):
+    if token == '-' and op == 'add':
+        return len(lst)
+    try:
+        index = int(token)
+    except (TypeError, ValueError):
+        raise ValueError('%r is not list index' % (token,))
+    if not 0 <= index < len(lst) + (op == 'add'):
+        raise ValueError('list index %r is out of range' % (token,))
+    return index
+
+
+def _patched(value, path, op, item):
+    """
+    Returns copy of ``value`` with operation applied, only containers on the
+    path are copied
+    """
+    if not path:
+        if op == 'remove':
+            raise ValueError('whole value can not be removed')
+        return item
+    token = path[0]
+    if isinstance(value, list):
+        index = _index(value, token, op if len(path) == 1 else 'replace')
+        value = list(value)
+        if len(path) > 1:
+            value[index] = _patched(value[index], path[1:], op, item)
+        elif op == 'add':
+            value.insert(index, item)
+        elif op == 'replace':
+            value[index] = item
+        else:
+            del value[index]
+        return value
+    if isinstance(value, AbcMapping):
+        if token not in value and (len(path) > 1 or op != 'add'):
+            raise ValueError('path does not exist: %r' % (token,))
+        value = copy.copy(value)
+        if len(path) > 1:
+            value[token] = _patched(value[token], path[1:], op, item)
+        elif op == 'remove':
+            del value[token]
+        else:
+            value[token] = item
+        return value
+    raise ValueError('path does not exist: %r' % (token,))
+
+
+def _apply(trafaret, value, result, path, op, item):
+    """
+    Returns patched value and its checked result or ``DataError``
+    """
+    while type(trafaret) is Forward and trafaret.trafaret is not None \
+            and getattr(trafaret, 'converters', None) is None:
+        trafaret = trafaret.trafaret
+    if not path:
+        item = _patched(value, path, op, item)
+        return item, _validate(trafaret, item)
+    walker = _WALKERS.get(type(trafaret))
+    if walker is not None and getattr(trafaret, 'converters', None) is None:
+        walked = walker(trafaret, value, result, path, op, item)
+        if walked is not None:
+            return walked
+    value = _patched(value, path, op, item)
+    return value, _validate(trafaret, value)
+
+
+def _list(trafaret, value, result, path, op, item):
+    if trafaret.lazy or type(value) is not list or type(result) is not list:
+        return None
+    if len(path) > 1:
+        index = _index(value, path[0], 'replace')
+        child_value, child_result = _apply(
+            trafaret.trafaret, value[index], result[index], path[1:], op, item)
+        value = list(value)
+        value[index] = child_value
+        if isinstance(child_result, DataError):
+            return value, DataError(error={index: child_result})
+        result = list(result)
+        result[index] = child_result
+        return value, result
+    index = _index(value, path[0], op)
+    value = _patched(value, path, op, item)
+    error = trafaret._length_error(value)
+    if error is not None:
+        return value, error
+    result = list(result)
+    if op == 'remove':
+        del result[index]
+        return value, result
+    checked = _validate(trafaret.trafaret, item)
+    if isinstance(checked, DataError):
+        if trafaret.lightweight_errors:
+            checked = _shared_error(checked)
+        return value, DataError(error={index: checked})
+    if op == 'add':
+        result.insert(index, checked)
+    else:
+        result[index] = checked
+    return value, result
+
+
+def _injective(trafaret):
+    """
+    Returns True if ``trafaret`` is known to return valid values unchanged, so
+    distinct names can not give one name in result
+    """
+    if getattr(trafaret, 'converters', None) is not None:
+        return False
+    if type(trafaret) is String:
+        return trafaret.regex is None
+    if type(trafaret) is Enum:
+        return not trafaret.casefold
+    return type(trafaret) in (Any, Atom, Type)
+
+
+def _mapping(trafaret, value, result, path, op, item):
+    if not isinstance(value, dict) or not isinstance(result, dict):
+        return None
+    if not _injective(trafaret.key):
+        # other names can give the same key, which one wins is known only
+        # from full check
+        return None
+    name = path[0]
+    checked_key = _validate(trafaret.key, name)
+    if len(path) > 1 and name in value and not isinstance(checked_key, DataError) \
+            and checked_key in result:
+        child_value, child_result = _apply(
+            trafaret.value, value[name], result[checked_key], path[1:], op, item)
+        value = copy.copy(value)
+        value[name] = child_value
+        if isinstance(child_result, DataError):
+            return value, DataError(error={name: DataError(error={'value': child_result})})
+        result = dict(result)
+        result[checked_key] = child_result
+        return value, result
+    value = _patched(value, path, op, item)
+    result = dict(result)
+    if name not in value:
+        if not isinstance(checked_key, DataError):
+            result.pop(checked_key, None)
+        return value, result
+    pair_errors = {}
+    if isinstance(checked_key, DataError):
+        pair_errors['key'] = checked_key
+    checked_value = _validate(trafaret.value, value[name])
+    if isinstance(checked_value, DataError):
+        pair_errors['value'] = checked_value
+    if pair_errors:
+        error = DataError(error=pair_errors)
+        return value, DataError(error={name: _shared_error(error) if trafaret.lightweight_errors else error})
+    result[checked_key] = checked_value
+    return value, result
+
+
+def _collides(trafaret, value, name):
+    """
+    Returns True if result name written for ``name`` can be written by other
+    keys or extras of ``Dict`` too, then only full check gives right result
+    """
+    writers = {}
+    renamed = set()
+    used = []
+    for extract, key in trafaret._plan:
+        if extract is None:
+            continue
+        to_name = key.get_name()
+        writers[to_name] = writers.get(to_name, 0) + 1
+        keys_names = set(key.keys_names())
+        if to_name not in keys_names:
+            renamed.add(to_name)
+        if name in keys_names:
+            used.append(to_name)
+    if name in renamed:
+        return True
+    return any(
+        to_name in renamed and (to_name in value or writers[to_name] > 1)
+        for to_name in used
+    )
+
+
+def _dict(trafaret, value, result, path, op, item):
+    if not isinstance(value, AbcMapping) or not isinstance(result, dict):
+        return None
+    if any(extract is None and not callable(key) for extract, key in trafaret._plan):
+        # old pop based keys do not tell which names they use
+        return None
+    name = path[0]
+    if _collides(trafaret, value, name):
+        return None
+    plain = None
+    for key in trafaret.keys:
+        if type(key) is Key and key.name == name:
+            plain = key
+    collect = dict(result)
+    errors = {}
+    if len(path) > 1 and plain is not None and name in value \
+            and (plain.to_name or plain.name) in result:
+        to_name = plain.to_name or plain.name
+        child_value, child_result = _apply(
+            plain.trafaret, value[name], result[to_name], path[1:], op, item)
+        value = copy.copy(value)
+        value[name] = child_value
+        if isinstance(child_result, DataError):
+            errors[to_name] = child_result
+        else:
+            collect[to_name] = child_result
+    else:
+        value = _patched(value, path, op, item)
+        touched_names = set()
+        for extract, key in trafaret._plan:
+            if extract is not None:
+                if name in key.keys_names():
+                    collect.pop(key.get_name(), None)
+                    extract(value, collect, errors)
+                continue
+            keys_names = getattr(key, 'keys_names', None)
+            if keys_names is not None and name not in keys_names():
+                touched_names.update(keys_names())
+                continue
+            for k, v, names in key(value):
+                if isinstance(v, DataError):
+                    errors[k] = v
+                else:
+                    collect[k] = v
+                touched_names.update(names)
+        if name not in trafaret._names and name not in touched_names \
+                and name not in trafaret._ignore_names and not trafaret.ignore_any:
+            if not trafaret._static:
+                # generator keys can write extra name in result
+                return None
+            if name not in value:
+                collect.pop(name, None)
+            elif not trafaret.allow_any and name not in trafaret._extras_names:
+                errors[name] = DataError(code='not_allowed_key', params={'key': name})
+            else:
+                collect[name] = value[name]
+    if errors:
+        return value, DataError(error=errors)
+    if trafaret.reuse_input:
+        return value, trafaret._reused(value, collect)
+    return value, collect
+
+
+_WALKERS = {
+    List: _list,
+    Mapping: _mapping,
+    Dict: _dict,
+}
+
+
+def apply_patch(trafaret, value, result, operations):
+    """
+    Applies JSON Patch ``operations`` to ``value`` that was checked by
+    ``trafaret`` with ``result``. Returns pair of new value and its checked
+    result or raises ``DataError`` if patched value is invalid.
+
+    Operations are dicts with ``op``, ``path`` and ``value`` for ``add`` and
+    ``replace``. Path is JSON Pointer string or list of tokens. ``value`` and
+    ``result`` are not changed.
+
+    Patch is checked as a whole, so when operation leaves value invalid, the
+    rest of operations are applied without checks and patched value is
+    checked completely.
+    """
+    operations = list(operations)
+    for number, operation in enumerate(operations):
+        op, path, item = _operation(operation)
+        value, result = _apply(trafaret, value, result, path, op, item)
+        if isinstance(result, DataError):
+            break
+    else:
+        return value, result
+    for operation in operations[number + 1:]:
+        op, path, item = _operation(operation)
+        value = _patched(value, path, op, item)
+    result = _validate(trafaret, value)
+    if isinstance(result, DataError):
+        raise result
+    return value, result
+
+
+def _operation(operation):
+    op = operation['op']
+    if op not in OPERATIONS:
+        raise ValueError('operation is not supported: %r' % (op,))
+    item = None if op == 'remove' else operation['value']
+    return op, parse_path(operation['path']), item